@@ -0,0 +1,152 @@
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Tuple
+import threading
+import time
+from markets import EMPTY_MASK, union_masks
+
+
+class CoauthorIndex:
+    """
+    In-memory weighted coauthor adjacency of Spotify artists.
+
+    Every artist maps to its coauthors as (coauthor ID, collaboration count,
+    collaborations per release year, markets mask) tuples sorted by descending
+    count, ties keeping the order of first appearance, so a top N lookup is a
+    slice of the list.
+    """
+
+    def __init__(self):
+        self._adjacency: Dict[str, List[Tuple[str, int, Dict[int, int], str]]] = {}
+        self._names: Dict[str, str] = {}
+        # When the discography of every artist was fetched, to refresh expired ones
+        self._fetched_at: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def __contains__(self, artist_id: str) -> bool:
+        return artist_id in self._adjacency
+
+    def __len__(self) -> int:
+        return len(self._adjacency)
+
+    def set_coauthors(
+        self,
+        artist_id: str,
+        coauthors: Iterable[Dict],
+        fetched_at: Optional[float] = None,
+    ) -> None:
+        """
+        Replace the coauthors of an artist.
+
+        Args:
+            artist_id (str): The Spotify ID of the artist.
+            coauthors (iterable): The coauthors with their names, IDs, counts,
+                counts per release year and markets masks, in order of first
+                appearance.
+            fetched_at (float): The UNIX time the discography was fetched, now if None.
+        """
+        coauthors = list(coauthors)
+        neighbors = sorted(
+            (
+                (
+                    coauthor["id"],
+                    coauthor["count"],
+                    coauthor.get("years", {}),
+                    coauthor.get("markets", EMPTY_MASK),
+                )
+                for coauthor in coauthors
+            ),
+            key=lambda neighbor: -neighbor[1],
+        )
+        with self._lock:
+            for coauthor in coauthors:
+                self._names[coauthor["id"]] = coauthor["name"]
+            self._adjacency[artist_id] = neighbors
+            self._fetched_at[artist_id] = (
+                fetched_at if fetched_at is not None else time.time()
+            )
+
+    def ingest(self, artist_id: str, tracks: List[Dict]) -> None:
+        """
+        Count the coauthors in newly fetched tracks of an artist.
+
+        Args:
+            artist_id (str): The Spotify ID of the artist.
+            tracks (list): The tracks with all credited artists under "artists",
+                as returned by fetch_discography.
+        """
+        counts = Counter()
+        years: Dict[str, Counter] = {}
+        markets: Dict[str, List[str]] = {}
+        names = {}
+        for track in tracks:
+            year = track.get("release_year")
+            for artist in track["artists"]:
+                if artist["id"] != artist_id:
+                    counts[artist["id"]] += 1
+                    names.setdefault(artist["id"], artist["name"])
+                    coauthor_years = years.setdefault(artist["id"], Counter())
+                    if year is not None:
+                        coauthor_years[year] += 1
+                    markets.setdefault(artist["id"], []).append(track["markets"])
+        self.set_coauthors(
+            artist_id,
+            (
+                {
+                    "id": coauthor_id,
+                    "name": names[coauthor_id],
+                    "count": count,
+                    "years": dict(years[coauthor_id]),
+                    "markets": union_masks(markets[coauthor_id]),
+                }
+                for coauthor_id, count in counts.items()
+            ),
+        )
+
+    def top(self, artist_id: str, top_n: Optional[int] = 5) -> List[Dict]:
+        """
+        Get the top N most frequent coauthors of an artist.
+
+        Args:
+            artist_id (str): The Spotify ID of the artist.
+            top_n (int): Number of top coauthors to return, None for all of them.
+
+        Returns:
+            list: The top coauthors with their names, IDs, counts, counts per
+                release year and the mask of the markets any common song is
+                available in.
+        """
+        neighbors = self._adjacency.get(artist_id, [])[:top_n]
+        return [
+            {
+                "name": self._names[coauthor_id],
+                "id": coauthor_id,
+                "count": count,
+                "years": years,
+                "markets": markets,
+            }
+            for coauthor_id, count, years, markets in neighbors
+        ]
+
+    def fetched_at(self, artist_id: str) -> Optional[float]:
+        return self._fetched_at.get(artist_id)
+
+    def name(self, artist_id: str) -> str:
+        return self._names.get(artist_id, artist_id)
+
+    def edges(self) -> List[Tuple[str, str, int]]:
+        """
+        Get the weighted edge list of all indexed artists.
+
+        Edges are directed from the artist whose discography contains the
+        songs to the coauthor, so a pair of indexed artists may appear in
+        both directions.
+
+        Returns:
+            list: The (artist ID, coauthor ID, count) triples.
+        """
+        with self._lock:
+            return [
+                (artist_id, coauthor_id, count)
+                for artist_id, neighbors in self._adjacency.items()
+                for coauthor_id, count, _, _ in neighbors
+            ]
@@ -0,0 +1,517 @@
+from typing import Dict, Hashable, Iterable, Optional, Sequence, Tuple
+import argparse
+import time
+import numpy as np
+from scipy import sparse
+from scipy.sparse import csgraph
+from get_data import load_coauthor_index
+
+
+# Number of BFS sources searched at once, one bit of a word per source
+BFS_BATCH_SIZE = 64
+# Number of resamples of the sampled sources to compute confidence intervals
+BOOTSTRAP_RESAMPLES = 1000
+
+
+class CSRGraph:
+    """
+    Compact undirected graph in compressed sparse row form.
+
+    The neighbors of node i are indices[indptr[i]:indptr[i + 1]], sorted
+    ascending. Every edge is stored in both directions, without self-loops
+    or duplicates, so a graph of millions of edges takes a few bytes per edge.
+    The analyses ignore edge weights.
+
+    Args:
+        indptr (np.ndarray): The offsets of the neighbors of every node.
+        indices (np.ndarray): The neighbors of all nodes, one row after another.
+        labels (sequence): The label of every node, e.g. a Spotify artist ID,
+            None to label nodes by their index.
+        weights (np.ndarray): The weight of every entry of indices, e.g. the
+            number of parallel edges, None for an unweighted graph.
+    """
+
+    def __init__(
+        self,
+        indptr: np.ndarray,
+        indices: np.ndarray,
+        labels: Optional[Sequence[Hashable]] = None,
+        weights: Optional[np.ndarray] = None,
+    ):
+        self.indptr = indptr
+        self.indices = indices
+        self.labels = labels if labels is not None else np.arange(len(indptr) - 1)
+        self.weights = weights
+
+    def __len__(self) -> int:
+        return len(self.indptr) - 1
+
+    @property
+    def n_edges(self) -> int:
+        return len(self.indices) // 2
+
+    @classmethod
+    def from_edges(
+        cls,
+        sources: np.ndarray,
+        targets: np.ndarray,
+        n_nodes: Optional[int] = None,
+        labels: Optional[Sequence[Hashable]] = None,
+        weights: Optional[np.ndarray] = None,
+    ) -> "CSRGraph":
+        """
+        Build a graph from edge arrays of node indices. Edge directions and
+        self-loops are ignored, and duplicate edges are merged into one edge
+        weighing their total weight.
+
+        Args:
+            sources (np.ndarray): The index of the first node of every edge.
+            targets (np.ndarray): The index of the second node of every edge.
+            n_nodes (int): The number of nodes, None for the largest index plus one.
+            labels (sequence): The label of every node.
+            weights (np.ndarray): The weight of every edge, e.g. ones to count
+                parallel edges, None for an unweighted graph.
+
+        Returns:
+            CSRGraph: The graph.
+        """
+        sources = np.asarray(sources, dtype=np.int64)
+        targets = np.asarray(targets, dtype=np.int64)
+        if n_nodes is None:
+            n_nodes = int(max(sources.max(initial=-1), targets.max(initial=-1))) + 1
+        keep = sources != targets
+        sources, targets = sources[keep], targets[keep]
+        values = (
+            np.ones(len(sources), dtype=np.int32)
+            if weights is None
+            else np.asarray(weights, dtype=float)[keep]
+        )
+        matrix = sparse.coo_matrix(
+            (
+                np.concatenate([values, values]),
+                (
+                    np.concatenate([sources, targets]),
+                    np.concatenate([targets, sources]),
+                ),
+            ),
+            shape=(n_nodes, n_nodes),
+        ).tocsr()
+        matrix.sum_duplicates()
+        matrix.sort_indices()
+        index_dtype = np.int32 if n_nodes < 2**31 else np.int64
+        return cls(
+            matrix.indptr.astype(np.int64),
+            matrix.indices.astype(index_dtype),
+            labels,
+            matrix.data if weights is not None else None,
+        )
+
+    @classmethod
+    def from_edge_list(cls, edges: Iterable[Tuple[Hashable, Hashable]]) -> "CSRGraph":
+        """
+        Build a graph from pairs of node labels, e.g. artist IDs.
+
+        Args:
+            edges (iterable): The (label, label) pairs of every edge.
+
+        Returns:
+            CSRGraph: The graph, its nodes labeled in order of first appearance.
+        """
+        codes: Dict[Hashable, int] = {}
+        pairs = [
+            (codes.setdefault(source, len(codes)), codes.setdefault(target, len(codes)))
+            for source, target in edges
+        ]
+        pairs = np.array(pairs, dtype=np.int64).reshape(-1, 2)
+        return cls.from_edges(pairs[:, 0], pairs[:, 1], len(codes), list(codes))
+
+    @classmethod
+    def from_coauthor_index(cls, index) -> "CSRGraph":
+        """
+        Build the collaboration graph of a coauthor index, ignoring
+        collaboration counts.
+
+        Args:
+            index (CoauthorIndex): The coauthor index, e.g. from load_coauthor_index.
+
+        Returns:
+            CSRGraph: The graph, its nodes labeled with Spotify artist IDs.
+        """
+        return cls.from_edge_list(
+            (artist_id, coauthor_id) for artist_id, coauthor_id, _ in index.edges()
+        )
+
+    def to_matrix(self) -> sparse.csr_matrix:
+        values = (
+            self.weights
+            if self.weights is not None
+            else np.ones(len(self.indices), dtype=np.int8)
+        )
+        return sparse.csr_matrix(
+            (values, self.indices, self.indptr), shape=(len(self), len(self))
+        )
+
+    def degrees(self) -> np.ndarray:
+        return np.diff(self.indptr)
+
+    def neighbors(self, node: int) -> np.ndarray:
+        return self.indices[self.indptr[node] : self.indptr[node + 1]]
+
+    def subgraph(self, nodes: np.ndarray) -> "CSRGraph":
+        """
+        Get the subgraph induced by a set of nodes.
+
+        Args:
+            nodes (np.ndarray): The node indices, or a boolean mask over all nodes.
+
+        Returns:
+            CSRGraph: The subgraph, its nodes in ascending index order.
+        """
+        mask = np.zeros(len(self), dtype=bool)
+        mask[nodes] = True
+        nodes = np.flatnonzero(mask)
+        matrix = self.to_matrix()[nodes][:, nodes].tocsr()
+        matrix.sort_indices()
+        return CSRGraph(
+            matrix.indptr.astype(np.int64),
+            matrix.indices.astype(self.indices.dtype),
+            [self.labels[node] for node in nodes],
+            matrix.data if self.weights is not None else None,
+        )
+
+
+def gather_neighbors(graph: CSRGraph, nodes: np.ndarray) -> np.ndarray:
+    """
+    Get the neighbors of a set of nodes without a Python loop.
+
+    Args:
+        graph (CSRGraph): The graph.
+        nodes (np.ndarray): The node indices.
+
+    Returns:
+        np.ndarray: The neighbors of all nodes concatenated, with repetitions.
+    """
+    starts = graph.indptr[nodes]
+    lengths = graph.indptr[nodes + 1] - starts
+    if not lengths.sum():
+        return np.empty(0, dtype=graph.indices.dtype)
+    # Position of every gathered neighbor within the row of its node
+    offsets = np.arange(lengths.sum()) - np.repeat(
+        np.cumsum(lengths) - lengths, lengths
+    )
+    return graph.indices[np.repeat(starts, lengths) + offsets]
+
+
+def multi_source_bfs(graph: CSRGraph, sources: np.ndarray) -> np.ndarray:
+    """
+    Count the nodes at every distance from each of a batch of sources.
+
+    All sources are searched at once: every node holds a word with one bit
+    per source, and a level of the search ORs the frontier words of the
+    neighbors of every node in a single pass over the edges.
+
+    Args:
+        graph (CSRGraph): The graph.
+        sources (np.ndarray): At most BFS_BATCH_SIZE node indices.
+
+    Returns:
+        np.ndarray: The number of nodes at every distance (columns) from every
+            source (rows), the source itself at distance 0.
+    """
+    if len(sources) > BFS_BATCH_SIZE:
+        raise Exception(f"At most {BFS_BATCH_SIZE} sources are searched at once")
+    bits = np.left_shift(np.uint64(1), np.arange(len(sources), dtype=np.uint64))
+    frontier = np.zeros(len(graph), dtype=np.uint64)
+    np.bitwise_or.at(frontier, sources, bits)
+    visited = frontier.copy()
+    # reduceat yields an element of the next row for nodes without neighbors,
+    # and the sentinel after the last row for trailing nodes without neighbors
+    has_neighbors = np.diff(graph.indptr) > 0
+    sentinel = np.zeros(1, dtype=np.uint64)
+
+    levels = [np.ones(len(sources), dtype=np.int64)]
+    while frontier.any() and len(graph.indices):
+        reached = np.bitwise_or.reduceat(
+            np.concatenate([frontier[graph.indices], sentinel]), graph.indptr[:-1]
+        )
+        reached[~has_neighbors] = 0
+        frontier = reached & ~visited
+        visited |= frontier
+        nonzero = frontier[frontier != 0]
+        if not len(nonzero):
+            break
+        source_bits = np.unpackbits(
+            nonzero.astype("<u8").view(np.uint8).reshape(-1, 8),
+            axis=1,
+            bitorder="little",
+        )
+        levels.append(source_bits[:, : len(sources)].sum(axis=0, dtype=np.int64))
+    return np.stack(levels, axis=1)
+
+
+def connected_components(graph: CSRGraph) -> Tuple[int, np.ndarray]:
+    """
+    Find the connected components of a graph.
+
+    Args:
+        graph (CSRGraph): The graph.
+
+    Returns:
+        tuple: The number of components and the component of every node.
+    """
+    return csgraph.connected_components(graph.to_matrix(), directed=False)
+
+
+def largest_component(graph: CSRGraph) -> CSRGraph:
+    """
+    Get the largest connected component of a graph.
+
+    Args:
+        graph (CSRGraph): The graph.
+
+    Returns:
+        CSRGraph: The subgraph induced by the nodes of the largest component.
+    """
+    _, components = connected_components(graph)
+    largest = np.argmax(np.bincount(components)) if len(components) else 0
+    return graph.subgraph(components == largest)
+
+
+def sample_path_lengths(
+    graph: CSRGraph,
+    n_sources: int = 100,
+    confidence: float = 0.95,
+    seed: Optional[int] = None,
+) -> Dict:
+    """
+    Estimate the average shortest path length between connected pairs of
+    nodes from breadth-first searches of randomly sampled sources.
+
+    Every BFS yields the distances from its source to all reachable nodes,
+    so far more pairs are sampled than with one search per pair, and pairs
+    of nodes in different components are simply left out instead of being
+    redrawn. The confidence interval is a percentile bootstrap over the
+    sources, as the pairs sharing a source are not independent.
+
+    Args:
+        graph (CSRGraph): The graph.
+        n_sources (int): Number of BFS sources, all nodes if it exceeds the graph size.
+        confidence (float): The confidence level of the interval.
+        seed (int): The seed of the random source selection, None for a random seed.
+
+    Returns:
+        dict: The estimated mean path length, the bounds of its confidence
+            interval, the longest sampled path, the numbers of sources and
+            pairs, and the number of sampled pairs at every distance.
+    """
+    rng = np.random.default_rng(seed)
+    n_sources = min(n_sources, len(graph))
+    sources = rng.choice(len(graph), size=n_sources, replace=False)
+    totals = np.zeros(n_sources)
+    counts = np.zeros(n_sources)
+    histogram = np.zeros(1, dtype=np.int64)
+    for start in range(0, n_sources, BFS_BATCH_SIZE):
+        batch = slice(start, start + BFS_BATCH_SIZE)
+        levels = multi_source_bfs(graph, sources[batch])
+        distances = np.arange(levels.shape[1])
+        totals[batch] = levels @ distances
+        counts[batch] = levels[:, 1:].sum(axis=1)
+        if levels.shape[1] > len(histogram):
+            histogram = np.pad(histogram, (0, levels.shape[1] - len(histogram)))
+        histogram[: levels.shape[1]] += levels.sum(axis=0)
+    histogram[0] = 0
+
+    n_pairs = int(counts.sum())
+    if not n_pairs:
+        return {
+            "mean": float("nan"),
+            "ci_low": float("nan"),
+            "ci_high": float("nan"),
+            "max": 0,
+            "n_sources": n_sources,
+            "n_pairs": 0,
+            "distribution": {},
+        }
+
+    resamples = rng.integers(n_sources, size=(BOOTSTRAP_RESAMPLES, n_sources))
+    resampled_counts = counts[resamples].sum(axis=1)
+    resampled_means = totals[resamples].sum(axis=1) / np.maximum(resampled_counts, 1)
+    resampled_means = resampled_means[resampled_counts > 0]
+    alpha = (1 - confidence) / 2
+    ci_low, ci_high = np.quantile(resampled_means, [alpha, 1 - alpha])
+    return {
+        "mean": float(totals.sum() / n_pairs),
+        "ci_low": float(ci_low),
+        "ci_high": float(ci_high),
+        "max": len(histogram) - 1,
+        "n_sources": n_sources,
+        "n_pairs": n_pairs,
+        "distribution": {
+            distance: int(count)
+            for distance, count in enumerate(histogram.tolist())
+            if count
+        },
+    }
+
+
+def core_numbers(graph: CSRGraph) -> np.ndarray:
+    """
+    Compute the core number of every node, the largest k such that the node
+    belongs to a subgraph where every node has at least k neighbors.
+
+    Nodes are peeled off in vectorized rounds: every round removes all
+    remaining nodes of degree at most k at once and decrements the degrees
+    of their neighbors, and k grows once no such node remains.
+
+    Args:
+        graph (CSRGraph): The graph.
+
+    Returns:
+        np.ndarray: The core number of every node.
+    """
+    degrees = graph.degrees().astype(np.int64)
+    cores = np.zeros(len(graph), dtype=np.int64)
+    remaining = np.ones(len(graph), dtype=bool)
+    k = 0
+    while remaining.any():
+        k = max(k, int(degrees[remaining].min()))
+        while True:
+            peeled = np.flatnonzero(remaining & (degrees <= k))
+            if not len(peeled):
+                break
+            cores[peeled] = k
+            remaining[peeled] = False
+            neighbors = gather_neighbors(graph, peeled)
+            degrees -= np.bincount(neighbors, minlength=len(graph))
+    return cores
+
+
+def degree_ccdf(degrees: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Compute the complementary cumulative distribution of node degrees.
+
+    Args:
+        degrees (np.ndarray): The degree of every node.
+
+    Returns:
+        tuple: The distinct positive degrees k in ascending order and the
+            share of nodes of degree at least k.
+    """
+    degrees = np.asarray(degrees)
+    values, counts = np.unique(degrees[degrees > 0], return_counts=True)
+    at_least = np.cumsum(counts[::-1])[::-1]
+    return values, at_least / len(degrees)
+
+
+def hill_estimates(degrees: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Compute the Hill estimates of the power-law exponent of the degree
+    distribution for every number of top-ranked degrees in the tail.
+
+    For the degrees x_1 >= x_2 >= ... and k top degrees, the estimate is
+    1 + 1 / ((1 / k) * sum_{i <= k} log(x_i / x_{k+1})). A plateau of the
+    estimates over k is the exponent of the tail.
+
+    Args:
+        degrees (np.ndarray): The degree of every node.
+
+    Returns:
+        tuple: The numbers of top degrees k and the estimate for every k,
+            NaN where the top k + 1 degrees are all equal.
+    """
+    degrees = np.sort(np.asarray(degrees, dtype=float))[::-1]
+    log_degrees = np.log(degrees[degrees > 0])
+    ks = np.arange(1, len(log_degrees))
+    means = np.cumsum(log_degrees)[:-1] / ks - log_degrees[1:]
+    with np.errstate(divide="ignore"):
+        estimates = np.where(means > 0, 1 + 1 / means, np.nan)
+    return ks, estimates
+
+
+def summarize(
+    graph: CSRGraph, n_sources: int = 100, seed: Optional[int] = None
+) -> Dict:
+    """
+    Compute the main statistics of a graph.
+
+    Args:
+        graph (CSRGraph): The graph.
+        n_sources (int): Number of BFS sources of the path length estimate.
+        seed (int): The seed of the random source selection.
+
+    Returns:
+        dict: The sizes of the graph and its largest component, the degree and
+            core number statistics, the path length estimate and a Hill
+            estimate of the degree exponent over the top 5% of degrees.
+    """
+    degrees = graph.degrees()
+    n_components, components = connected_components(graph)
+    cores = core_numbers(graph)
+    top_cores, core_sizes = np.unique(cores, return_counts=True)
+    ks, estimates = hill_estimates(degrees)
+    tail = min(max(int(0.05 * len(graph)), 1), len(ks))
+    return {
+        "nodes": len(graph),
+        "edges": graph.n_edges,
+        "components": n_components,
+        "largest_component": int(np.bincount(components).max()) if len(graph) else 0,
+        "mean_degree": float(degrees.mean()) if len(graph) else 0.0,
+        "max_degree": int(degrees.max(initial=0)),
+        "top_cores": {
+            int(core): int(size)
+            for core, size in list(zip(top_cores, core_sizes))[::-1][:3]
+        },
+        "path_lengths": sample_path_lengths(graph, n_sources, seed=seed),
+        "hill_exponent": float(estimates[tail - 1]) if len(ks) else float("nan"),
+    }
+
+
+def print_summary(summary: Dict) -> None:
+    paths = summary["path_lengths"]
+    print(f"Nodes: {summary['nodes']}, edges: {summary['edges']}")
+    print(
+        f"Components: {summary['components']}, "
+        f"largest: {summary['largest_component']} nodes"
+    )
+    print(
+        f"Degree: mean {summary['mean_degree']:.2f}, max {summary['max_degree']}, "
+        f"Hill exponent {summary['hill_exponent']:.2f}"
+    )
+    print(
+        "Top cores: "
+        + ", ".join(
+            f"{core} ({size} nodes)" for core, size in summary["top_cores"].items()
+        )
+    )
+    print(
+        f"Average path length: {paths['mean']:.3f} "
+        f"[{paths['ci_low']:.3f}, {paths['ci_high']:.3f}], "
+        f"diameter >= {paths['max']}, "
+        f"{paths['n_pairs']} pairs from {paths['n_sources']} sources"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Analyze the collaboration network of the local store."
+    )
+    parser.add_argument(
+        "--sources",
+        type=int,
+        default=100,
+        help="Number of BFS sources of the path length estimate.",
+    )
+    parser.add_argument("--seed", type=int, help="Seed of the source sampling.")
+    args = parser.parse_args()
+
+    start_time = time.perf_counter()
+    graph = CSRGraph.from_coauthor_index(load_coauthor_index())
+    print(f"Loaded the graph in {time.perf_counter() - start_time:.2f} seconds")
+    start_time = time.perf_counter()
+    summary = summarize(graph, args.sources, args.seed)
+    print(f"Analyzed the graph in {time.perf_counter() - start_time:.2f} seconds")
+    print_summary(summary)
+
+
+if __name__ == "__main__":
+    main()
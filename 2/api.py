@@ -0,0 +1,424 @@
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlencode, urlparse
+import argparse
+import json
+import threading
+import time
+import traceback
+import networkx as nx
+import requests
+from get_data import (
+    get_artist_info,
+    get_songs_with_coauthors,
+    get_top_coauthors_of,
+)
+from expansion import iter_collaboration_graph
+from paths import find_collaboration_paths
+from communities import IncrementalCommunities
+from filters import (
+    FILTER_BORN_AFTER,
+    FILTER_CAREER_ENDED,
+    FILTER_COUNTRY,
+    FILTER_GENRE,
+    FILTER_MARKET,
+    compile_filters,
+)
+from identity import normalize_name
+from metrics import METRICS
+from records import json_default
+
+
+API_HOST = "127.0.0.1"
+API_PORT = 8765
+
+# Number of responses memoized by the server
+API_CACHE_SIZE = 256
+# Seconds a response is memoized, so data refreshed in the background or by
+# another replica is served within an hour
+API_CACHE_TTL = 60 * 60
+# Seconds a client waits for a response, ego-networks of cold artists take long
+API_TIMEOUT = 600
+
+# Parameters every endpoint requires, and the parameters that are integers
+REQUIRED_PARAMS = {
+    "/artist": ("name",),
+    "/songs": ("name",),
+    "/top-coauthors": ("name",),
+    "/ego-network": ("name",),
+    "/path": ("source", "target"),
+}
+INTEGER_PARAMS = ("n", "levels", "width")
+# Values of the optional parameters left out of a query
+DEFAULT_PARAMS = {
+    "/top-coauthors": {"n": 5},
+    "/ego-network": {"levels": 2, "width": 5},
+}
+
+# Query parameter of every filter
+FILTER_PARAMS = {
+    "genre": FILTER_GENRE,
+    "country": FILTER_COUNTRY,
+    "born_after": FILTER_BORN_AFTER,
+    "career_ended": FILTER_CAREER_ENDED,
+    "market": FILTER_MARKET,
+}
+
+
+class ResponseCache:
+    """
+    Bounded LRU of serialized responses, each kept for at most ttl seconds.
+
+    Identical queries arriving while the response is computed wait for it
+    instead of computing it again.
+
+    Args:
+        maxsize (int): Maximum number of responses kept.
+        ttl (float): Seconds a response is kept.
+    """
+
+    def __init__(self, maxsize: int = API_CACHE_SIZE, ttl: float = API_CACHE_TTL):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        # Expiry time on the monotonic clock and body of every response
+        self._entries: "OrderedDict[Tuple, Tuple[float, bytes]]" = OrderedDict()
+        self._computing: Dict[Tuple, threading.Event] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def get(self, key: Tuple, compute: Callable[[], bytes]) -> bytes:
+        """
+        Get the response of a query, computing it if it is not memoized.
+
+        Args:
+            key (tuple): The normalized query.
+            compute (callable): The function computing the response.
+
+        Returns:
+            bytes: The response.
+        """
+        while True:
+            with self._lock:
+                entry = self._entries.get(key)
+                if entry is not None and entry[0] > time.monotonic():
+                    self._entries.move_to_end(key)
+                    METRICS.cache_lookup("api", hit=True)
+                    return entry[1]
+                computing = self._computing.get(key)
+                if computing is None:
+                    computing = self._computing[key] = threading.Event()
+                    break
+            # Retry once the response is computed, or compute it if that failed
+            computing.wait()
+
+        METRICS.cache_lookup("api", hit=False)
+        try:
+            response = compute()
+            with self._lock:
+                self._entries[key] = (time.monotonic() + self.ttl, response)
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.maxsize:
+                    self._entries.popitem(last=False)
+            return response
+        finally:
+            with self._lock:
+                del self._computing[key]
+            computing.set()
+
+
+def graph_to_json(
+    G: nx.Graph,
+    levels: Dict[str, int],
+    level_stats: List[Dict],
+    communities: Dict[str, int],
+) -> Dict:
+    return {
+        "nodes": [
+            {
+                "id": node,
+                "level": levels.get(node),
+                "community": communities.get(node),
+                **attributes,
+            }
+            for node, attributes in G.nodes(data=True)
+        ],
+        "edges": [
+            {"source": u, "target": v, **attributes}
+            for u, v, attributes in G.edges(data=True)
+        ],
+        "level_stats": level_stats,
+    }
+
+
+def graph_from_json(
+    data: Dict,
+) -> Tuple[nx.Graph, Dict[str, int], List[Dict], Dict[str, int]]:
+    """
+    Rebuild an ego-network returned by the API.
+
+    Args:
+        data (dict): The ego-network response.
+
+    Returns:
+        tuple: The graph, the level of every artist, the fetch latency of
+            every level and the community of every artist.
+    """
+    G = nx.Graph()
+    levels = {}
+    communities = {}
+    for node in data["nodes"]:
+        node = dict(node)
+        node_id = node.pop("id")
+        levels[node_id] = node.pop("level")
+        communities[node_id] = node.pop("community")
+        G.add_node(node_id, **node)
+    for edge in data["edges"]:
+        edge = dict(edge)
+        G.add_edge(edge.pop("source"), edge.pop("target"), **edge)
+    return G, levels, data["level_stats"], communities
+
+
+def ego_network(
+    artist_name: str, n_levels: int, n_authors_in_level: int, selections: Dict
+) -> Dict:
+    """
+    Build the collaboration graph of an artist along with its communities.
+
+    Args:
+        artist_name (str): The name of the root artist.
+        n_levels (int): Number of levels of collaboration to expand.
+        n_authors_in_level (int): Number of top coauthors expanded per artist.
+        selections (dict): The selected value of every filter, by filter title.
+
+    Returns:
+        dict: The nodes with their levels and communities, the edges and
+            the fetch latency of every level.
+    """
+    communities = IncrementalCommunities()
+    for G, levels, level_stats in iter_collaboration_graph(
+        artist_name,
+        get_artist_info(artist_name),
+        n_levels,
+        n_authors_in_level,
+        compile_filters(selections),
+    ):
+        communities.update(G)
+    return graph_to_json(G, levels, level_stats, communities.labels)
+
+
+def query_key(endpoint: str, params: Dict) -> Tuple:
+    """
+    Normalize a query, so every spelling of the same query shares one response.
+    Integer parameters are expected parsed and the defaults filled in, e.g.
+    by normalize_params.
+    """
+    return (endpoint,) + tuple(
+        sorted(
+            (
+                key,
+                normalize_name(value) if key in ("name", "source", "target") else value,
+            )
+            for key, value in params.items()
+            if value != ""
+        )
+    )
+
+
+def normalize_params(endpoint: str, params: Dict[str, str]) -> Dict:
+    """
+    Parse the integer parameters of a validated query and fill in the
+    defaults of the missing ones, so "n=05" and a missing n are the same query.
+    """
+    return {
+        **DEFAULT_PARAMS.get(endpoint, {}),
+        **{
+            key: int(value) if key in INTEGER_PARAMS else value
+            for key, value in params.items()
+        },
+    }
+
+
+class ApiHandler(BaseHTTPRequestHandler):
+    """
+    Serve the queries of the app as JSON over GET requests.
+    """
+
+    cache = ResponseCache()
+
+    def do_GET(self) -> None:
+        url = urlparse(self.path)
+        params = {key: values[-1] for key, values in parse_qs(url.query).items()}
+        endpoint = url.path.rstrip("/")
+        if endpoint == "/health":
+            return self.respond(200, b'{"status": "ok"}')
+        if endpoint == "/metrics":
+            return self.respond(200, METRICS.to_prometheus().encode(), "text/plain")
+
+        if endpoint not in REQUIRED_PARAMS:
+            return self.respond_error(404, f"Unknown endpoint: {endpoint}")
+        missing = [
+            param for param in REQUIRED_PARAMS[endpoint] if not params.get(param)
+        ]
+        if missing:
+            return self.respond_error(400, f"Missing parameters: {', '.join(missing)}")
+        for param in INTEGER_PARAMS:
+            # isdigit alone accepts digits int() cannot parse, e.g. "²"
+            value = params.get(param)
+            if value is not None and not (value.isascii() and value.isdigit()):
+                return self.respond_error(400, f"Parameter {param} is not an integer")
+
+        try:
+            params = normalize_params(endpoint, params)
+            routes = {
+                "/artist": lambda: get_artist_info(params["name"]),
+                "/songs": lambda: get_songs_with_coauthors(params["name"]),
+                "/top-coauthors": lambda: get_top_coauthors_of(
+                    params["name"], params["n"]
+                ),
+                "/ego-network": lambda: ego_network(
+                    params["name"],
+                    params["levels"],
+                    params["width"],
+                    {
+                        title: params.get(param)
+                        for param, title in FILTER_PARAMS.items()
+                    },
+                ),
+                "/path": lambda: find_collaboration_paths(
+                    params["source"], params["target"], params.get("width") or None
+                ),
+            }
+            body = self.cache.get(
+                query_key(endpoint, params),
+                lambda: json.dumps(routes[endpoint](), default=json_default).encode(),
+            )
+        except Exception as e:
+            print(traceback.format_exc())
+            return self.respond_error(500, str(e))
+        self.respond(200, body)
+
+    def respond(
+        self, status: int, body: bytes, content_type: str = "application/json"
+    ) -> None:
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def respond_error(self, status: int, message: str) -> None:
+        self.respond(status, json.dumps({"error": message}).encode())
+
+
+class ApiClient:
+    """
+    Thin client of the API, returning the same values as the functions of
+    get_data and expansion.
+
+    Args:
+        url (str): The base URL of the API, e.g. "http://127.0.0.1:8765".
+        timeout (float): Seconds to wait for a response.
+    """
+
+    def __init__(self, url: str, timeout: float = API_TIMEOUT):
+        self.url = url.rstrip("/")
+        self.timeout = timeout
+        self.session = requests.Session()
+
+    def get(self, endpoint: str, **params):
+        response = self.session.get(
+            f"{self.url}{endpoint}?{urlencode(params)}", timeout=self.timeout
+        )
+        if response.status_code != 200:
+            # Errors not raised by the API, e.g. of a proxy, may not be JSON
+            try:
+                message = response.json()["error"]
+            except (ValueError, KeyError, TypeError):
+                message = response.text
+            raise Exception(
+                f"API request {endpoint} failed with status {response.status_code}: "
+                f"{message}"
+            )
+        return response.json()
+
+    def get_artist_info(self, artist_name: str) -> Dict:
+        return self.get("/artist", name=artist_name)
+
+    def get_songs_with_coauthors(self, artist_name: str) -> List[Dict]:
+        return self.get("/songs", name=artist_name)
+
+    def get_top_coauthors_of(self, artist_name: str, top_n: int = 5) -> List[Dict]:
+        return self.get("/top-coauthors", name=artist_name, n=top_n)
+
+    def ego_network(
+        self,
+        artist_name: str,
+        n_levels: int,
+        n_authors_in_level: int,
+        selections: Optional[Dict] = None,
+    ) -> Tuple[nx.Graph, Dict[str, int], List[Dict], Dict[str, int]]:
+        """
+        Get the collaboration graph of an artist.
+
+        Args:
+            artist_name (str): The name of the root artist.
+            n_levels (int): Number of levels of collaboration to expand.
+            n_authors_in_level (int): Number of top coauthors expanded per artist.
+            selections (dict): The selected value of every filter, by filter title.
+
+        Returns:
+            tuple: The graph, the level of every artist, the fetch latency of
+                every level and the community of every artist.
+        """
+        selections = selections or {}
+        filters = {
+            param: selections[title]
+            for param, title in FILTER_PARAMS.items()
+            if selections.get(title) not in (None, "")
+        }
+        return graph_from_json(
+            self.get(
+                "/ego-network",
+                name=artist_name,
+                levels=n_levels,
+                width=n_authors_in_level,
+                **filters,
+            )
+        )
+
+    def find_collaboration_paths(
+        self, source_name: str, target_name: str, width: Optional[int] = None
+    ) -> Dict:
+        params = {"source": source_name, "target": target_name}
+        if width is not None:
+            params["width"] = width
+        return self.get("/path", **params)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Serve collaboration graph queries from the local store as JSON."
+    )
+    parser.add_argument("--host", default=API_HOST, help="Address to listen on.")
+    parser.add_argument("--port", type=int, default=API_PORT, help="Port to listen on.")
+    args = parser.parse_args()
+
+    server = ThreadingHTTPServer((args.host, args.port), ApiHandler)
+    print(f"Serving the collaboration API on http://{args.host}:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
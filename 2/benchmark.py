@@ -0,0 +1,789 @@
+from collections import Counter
+from contextlib import contextmanager, redirect_stdout
+from typing import Dict, List, Optional, Tuple
+import argparse
+import io
+import json
+import os
+import re
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+import numpy as np
+import musicbrainzngs
+import get_data
+from get_data import SAVE_FOLDER, load_from_json
+from adjacency import CoauthorIndex
+from expansion import expand_collaboration_graph
+from filters import clear_artist_attributes
+from identity import IdentityCache, normalize_name
+from records import to_dicts
+from scheduler import SCHEDULER, TokenBucket
+from store import GraphStore
+
+
+FIXTURES_PATH = os.path.join(SAVE_FOLDER, "benchmark_fixtures.json")
+BASELINE_PATH = os.path.join(SAVE_FOLDER, "benchmark_baseline.json")
+
+# Simulated round trip time of a request to every upstream, in seconds
+STUB_LATENCY = {"musicbrainz": 0.05, "spotify": 0.03}
+# Default (levels, authors per level) grid of graphs to build
+GRID = [(1, 5), (2, 5), (2, 10), (3, 3), (3, 5)]
+# Relative slowdown of the median build time reported as a regression
+REGRESSION_TOLERANCE = 0.25
+# Growth of the median build time in milliseconds too small to tell from noise
+NOISE_FLOOR_MS = 5.0
+
+# Number of tracks per album of the discographies built from saved data
+ALBUM_SIZE = 12
+# Page size of the replayed Spotify artist albums and album tracks
+SPOTIFY_PAGE_SIZE = 50
+
+
+def empty_fixtures() -> Dict:
+    """
+    Create empty fixtures. Responses are stored raw, as returned by the
+    client libraries, by the name or ID they were requested for.
+
+    Returns:
+        dict: The fixtures of every upstream endpoint.
+    """
+    return {
+        "musicbrainz": {"search_artists": {}, "get_artist_by_id": {}},
+        "spotify": {"search": {}, "artist_albums": {}, "albums": {}, "tracks": {}},
+    }
+
+
+def build_fixtures() -> Dict:
+    """
+    Build fixtures from the artist info, songs and coauthor data in the save folder.
+
+    Every Spotify artist credited in the saved songs gets the tracks it is
+    credited on as its discography. Only artists with saved artist info can
+    be found on MusicBrainz.
+
+    Returns:
+        dict: The fixtures of every upstream endpoint.
+    """
+    artist_info = load_from_json("artist_info.json")
+    root_songs = load_from_json("songs_with_coauthors.json")
+    coauthor_data = load_from_json("coauthor_data.json")
+    top_coauthors = load_from_json("top_coauthors.json")
+
+    names = {coauthor["id"]: coauthor["name"] for coauthor in top_coauthors}
+    for songs in [root_songs] + [data["songs"] for data in coauthor_data.values()]:
+        for song in songs:
+            for coauthor in song["coauthors"]:
+                names.setdefault(coauthor["id"], coauthor["name"])
+    root_name = artist_info["artist_name"]
+    root_id = next(
+        (
+            artist_id
+            for artist_id, name in names.items()
+            if normalize_name(name) == normalize_name(root_name)
+        ),
+        "benchmark-root",
+    )
+    names[root_id] = root_name
+
+    fixtures = empty_fixtures()
+    spotify = fixtures["spotify"]
+    discographies = {root_id: root_songs}
+    discographies.update(
+        {artist_id: data["songs"] for artist_id, data in coauthor_data.items()}
+    )
+    credited = {artist_id: [] for artist_id in names}
+    for artist_id, songs in discographies.items():
+        for i, song in enumerate(songs):
+            track_id = f"{artist_id}-{i}"
+            credits = [{"name": names[artist_id], "id": artist_id}] + [
+                coauthor
+                for coauthor in song["coauthors"]
+                if coauthor["id"] != artist_id
+            ]
+            spotify["tracks"][track_id] = {
+                "id": track_id,
+                "name": song["song_title"],
+                "duration_ms": song["duration"],
+                "artists": credits,
+                "available_markets": song["available_markets"],
+                "external_ids": (
+                    {"isrc": song["isrc"]}
+                    if song.get("isrc") not in (None, "No ISRC available")
+                    else {}
+                ),
+            }
+            for credit in credits:
+                credited[credit["id"]].append(track_id)
+
+    for artist_id, track_ids in credited.items():
+        track_ids = list(dict.fromkeys(track_ids))
+        spotify["search"][normalize_name(names[artist_id])] = {
+            "artists": {"items": [{"id": artist_id, "name": names[artist_id]}]}
+        }
+        spotify["artist_albums"][artist_id] = []
+        for i in range(0, len(track_ids), ALBUM_SIZE):
+            album_id = f"{artist_id}-album-{i // ALBUM_SIZE}"
+            spotify["artist_albums"][artist_id].append(album_id)
+            # Album track listings come without external IDs, like the real ones
+            spotify["albums"][album_id] = {
+                "id": album_id,
+                "tracks": {
+                    "items": [
+                        {
+                            key: value
+                            for key, value in spotify["tracks"][track_id].items()
+                            if key != "external_ids"
+                        }
+                        for track_id in track_ids[i : i + ALBUM_SIZE]
+                    ]
+                },
+            }
+
+    musicbrainz = fixtures["musicbrainz"]
+    infos = {root_name: artist_info}
+    infos.update(
+        {
+            names[artist_id]: data["artist_info"]
+            for artist_id, data in coauthor_data.items()
+            if data.get("artist_info")
+        }
+    )
+    for name, info in infos.items():
+        if info["artist_id"] == "unknown":
+            continue
+        musicbrainz["search_artists"][normalize_name(name)] = {
+            "artist-list": [
+                {
+                    "id": info["artist_id"],
+                    "name": info["artist_name"],
+                    "life-span": info.get("life_span", {}),
+                    "disambiguation": info.get("disambiguation", {}),
+                    "tag-list": info.get("tags", []),
+                }
+            ]
+        }
+        musicbrainz["get_artist_by_id"][info["artist_id"]] = {
+            "artist": {"area": {"name": info.get("origin_country")}}
+        }
+    return fixtures
+
+
+def load_fixtures(path: str = FIXTURES_PATH, rebuild: bool = False) -> Dict:
+    """
+    Load the fixtures, building them from saved data if there are none.
+
+    Args:
+        path (str): The path of the fixtures file.
+        rebuild (bool): Whether to rebuild the fixtures even if the file exists.
+
+    Returns:
+        dict: The fixtures of every upstream endpoint.
+    """
+    if not rebuild and os.path.exists(path):
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    fixtures = build_fixtures()
+    save_fixtures(fixtures, path)
+    return fixtures
+
+
+def save_fixtures(fixtures: Dict, path: str = FIXTURES_PATH) -> None:
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(fixtures, f, ensure_ascii=False)
+
+
+class ReplaySpotify:
+    """
+    Stand-in for the Spotify client answering from fixtures after a simulated latency.
+
+    Args:
+        fixtures (dict): The Spotify fixtures.
+        latency (float): The simulated round trip time of a request in seconds.
+    """
+
+    def __init__(self, fixtures: Dict, latency: float):
+        self.fixtures = fixtures
+        self.latency = latency
+
+    def _page(self, kind: str, key: str, items: List, offset: int) -> Dict:
+        end = offset + SPOTIFY_PAGE_SIZE
+        return {
+            "items": items[offset:end],
+            "total": len(items),
+            "next": f"replay:{kind}:{key}:{end}" if end < len(items) else None,
+        }
+
+    def _album_page(self, album_id: str, offset: int) -> Dict:
+        items = self.fixtures["albums"][album_id]["tracks"]["items"]
+        return self._page("album_tracks", album_id, items, offset)
+
+    def _artist_albums_page(self, artist_id: str, offset: int) -> Dict:
+        album_ids = self.fixtures["artist_albums"].get(artist_id, [])
+        items = [{"id": album_id} for album_id in album_ids]
+        return self._page("artist_albums", artist_id, items, offset)
+
+    def search(self, q: str, type: str = "artist", limit: int = 10) -> Dict:
+        time.sleep(self.latency)
+        name = normalize_name(q.split(":", 1)[1])
+        return self.fixtures["search"].get(name, {"artists": {"items": []}})
+
+    def artist_albums(self, artist_id: str, album_type=None, limit: int = 20) -> Dict:
+        time.sleep(self.latency)
+        return self._artist_albums_page(artist_id, 0)
+
+    def next(self, result: Dict) -> Optional[Dict]:
+        if not result or not result.get("next"):
+            return None
+        time.sleep(self.latency)
+        _, kind, key, offset = result["next"].rsplit(":", 3)
+        if kind == "artist_albums":
+            return self._artist_albums_page(key, int(offset))
+        return self._album_page(key, int(offset))
+
+    def albums(self, albums: List[str]) -> Dict:
+        time.sleep(self.latency)
+        return {
+            "albums": [
+                (
+                    {"id": album_id, "tracks": self._album_page(album_id, 0)}
+                    if album_id in self.fixtures["albums"]
+                    else None
+                )
+                for album_id in albums
+            ]
+        }
+
+    def tracks(self, tracks: List[str]) -> Dict:
+        time.sleep(self.latency)
+        return {
+            "tracks": [self.fixtures["tracks"].get(track_id) for track_id in tracks]
+        }
+
+
+class CapturingSpotify:
+    """
+    Wrapper of the Spotify client recording every response into fixtures.
+
+    Args:
+        client (Spotify): The real Spotify client.
+        fixtures (dict): The Spotify fixtures to record into.
+    """
+
+    def __init__(self, client, fixtures: Dict):
+        self.client = client
+        self.fixtures = fixtures
+
+    def search(self, q: str, type: str = "artist", limit: int = 10) -> Dict:
+        result = self.client.search(q=q, type=type, limit=limit)
+        self.fixtures["search"][normalize_name(q.split(":", 1)[1])] = result
+        return result
+
+    def artist_albums(self, artist_id: str, album_type=None, limit: int = 20) -> Dict:
+        result = self.client.artist_albums(
+            artist_id, album_type=album_type, limit=limit
+        )
+        self.fixtures["artist_albums"][artist_id] = [
+            album["id"] for album in result["items"]
+        ]
+        return result
+
+    def next(self, result: Dict) -> Optional[Dict]:
+        next_result = self.client.next(result)
+        if next_result is None:
+            return None
+        match = re.search(r"/(artists|albums)/([^/]+)/(albums|tracks)", result["next"])
+        if match and match.group(1) == "artists":
+            self.fixtures["artist_albums"][match.group(2)].extend(
+                album["id"] for album in next_result["items"]
+            )
+        elif match and match.group(2) in self.fixtures["albums"]:
+            self.fixtures["albums"][match.group(2)]["tracks"]["items"].extend(
+                next_result["items"]
+            )
+        return next_result
+
+    def albums(self, albums: List[str]) -> Dict:
+        result = self.client.albums(albums)
+        for album in result["albums"]:
+            if album is not None:
+                self.fixtures["albums"][album["id"]] = {
+                    "id": album["id"],
+                    "tracks": {"items": list(album["tracks"]["items"])},
+                }
+        return result
+
+    def tracks(self, tracks: List[str]) -> Dict:
+        result = self.client.tracks(tracks)
+        for track in result["tracks"]:
+            if track is not None:
+                self.fixtures["tracks"][track["id"]] = track
+        return result
+
+
+@contextmanager
+def patched_upstreams(spotify, search_artists, get_artist_by_id):
+    """
+    Temporarily replace the upstream clients used by get_data.
+    """
+    originals = (
+        get_data.spotify,
+        musicbrainzngs.search_artists,
+        musicbrainzngs.get_artist_by_id,
+    )
+    get_data.spotify = spotify
+    musicbrainzngs.search_artists = search_artists
+    musicbrainzngs.get_artist_by_id = get_artist_by_id
+    try:
+        yield
+    finally:
+        (
+            get_data.spotify,
+            musicbrainzngs.search_artists,
+            musicbrainzngs.get_artist_by_id,
+        ) = originals
+
+
+@contextmanager
+def replayed_upstreams(
+    fixtures: Dict, latency_scale: float = 1.0, rate_limits: bool = False
+):
+    """
+    Answer all upstream requests from fixtures and time them.
+
+    Args:
+        fixtures (dict): The fixtures of every upstream endpoint.
+        latency_scale (float): Factor applied to the simulated latencies.
+        rate_limits (bool): Whether to keep the rate limits of SCHEDULER,
+            by default requests only wait for the simulated latency.
+
+    Yields:
+        list: The (upstream, seconds) latency of every request through
+            SCHEDULER, including time spent waiting for the rate budget.
+    """
+    musicbrainz = fixtures["musicbrainz"]
+    musicbrainz_latency = STUB_LATENCY["musicbrainz"] * latency_scale
+
+    def search_artists(artist: str, limit: int = 25, strict: bool = False) -> Dict:
+        time.sleep(musicbrainz_latency)
+        return musicbrainz["search_artists"].get(
+            normalize_name(artist), {"artist-list": []}
+        )
+
+    def get_artist_by_id(artist_id: str, includes: List[str] = []) -> Dict:
+        time.sleep(musicbrainz_latency)
+        return musicbrainz["get_artist_by_id"].get(artist_id, {"artist": {}})
+
+    latencies = []
+    call = SCHEDULER.call
+    buckets = SCHEDULER.buckets
+
+    def timed_call(upstream: str, func, *args, **kwargs):
+        start_time = time.perf_counter()
+        try:
+            return call(upstream, func, *args, **kwargs)
+        finally:
+            latencies.append((upstream, time.perf_counter() - start_time))
+
+    spotify = ReplaySpotify(
+        fixtures["spotify"], STUB_LATENCY["spotify"] * latency_scale
+    )
+    with patched_upstreams(spotify, search_artists, get_artist_by_id):
+        SCHEDULER.call = timed_call
+        if not rate_limits:
+            SCHEDULER.buckets = {
+                upstream: TokenBucket(rate=1e9, capacity=1e9) for upstream in buckets
+            }
+        try:
+            yield latencies
+        finally:
+            SCHEDULER.call = call
+            SCHEDULER.buckets = buckets
+
+
+@contextmanager
+def cold_caches():
+    """
+    Temporarily swap the local store and in-memory caches for empty ones, and
+    disable the Redis cache shared with other processes, if it is configured.
+    """
+    originals = (
+        get_data.STORE,
+        get_data.COAUTHOR_INDEX,
+        get_data.IDENTITY,
+        get_data.SHARED_CACHE,
+    )
+    folder = tempfile.mkdtemp()
+    get_data.STORE = GraphStore(os.path.join(folder, "graph.sqlite3"))
+    get_data.COAUTHOR_INDEX = CoauthorIndex()
+    get_data.IDENTITY = IdentityCache(get_data.STORE)
+    get_data.SHARED_CACHE = None
+    clear_artist_attributes()
+    try:
+        yield
+    finally:
+        get_data.STORE.close()
+        (
+            get_data.STORE,
+            get_data.COAUTHOR_INDEX,
+            get_data.IDENTITY,
+            get_data.SHARED_CACHE,
+        ) = originals
+        clear_artist_attributes()
+        shutil.rmtree(folder, ignore_errors=True)
+
+
+def build_graph(artist_name: str, n_levels: int, n_authors: int) -> Dict:
+    """
+    Build the collaboration graph of an artist the way the app does and
+    measure the upstream requests it takes.
+
+    Args:
+        artist_name (str): The name of the root artist.
+        n_levels (int): Number of levels of collaboration to expand.
+        n_authors (int): Number of top coauthors expanded per artist.
+
+    Returns:
+        dict: The build time, number of nodes and requests per upstream.
+    """
+    start_requests = Counter(SCHEDULER.requests)
+    start_time = time.perf_counter()
+    artist_info = get_data.get_artist_info(artist_name)
+    G, _, _ = expand_collaboration_graph(artist_name, artist_info, n_levels, n_authors)
+    seconds = time.perf_counter() - start_time
+    return {
+        "seconds": seconds,
+        "nodes": len(G),
+        "requests": dict(Counter(SCHEDULER.requests) - start_requests),
+    }
+
+
+def summarize(runs: List[Dict], latencies: List[float]) -> Dict:
+    """
+    Summarize the repeated builds of one graph.
+
+    Args:
+        runs (list): The results of build_graph.
+        latencies (list): The latency of every request of the builds.
+
+    Returns:
+        dict: The p50 and p95 build time, requests per build and the p50
+            and p95 request latency, in milliseconds.
+    """
+    seconds = [run["seconds"] for run in runs]
+    return {
+        "p50_ms": round(float(np.percentile(seconds, 50)) * 1000, 1),
+        "p95_ms": round(float(np.percentile(seconds, 95)) * 1000, 1),
+        "requests": runs[-1]["requests"],
+        "request_p50_ms": (
+            round(float(np.percentile(latencies, 50)) * 1000, 1) if latencies else 0.0
+        ),
+        "request_p95_ms": (
+            round(float(np.percentile(latencies, 95)) * 1000, 1) if latencies else 0.0
+        ),
+    }
+
+
+def run_benchmark(
+    fixtures: Dict,
+    artist_name: str,
+    grid: List[Tuple[int, int]] = GRID,
+    repeat: int = 3,
+    latency_scale: float = 1.0,
+    rate_limits: bool = False,
+) -> List[Dict]:
+    """
+    Time cold and warm graph builds for every (levels, authors per level) pair.
+
+    A cold build starts from an empty store and empty in-memory caches. A
+    warm build repeats the same build right after it, in the same process.
+
+    Args:
+        fixtures (dict): The fixtures of every upstream endpoint.
+        artist_name (str): The name of the root artist.
+        grid (list): The (levels, authors per level) pairs to build.
+        repeat (int): Number of cold and warm builds of every pair.
+        latency_scale (float): Factor applied to the simulated latencies.
+        rate_limits (bool): Whether to keep the rate limits of SCHEDULER.
+
+    Returns:
+        list: The cold and warm summary of every pair.
+    """
+    results = []
+    with replayed_upstreams(fixtures, latency_scale, rate_limits) as latencies:
+        for n_levels, n_authors in grid:
+            runs = {"cold": [], "warm": []}
+            run_latencies = {"cold": [], "warm": []}
+            for _ in range(repeat):
+                with cold_caches():
+                    for mode in ["cold", "warm"]:
+                        del latencies[:]
+                        runs[mode].append(build_graph(artist_name, n_levels, n_authors))
+                        run_latencies[mode].extend(seconds for _, seconds in latencies)
+            results.append(
+                {
+                    "levels": n_levels,
+                    "authors": n_authors,
+                    "nodes": runs["cold"][-1]["nodes"],
+                    **{
+                        mode: summarize(runs[mode], run_latencies[mode])
+                        for mode in runs
+                    },
+                }
+            )
+    return results
+
+
+def measure_songs(artist_name: str, n_levels: int, n_authors: int) -> Dict:
+    """
+    Measure the memory and load time of the songs of a built graph, as the
+    records loaded from the store by get_songs_with_coauthors and as plain
+    dicts decoded from JSON, e.g. the saved files or API responses.
+
+    Args:
+        artist_name (str): The name of the root artist.
+        n_levels (int): Number of levels of collaboration to expand.
+        n_authors (int): Number of top coauthors expanded per artist.
+
+    Returns:
+        dict: The number of songs, and the bytes per song and load time in
+            milliseconds of the records and the dicts.
+    """
+    build_graph(artist_name, n_levels, n_authors)
+    artist_ids = list(get_data.STORE.get_fetch_times("discography"))
+    loads = {
+        "records": lambda: [get_data.STORE.get_discography(i) for i in artist_ids],
+        "dicts": lambda: json.loads(payload),
+    }
+    # The first load also creates the shared artists of the records
+    tracemalloc.start()
+    songs = loads["records"]()
+    record_bytes = tracemalloc.get_traced_memory()[0]
+    payload = json.dumps([to_dicts(tracks) for tracks in songs])
+    tracemalloc.reset_peak()
+    start_bytes = tracemalloc.get_traced_memory()[0]
+    dicts = loads["dicts"]()
+    dict_bytes = tracemalloc.get_traced_memory()[0] - start_bytes
+    tracemalloc.stop()
+
+    result = {"songs": sum(len(tracks) for tracks in dicts)}
+    for kind, size in [("records", record_bytes), ("dicts", dict_bytes)]:
+        start_time = time.perf_counter()
+        loads[kind]()
+        result[kind] = {
+            "bytes_per_song": round(size / max(result["songs"], 1)),
+            "load_ms": round((time.perf_counter() - start_time) * 1000, 1),
+        }
+    return result
+
+
+def print_results(results: List[Dict]) -> None:
+    print(
+        f"{'levels':>6} {'authors':>7} {'nodes':>5} | "
+        f"{'cold p50':>9} {'p95':>9} {'requests':>8} {'req p50':>8} {'req p95':>8} | "
+        f"{'warm p50':>9} {'p95':>9} {'requests':>8}"
+    )
+    for result in results:
+        cold, warm = result["cold"], result["warm"]
+        print(
+            f"{result['levels']:>6} {result['authors']:>7} {result['nodes']:>5} | "
+            f"{cold['p50_ms']:>7.1f}ms {cold['p95_ms']:>7.1f}ms "
+            f"{sum(cold['requests'].values()):>8} "
+            f"{cold['request_p50_ms']:>6.1f}ms {cold['request_p95_ms']:>6.1f}ms | "
+            f"{warm['p50_ms']:>7.1f}ms {warm['p95_ms']:>7.1f}ms "
+            f"{sum(warm['requests'].values()):>8}"
+        )
+
+
+def find_regressions(
+    results: List[Dict], baseline: List[Dict], tolerance: float = REGRESSION_TOLERANCE
+) -> List[str]:
+    """
+    Compare benchmark results with a baseline.
+
+    A build regresses when it needs more upstream requests than the
+    baseline, or its median time grew by more than the tolerance and the
+    noise floor.
+
+    Args:
+        results (list): The results of run_benchmark.
+        baseline (list): Earlier results of run_benchmark.
+        tolerance (float): The allowed relative growth of the median time.
+
+    Returns:
+        list: A description of every regression.
+    """
+    baseline = {(result["levels"], result["authors"]): result for result in baseline}
+    regressions = []
+    for result in results:
+        previous = baseline.get((result["levels"], result["authors"]))
+        if previous is None:
+            continue
+        for mode in ["cold", "warm"]:
+            case = f"{result['levels']}x{result['authors']} {mode}"
+            requests = sum(result[mode]["requests"].values())
+            previous_requests = sum(previous[mode]["requests"].values())
+            if requests > previous_requests:
+                regressions.append(
+                    f"{case}: {requests} requests, baseline {previous_requests}"
+                )
+            limit = max(
+                previous[mode]["p50_ms"] * (1 + tolerance),
+                previous[mode]["p50_ms"] + NOISE_FLOOR_MS,
+            )
+            if result[mode]["p50_ms"] > limit:
+                regressions.append(
+                    f"{case}: p50 {result[mode]['p50_ms']:.1f} ms, "
+                    f"baseline {previous[mode]['p50_ms']:.1f} ms"
+                )
+    return regressions
+
+
+def capture(artist_name: str, n_levels: int, n_authors: int, path: str) -> None:
+    """
+    Build a graph against the real upstreams and add every response to the fixtures.
+
+    Args:
+        artist_name (str): The name of the root artist.
+        n_levels (int): Number of levels of collaboration to expand.
+        n_authors (int): Number of top coauthors expanded per artist.
+        path (str): The path of the fixtures file.
+    """
+    fixtures = load_fixtures(path)
+    musicbrainz = fixtures["musicbrainz"]
+    search_artists = musicbrainzngs.search_artists
+    get_artist_by_id = musicbrainzngs.get_artist_by_id
+
+    def capture_search_artists(artist: str, **kwargs) -> Dict:
+        result = search_artists(artist=artist, **kwargs)
+        musicbrainz["search_artists"][normalize_name(artist)] = result
+        return result
+
+    def capture_get_artist_by_id(artist_id: str, **kwargs) -> Dict:
+        result = get_artist_by_id(artist_id, **kwargs)
+        musicbrainz["get_artist_by_id"][artist_id] = result
+        return result
+
+    spotify = CapturingSpotify(get_data.spotify, fixtures["spotify"])
+    with patched_upstreams(spotify, capture_search_artists, capture_get_artist_by_id):
+        with cold_caches():
+            build_graph(artist_name, n_levels, n_authors)
+    save_fixtures(fixtures, path)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Benchmark collaboration graph builds on replayed upstream responses."
+    )
+    parser.add_argument(
+        "--artist",
+        help="Name of the root artist, the artist of artist_info.json by default.",
+    )
+    parser.add_argument(
+        "--grid",
+        default=",".join(f"{levels}x{authors}" for levels, authors in GRID),
+        help="Comma separated LEVELSxAUTHORS pairs to build.",
+    )
+    parser.add_argument(
+        "--repeat", type=int, default=3, help="Number of builds of every pair."
+    )
+    parser.add_argument(
+        "--latency-scale",
+        type=float,
+        default=1.0,
+        help="Factor applied to the simulated upstream latencies.",
+    )
+    parser.add_argument(
+        "--rate-limits",
+        action="store_true",
+        help="Keep the upstream rate limits of the scheduler.",
+    )
+    parser.add_argument(
+        "--fixtures", default=FIXTURES_PATH, help="Path of the fixtures file."
+    )
+    parser.add_argument(
+        "--rebuild-fixtures",
+        action="store_true",
+        help="Rebuild the fixtures from the saved JSON files.",
+    )
+    parser.add_argument(
+        "--capture",
+        action="store_true",
+        help="Add responses of the real upstreams for the first grid pair to the fixtures.",
+    )
+    parser.add_argument(
+        "--baseline", default=BASELINE_PATH, help="Path of the baseline results."
+    )
+    parser.add_argument(
+        "--save-baseline",
+        action="store_true",
+        help="Save the results as the new baseline.",
+    )
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=REGRESSION_TOLERANCE,
+        help="Allowed relative growth of the median build time.",
+    )
+    parser.add_argument(
+        "--songs",
+        action="store_true",
+        help="Measure the songs of the last grid pair as records and as dicts.",
+    )
+    parser.add_argument(
+        "--verbose", action="store_true", help="Show the output of the fetches."
+    )
+    args = parser.parse_args()
+
+    grid = [
+        tuple(int(value) for value in pair.split("x")) for pair in args.grid.split(",")
+    ]
+    artist_name = args.artist or load_from_json("artist_info.json")["artist_name"]
+
+    if args.rebuild_fixtures:
+        load_fixtures(args.fixtures, rebuild=True)
+    if args.capture:
+        capture(artist_name, *grid[0], args.fixtures)
+
+    fixtures = load_fixtures(args.fixtures)
+    output = sys.stdout if args.verbose else io.StringIO()
+    with redirect_stdout(output):
+        results = run_benchmark(
+            fixtures,
+            artist_name,
+            grid,
+            args.repeat,
+            args.latency_scale,
+            args.rate_limits,
+        )
+    print_results(results)
+
+    if args.songs:
+        with redirect_stdout(output):
+            with replayed_upstreams(fixtures, 0.0), cold_caches():
+                songs = measure_songs(artist_name, *grid[-1])
+        print(f"Songs of the {grid[-1][0]}x{grid[-1][1]} graph: {songs['songs']}")
+        for kind in ["records", "dicts"]:
+            print(
+                f"{kind:>8}: {songs[kind]['bytes_per_song']:>6} bytes per song, "
+                f"loaded in {songs[kind]['load_ms']:.1f} ms"
+            )
+
+    if args.save_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=4)
+        print(f"Baseline saved to {args.baseline}")
+    elif os.path.exists(args.baseline):
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            regressions = find_regressions(results, json.load(f), args.tolerance)
+        for regression in regressions:
+            print(f"Regression: {regression}")
+        if regressions:
+            sys.exit(1)
+        print("No regressions against the baseline.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,181 @@
+from typing import Dict, List, Optional, Union
+import json
+import os
+import time
+import pyarrow as pa
+import pyarrow.parquet as pq
+from records import to_dicts
+
+
+# Column of flattened coauthor data holding the coauthor ID each song belongs to
+KEY_COLUMN = "coauthor_key"
+# Schema metadata key holding the artist info of flattened coauthor data
+ARTIST_INFO_METADATA_KEY = b"artist_info"
+
+
+def dictionary_encode_type(data_type: pa.DataType, in_list: bool = False) -> pa.DataType:
+    """
+    Replace the string types nested in lists, e.g. markets or coauthor names
+    and IDs, with dictionary-encoded strings.
+
+    Args:
+        data_type (pa.DataType): The inferred Arrow type of a column.
+        in_list (bool): Whether the type is nested in a list.
+
+    Returns:
+        pa.DataType: The type with repeated strings dictionary-encoded.
+    """
+    if pa.types.is_string(data_type) and in_list:
+        return pa.dictionary(pa.int32(), pa.string())
+    if pa.types.is_list(data_type):
+        return pa.list_(dictionary_encode_type(data_type.value_type, True))
+    if pa.types.is_struct(data_type):
+        return pa.struct(
+            [
+                pa.field(field.name, dictionary_encode_type(field.type, in_list))
+                for field in data_type
+            ]
+        )
+    return data_type
+
+
+def songs_to_table(songs: List[Dict]) -> pa.Table:
+    """
+    Convert a list of songs into an Arrow table with dictionary-encoded
+    repeated values.
+
+    Args:
+        songs (list): The songs, e.g. as returned by get_songs_with_coauthors.
+
+    Returns:
+        pa.Table: The songs table.
+    """
+    table = pa.Table.from_pylist(to_dicts(songs))
+    schema = pa.schema(
+        [
+            pa.field(
+                field.name,
+                pa.dictionary(pa.int32(), pa.string())
+                if field.name == KEY_COLUMN
+                else dictionary_encode_type(field.type),
+            )
+            for field in table.schema
+        ]
+    )
+    return table.cast(schema)
+
+
+def write_parquet(data: Union[List[Dict], Dict], path: str) -> None:
+    """
+    Save a list of songs or coauthor data to a Parquet file.
+
+    Coauthor data, i.e. a dictionary mapping coauthor IDs to their artist
+    info and songs, is flattened into a single songs table with the
+    coauthor ID in a dictionary-encoded column.
+
+    Args:
+        data (list or dict): The songs or the coauthor data to save.
+        path (str): The path of the Parquet file.
+    """
+    if isinstance(data, list):
+        table = songs_to_table(data)
+    elif all(isinstance(value, dict) and "songs" in value for value in data.values()):
+        table = songs_to_table(
+            [
+                {KEY_COLUMN: key, **song}
+                for key, value in data.items()
+                for song in value["songs"]
+            ]
+        )
+        artist_info = {key: value.get("artist_info") for key, value in data.items()}
+        table = table.replace_schema_metadata(
+            {
+                **(table.schema.metadata or {}),
+                ARTIST_INFO_METADATA_KEY: json.dumps(artist_info, ensure_ascii=False),
+            }
+        )
+    else:
+        raise ValueError("Only song lists and coauthor data can be saved to Parquet")
+
+    pq.write_table(table, path, compression="zstd")
+
+
+def load_table(path: str, columns: Optional[List[str]] = None) -> pa.Table:
+    """
+    Load a Parquet file as an Arrow table, reading only the given columns
+    through a memory map.
+
+    Args:
+        path (str): The path of the Parquet file.
+        columns (list): The columns to read, None for all of them.
+
+    Returns:
+        pa.Table: The loaded table, with dictionary-encoded columns kept encoded.
+    """
+    if columns is not None:
+        available = set(pq.read_schema(path).names)
+        columns = [
+            column
+            for column in dict.fromkeys([KEY_COLUMN] + columns)
+            if column in available
+        ]
+    return pq.read_table(path, columns=columns, memory_map=True)
+
+
+def read_parquet(
+    path: str, columns: Optional[List[str]] = None
+) -> Union[List[Dict], Dict]:
+    """
+    Load a list of songs or coauthor data saved by write_parquet.
+
+    Args:
+        path (str): The path of the Parquet file.
+        columns (list): The song fields to load, None for all of them.
+
+    Returns:
+        list or dict: The songs, or the coauthor data with its artist info.
+    """
+    table = load_table(path, columns)
+    metadata = pq.read_schema(path).metadata or {}
+    if KEY_COLUMN not in table.column_names:
+        return table.to_pylist()
+
+    artist_info = json.loads(metadata.get(ARTIST_INFO_METADATA_KEY, b"{}"))
+    data = {
+        key: {"artist_info": info, "songs": []} for key, info in artist_info.items()
+    }
+    for song in table.to_pylist():
+        key = song.pop(KEY_COLUMN)
+        data.setdefault(key, {"artist_info": None, "songs": []})["songs"].append(song)
+    return data
+
+
+if __name__ == "__main__":
+    # Convert the saved song lists and coauthor data and compare them with JSON
+    from get_data import SAVE_FOLDER, load_from_json
+
+    for name in [
+        "songs",
+        "songs_preprocessed",
+        "songs_with_coauthors",
+        "top_coauthors",
+        "coauthor_data",
+    ]:
+        json_path = os.path.join(SAVE_FOLDER, f"{name}.json")
+        parquet_path = os.path.join(SAVE_FOLDER, f"{name}.parquet")
+        write_parquet(load_from_json(f"{name}.json"), parquet_path)
+
+        start_time = time.time()
+        load_from_json(f"{name}.json")
+        json_time = time.time() - start_time
+        start_time = time.time()
+        table = load_table(parquet_path)
+        table_time = time.time() - start_time
+        start_time = time.time()
+        read_parquet(parquet_path)
+        parquet_time = time.time() - start_time
+        print(
+            f"{name}: {os.path.getsize(json_path) / 1024:.1f} KB JSON loaded in {json_time:.3f} s, "
+            f"{os.path.getsize(parquet_path) / 1024:.1f} KB Parquet loaded in {table_time:.3f} s "
+            f"as a {table.nbytes / 1024:.1f} KB Arrow table, {parquet_time:.3f} s as dicts"
+        )
@@ -0,0 +1,146 @@
+from collections import deque
+from typing import Dict, Hashable, List, Optional
+import networkx as nx
+
+
+# Modularity resolution, higher values favor smaller communities
+RESOLUTION = 1.0
+# The whole graph is swept again once its total edge weight grew by this factor,
+# as the gains of nodes away from the new edges drift with the total weight
+FULL_SWEEP_GROWTH = 2.0
+
+
+class IncrementalCommunities:
+    """
+    Communities of a growing weighted graph, maximizing modularity with the
+    local moving phase of Louvain.
+
+    Every update only revisits the nodes touched by new nodes and edges:
+    a queued node moves to the neighboring community with the largest
+    modularity gain, and its neighbors outside that community are queued
+    in turn, until no node gains from moving. A BFS level thus costs time
+    proportional to the part of the graph it changed, not to the graph.
+
+    Args:
+        weight (str): The edge attribute holding edge weights, 1 if missing.
+        resolution (float): The modularity resolution.
+    """
+
+    def __init__(self, weight: str = "count", resolution: float = RESOLUTION):
+        self.weight = weight
+        self.resolution = resolution
+        self.labels: Dict[Hashable, int] = {}
+        # Weighted degree of every node and total weighted degree of every community
+        self._strengths: Dict[Hashable, float] = {}
+        self._totals: Dict[int, float] = {}
+        self._edges = set()
+        self._total_weight = 0.0
+        self._swept_weight = 0.0
+        self._next_label = 0
+
+    def __len__(self) -> int:
+        return len(set(self.labels.values()))
+
+    def update(self, G: nx.Graph) -> Dict[Hashable, int]:
+        """
+        Add the nodes and edges of a graph that were not seen yet and move
+        the affected nodes between communities.
+
+        Args:
+            G (nx.Graph): The graph, a superset of the graph of the previous update.
+
+        Returns:
+            dict: The community of every node.
+        """
+        dirty = []
+        for node in G.nodes:
+            if node not in self.labels:
+                self.labels[node] = self._next_label
+                self._totals[self._next_label] = 0.0
+                self._strengths[node] = 0.0
+                self._next_label += 1
+                dirty.append(node)
+        for u, v, weight in G.edges(data=self.weight, default=1):
+            if u == v or (u, v) in self._edges or (v, u) in self._edges:
+                continue
+            self._edges.add((u, v))
+            for node in (u, v):
+                self._strengths[node] += weight
+                self._totals[self.labels[node]] += weight
+            self._total_weight += weight
+            dirty.extend((u, v))
+
+        if self._total_weight >= FULL_SWEEP_GROWTH * self._swept_weight:
+            self._swept_weight = self._total_weight
+            dirty = list(G.nodes)
+        self._move_nodes(G, dirty)
+        return self.labels
+
+    def _move_nodes(self, G: nx.Graph, dirty: List[Hashable]) -> None:
+        if not self._total_weight:
+            return
+        queue = deque(dict.fromkeys(dirty))
+        queued = set(queue)
+        scale = self.resolution / (2 * self._total_weight)
+        while queue:
+            node = queue.popleft()
+            queued.discard(node)
+            current = self.labels[node]
+            strength = self._strengths[node]
+
+            # Weight of the edges of the node to every neighboring community
+            links: Dict[int, float] = {}
+            for neighbor, attributes in G[node].items():
+                if neighbor != node:
+                    label = self.labels[neighbor]
+                    links[label] = links.get(label, 0.0) + attributes.get(self.weight, 1)
+
+            self._totals[current] -= strength
+            best = current
+            best_gain = links.get(current, 0.0) - self._totals[current] * strength * scale
+            for label, link in links.items():
+                gain = link - self._totals[label] * strength * scale
+                if gain > best_gain:
+                    best, best_gain = label, gain
+            self._totals[best] += strength
+            if best == current:
+                continue
+
+            self.labels[node] = best
+            for neighbor in G[node]:
+                if self.labels[neighbor] != best and neighbor not in queued:
+                    queue.append(neighbor)
+                    queued.add(neighbor)
+
+    def members(self) -> Dict[int, List[Hashable]]:
+        """
+        Get the members of every community.
+
+        Returns:
+            dict: The nodes of every community, by community label.
+        """
+        members: Dict[int, List[Hashable]] = {}
+        for node, label in self.labels.items():
+            members.setdefault(label, []).append(node)
+        return members
+
+
+def modularity(
+    G: nx.Graph, labels: Dict[Hashable, int], weight: Optional[str] = "count"
+) -> float:
+    """
+    Compute the modularity of a partition, e.g. to compare it with a full
+    Louvain run of networkx.
+
+    Args:
+        G (nx.Graph): The graph.
+        labels (dict): The community of every node.
+        weight (str): The edge attribute holding edge weights.
+
+    Returns:
+        float: The modularity.
+    """
+    communities: Dict[int, set] = {}
+    for node in G.nodes:
+        communities.setdefault(labels[node], set()).add(node)
+    return nx.community.modularity(G, communities.values(), weight=weight)
@@ -0,0 +1,269 @@
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Dict, List, Optional
+import argparse
+import json
+import os
+import time
+from get_data import (
+    SAVE_FOLDER,
+    find_spotify_artist,
+    get_artist_info,
+    get_top_coauthors_by_id,
+)
+from scheduler import SCHEDULER
+
+
+CHECKPOINT_PATH = os.path.join(SAVE_FOLDER, "crawl_checkpoint.json")
+
+# Minimum number of seconds between two checkpoint writes within a hop
+CHECKPOINT_INTERVAL = 5.0
+
+
+def load_checkpoint(path: str) -> Optional[Dict]:
+    """
+    Load the crawl checkpoint.
+
+    Args:
+        path (str): The path of the checkpoint file.
+
+    Returns:
+        dict: The checkpoint, or None if there is no checkpoint.
+    """
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def save_checkpoint(checkpoint: Dict, path: str) -> None:
+    """
+    Atomically save the crawl checkpoint, so a crash never leaves a partial file.
+
+    Args:
+        checkpoint (dict): The checkpoint to save.
+        path (str): The path of the checkpoint file.
+    """
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(checkpoint, f, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+
+def new_checkpoint(seeds: List[str], hops: int, width: Optional[int]) -> Dict:
+    """
+    Create the checkpoint of a crawl starting from the seed artists.
+
+    Args:
+        seeds (list): The names of the seed artists.
+        hops (int): Number of hops to crawl from the seeds.
+        width (int): Number of top coauthors followed per artist, None for all of them.
+
+    Returns:
+        dict: The checkpoint of the crawl at hop 0.
+    """
+    names = {}
+    for seed in seeds:
+        artist = find_spotify_artist(seed)
+        if artist is None:
+            print(f"Seed artist not found on Spotify: {seed}")
+            continue
+        names[artist["id"]] = artist["name"]
+
+    return {
+        "seeds": seeds,
+        "hops": hops,
+        "width": width,
+        "hop": 0,
+        "frontier": list(names),
+        "done": [],
+        "visited": list(names),
+        "names": names,
+    }
+
+
+def crawl_artist(
+    artist_id: str, artist_name: str, expand: bool, width: Optional[int]
+) -> List[Dict]:
+    """
+    Fetch everything the app needs about an artist into the local store.
+
+    Args:
+        artist_id (str): The Spotify ID of the artist.
+        artist_name (str): The name of the artist.
+        expand (bool): Whether to fetch the discography, False for the last hop.
+        width (int): Number of top coauthors to return, None for all of them.
+
+    Returns:
+        list: The top coauthors of the artist, empty if not expanded.
+    """
+    get_artist_info(artist_name)
+    if not expand:
+        return []
+    return get_top_coauthors_by_id(artist_id, width)
+
+
+def crawl(
+    seeds: List[str],
+    hops: int,
+    width: Optional[int],
+    workers: int,
+    checkpoint_path: str = CHECKPOINT_PATH,
+    restart: bool = False,
+) -> Dict:
+    """
+    Crawl the collaboration network breadth-first from the seed artists.
+
+    Artist info and discographies end up in the local store. Progress is
+    checkpointed while crawling, so an interrupted crawl with the same
+    arguments resumes from the frontier it was on.
+
+    Args:
+        seeds (list): The names of the seed artists.
+        hops (int): Number of hops to crawl from the seeds.
+        width (int): Number of top coauthors followed per artist, None for all of them.
+        workers (int): Number of artists crawled concurrently.
+        checkpoint_path (str): The path of the checkpoint file.
+        restart (bool): Whether to ignore an existing checkpoint.
+
+    Returns:
+        dict: The final checkpoint.
+    """
+    checkpoint = None if restart else load_checkpoint(checkpoint_path)
+    if checkpoint is not None and (
+        checkpoint["seeds"] != seeds
+        or checkpoint["hops"] != hops
+        or checkpoint["width"] != width
+    ):
+        print("Checkpoint was made with different arguments, starting a new crawl.")
+        checkpoint = None
+    if checkpoint is None:
+        checkpoint = new_checkpoint(seeds, hops, width)
+        save_checkpoint(checkpoint, checkpoint_path)
+    else:
+        print(
+            f"Resuming crawl at hop {checkpoint['hop']} with "
+            f"{len(checkpoint['done'])}/{len(checkpoint['frontier'])} artists done."
+        )
+
+    visited = set(checkpoint["visited"])
+    names = checkpoint["names"]
+    start_time = time.time()
+    start_requests = sum(SCHEDULER.requests.values())
+    n_crawled = 0
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        while checkpoint["hop"] <= hops and checkpoint["frontier"]:
+            hop = checkpoint["hop"]
+            expand = hop < hops
+            frontier = checkpoint["frontier"]
+            done = set(checkpoint["done"])
+            print(f"Hop {hop}: crawling {len(frontier) - len(done)} artists.")
+
+            # Artists done before a crash are read back from the store
+            futures = {
+                executor.submit(
+                    crawl_artist, artist_id, names[artist_id], expand, width
+                ): artist_id
+                for artist_id in frontier
+            }
+            coauthors = {}
+            last_save = time.time()
+            for future in as_completed(futures):
+                artist_id = futures[future]
+                try:
+                    coauthors[artist_id] = future.result()
+                except Exception as e:
+                    print(f"Error crawling {names[artist_id]} ({artist_id}): {e}")
+                    continue
+                if artist_id not in done:
+                    done.add(artist_id)
+                    checkpoint["done"].append(artist_id)
+                    n_crawled += 1
+
+                if time.time() - last_save >= CHECKPOINT_INTERVAL:
+                    save_checkpoint(checkpoint, checkpoint_path)
+                    last_save = time.time()
+                    print_throughput(n_crawled, start_time, start_requests)
+
+            if len(done) < len(frontier):
+                save_checkpoint(checkpoint, checkpoint_path)
+                print(
+                    f"{len(frontier) - len(done)} artists failed at hop {hop}, "
+                    "run the crawl again to retry them."
+                )
+                break
+
+            next_frontier = []
+            for artist_id in frontier:
+                for coauthor in coauthors[artist_id]:
+                    if coauthor["id"] not in visited:
+                        visited.add(coauthor["id"])
+                        names[coauthor["id"]] = coauthor["name"]
+                        next_frontier.append(coauthor["id"])
+
+            checkpoint["hop"] = hop + 1
+            checkpoint["frontier"] = next_frontier
+            checkpoint["done"] = []
+            checkpoint["visited"] = list(visited)
+            save_checkpoint(checkpoint, checkpoint_path)
+
+    print_throughput(n_crawled, start_time, start_requests)
+    return checkpoint
+
+
+def print_throughput(n_crawled: int, start_time: float, start_requests: int) -> None:
+    """
+    Print the number of artists crawled per minute and upstream requests per artist.
+
+    Args:
+        n_crawled (int): Number of artists crawled so far.
+        start_time (float): The time the crawl started.
+        start_requests (int): The upstream request count when the crawl started.
+    """
+    minutes = (time.time() - start_time) / 60
+    n_requests = sum(SCHEDULER.requests.values()) - start_requests
+    print(
+        f"Crawled {n_crawled} artists in {minutes:.2f} minutes: "
+        f"{n_crawled / minutes if minutes else 0:.1f} artists/min, "
+        f"{n_requests / n_crawled if n_crawled else 0:.1f} requests/artist"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Crawl the artist collaboration network into the local store."
+    )
+    parser.add_argument("seeds", nargs="+", help="Names of the seed artists.")
+    parser.add_argument(
+        "--hops", type=int, default=2, help="Number of hops from the seeds."
+    )
+    parser.add_argument(
+        "--width",
+        type=int,
+        default=20,
+        help="Number of top coauthors followed per artist, 0 for all of them.",
+    )
+    parser.add_argument(
+        "--workers", type=int, default=8, help="Number of concurrent artists."
+    )
+    parser.add_argument(
+        "--checkpoint", default=CHECKPOINT_PATH, help="Path of the checkpoint file."
+    )
+    parser.add_argument(
+        "--restart", action="store_true", help="Ignore an existing checkpoint."
+    )
+    args = parser.parse_args()
+
+    crawl(
+        args.seeds,
+        args.hops,
+        args.width or None,
+        args.workers,
+        checkpoint_path=args.checkpoint,
+        restart=args.restart,
+    )
+
+
+if __name__ == "__main__":
+    main()
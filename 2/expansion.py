@@ -0,0 +1,239 @@
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+import time
+import networkx as nx
+from get_data import (
+    find_spotify_artist,
+    get_artist_info,
+    get_top_coauthors_by_id,
+)
+from filters import CoauthorFilter
+from metrics import METRICS
+
+
+LEVEL_COLORS = [
+    "#b30000",
+    "#0A369D",
+    "#4472CA",
+    "#92B4F4",
+    "#B1C9EE",
+    "#C0D4EB",
+    "#CFDEE7",
+]
+NODE_SIZE_MULTIPLAYER = 5
+MAX_NODE_SIZE = 40
+
+# Upper bound on concurrent upstream requests issued for a single frontier
+MAX_WORKERS = 8
+
+
+def format_node_title(artist_name: str, artist_info: Dict) -> str:
+    """
+    Build the hover text shown for an artist node.
+
+    Args:
+        artist_name (str): The name displayed for the artist.
+        artist_info (dict): The artist information returned by get_artist_info.
+
+    Returns:
+        str: The node title with origin country and life span.
+    """
+    life_span = artist_info.get("life_span", {})
+    return (
+        f"{artist_name}\nOrigin: {artist_info.get('origin_country', 'N/A')}"
+        f"\nLife Span: {life_span.get('begin', 'Unknown')} - {life_span.get('end', 'Present')}"
+    )
+
+
+def fetch_all(
+    fetch_func: Callable, keys: Iterable[str], executor: ThreadPoolExecutor
+) -> Dict:
+    """
+    Fetch a value for every unique key concurrently.
+
+    Args:
+        fetch_func (callable): The fetch function taking a single key.
+        keys (iterable): The keys to fetch, duplicates are fetched once.
+        executor (ThreadPoolExecutor): The pool running the fetches.
+
+    Returns:
+        dict: A dictionary mapping every key to its fetched value.
+    """
+    unique_keys = list(dict.fromkeys(keys))
+    return dict(zip(unique_keys, executor.map(fetch_func, unique_keys)))
+
+
+def iter_collaboration_graph(
+    artist_name: str,
+    artist_info: Dict,
+    n_levels: int,
+    n_authors_in_level: int,
+    coauthor_filter: Optional[CoauthorFilter] = None,
+    max_workers: int = MAX_WORKERS,
+) -> Iterator[Tuple[nx.Graph, Dict[str, int], List[Dict]]]:
+    """
+    Build the collaboration graph of an artist one BFS level at a time,
+    yielding the partial graph after every level.
+
+    Top coauthors of the whole frontier are fetched at once, followed by the artist
+    information of all of its top coauthors. The results are then applied in
+    queue order, so nodes, edges and levels are the same as in a sequential BFS.
+    Only the root artist is searched by name, coauthors are expanded by the
+    Spotify ID they come with.
+
+    Args:
+        artist_name (str): The name of the root artist.
+        artist_info (dict): The artist information of the root artist.
+        n_levels (int): Number of levels of collaboration to expand.
+        n_authors_in_level (int): Number of top coauthors expanded per artist.
+        coauthor_filter (CoauthorFilter): The compiled filter applied to coauthors, None for no filter.
+        max_workers (int): Maximum number of concurrent fetches.
+
+    Yields:
+        tuple: The graph, the level of every artist and the fetch latency of
+            every level so far. The same graph is extended by the next level.
+            The root alone is yielded if no level is expanded.
+    """
+    root = find_spotify_artist(artist_name)
+    artist_name = artist_name.lower()
+
+    levels = {artist_name: 0}
+    # Spotify ID of every artist node, None if the root is not on Spotify
+    spotify_ids = {artist_name: root["id"] if root is not None else None}
+    level_stats = []
+
+    G = nx.Graph()
+    G.add_node(
+        artist_name,
+        color=LEVEL_COLORS[0],
+        title=format_node_title(artist_name, artist_info),
+    )
+
+    def fetch_top_coauthors(current_artist: str) -> List[Dict]:
+        if spotify_ids[current_artist] is None:
+            return []
+        return get_top_coauthors_by_id(
+            spotify_ids[current_artist], top_n=n_authors_in_level
+        )
+
+    frontier = [artist_name]
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        for level in range(n_levels):
+            if not frontier:
+                break
+
+            start_time = time.time()
+            top_coauthors = fetch_all(fetch_top_coauthors, frontier, executor)
+            if coauthor_filter is not None:
+                # Coauthors are dropped before their artist information is fetched
+                top_coauthors = coauthor_filter.filter_collaborations(top_coauthors)
+            top_coauthors_time = time.time()
+            coauthor_infos = fetch_all(
+                get_artist_info,
+                (
+                    coauthor["name"]
+                    for current_artist in frontier
+                    for coauthor in top_coauthors[current_artist]
+                ),
+                executor,
+            )
+            end_time = time.time()
+
+            # Filter the whole frontier at once
+            matches = dict.fromkeys(coauthor_infos, True)
+            if coauthor_filter is not None:
+                matches = dict(
+                    zip(coauthor_infos, coauthor_filter.mask(list(coauthor_infos.values())))
+                )
+            filter_time = time.time()
+
+            next_frontier = []
+            for current_artist in frontier:
+                for coauthor in top_coauthors[current_artist]:
+                    coauthor_info = coauthor_infos[coauthor["name"]]
+                    if not matches[coauthor["name"]]:
+                        continue
+                    coauthor_name = coauthor["name"].lower()
+                    if coauthor_name not in levels:
+                        G.add_node(
+                            coauthor_name,
+                            color=LEVEL_COLORS[level + 1],
+                            size=min(
+                                NODE_SIZE_MULTIPLAYER * coauthor["count"],
+                                MAX_NODE_SIZE,
+                            ),
+                            title=format_node_title(coauthor_name, coauthor_info),
+                        )
+                        levels[coauthor_name] = level + 1
+                        spotify_ids[coauthor_name] = coauthor["id"]
+                        next_frontier.append(coauthor_name)
+                    if coauthor_name not in [artist_name, current_artist]:
+                        G.add_edge(
+                            current_artist,
+                            coauthor_name,
+                            label=f"{coauthor['count']} co.",
+                            font={"size": 10},
+                            count=coauthor["count"],
+                            years=coauthor.get("years", {}),
+                        )
+
+            graph_time = time.time()
+
+            stage_seconds = {
+                "top_coauthors": top_coauthors_time - start_time,
+                "info": end_time - top_coauthors_time,
+                "filter": filter_time - end_time,
+                "graph": graph_time - filter_time,
+            }
+            for stage, seconds in stage_seconds.items():
+                METRICS.observe("stage_seconds", seconds, stage=f"bfs_{stage}")
+            level_stats.append(
+                {
+                    "level": level,
+                    "frontier": len(frontier),
+                    "coauthors": len(coauthor_infos),
+                    **{
+                        f"{stage}_seconds": round(seconds, 3)
+                        for stage, seconds in stage_seconds.items()
+                    },
+                    "total_seconds": round(graph_time - start_time, 3),
+                }
+            )
+            print(
+                f"Level {level}: fetched {len(frontier)} artists and "
+                f"{len(coauthor_infos)} coauthors in {end_time - start_time:.2f} seconds"
+            )
+            frontier = next_frontier
+            yield G, levels, level_stats
+
+    if not level_stats:
+        yield G, levels, level_stats
+
+
+def expand_collaboration_graph(
+    artist_name: str,
+    artist_info: Dict,
+    n_levels: int,
+    n_authors_in_level: int,
+    coauthor_filter: Optional[CoauthorFilter] = None,
+    max_workers: int = MAX_WORKERS,
+) -> Tuple[nx.Graph, Dict[str, int], List[Dict]]:
+    """
+    Build the whole collaboration graph of an artist.
+
+    Args:
+        artist_name (str): The name of the root artist.
+        artist_info (dict): The artist information of the root artist.
+        n_levels (int): Number of levels of collaboration to expand.
+        n_authors_in_level (int): Number of top coauthors expanded per artist.
+        coauthor_filter (CoauthorFilter): The compiled filter applied to coauthors, None for no filter.
+        max_workers (int): Maximum number of concurrent fetches.
+
+    Returns:
+        tuple: The graph, the level of every artist and the fetch latency of every level.
+    """
+    for G, levels, level_stats in iter_collaboration_graph(
+        artist_name, artist_info, n_levels, n_authors_in_level, coauthor_filter, max_workers
+    ):
+        pass
+    return G, levels, level_stats
@@ -0,0 +1,249 @@
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional, Tuple
+import threading
+from dateutil import parser as dateparser
+import numpy as np
+import pandas as pd
+from markets import available_in
+
+
+FILTER_GENRE = "Genre"
+FILTER_COUNTRY = "Country"
+FILTER_BORN_AFTER = "Artist born after / Band created after"
+FILTER_CAREER_ENDED = "Career ended"
+FILTER_MARKET = "Collaborations available in market"
+
+# Number of artists whose parsed attributes are kept in memory
+ATTRIBUTES_CACHE_SIZE = 10000
+
+# Parsed attributes of the most recently filtered artists, keyed by MusicBrainz ID
+_attributes_cache: "OrderedDict[str, Dict]" = OrderedDict()
+_attributes_lock = threading.Lock()
+
+
+def parse_begin_year(begin: Optional[str]) -> Optional[int]:
+    """
+    Parse the year an artist was born or a band was created.
+
+    Args:
+        begin (str): The beginning of the life span, e.g. "1987-06-17" or "1987".
+
+    Returns:
+        int: The year, or None if it is missing or invalid.
+    """
+    if not begin:
+        return None
+    try:
+        return dateparser.parse(begin).year
+    except (ValueError, OverflowError):
+        return None
+
+
+def get_artist_attributes(artist_info: Dict) -> Dict:
+    """
+    Get the attributes of an artist the filters are evaluated on, parsing them
+    only once per artist.
+
+    Args:
+        artist_info (dict): The artist information returned by get_artist_info.
+
+    Returns:
+        dict: The begin year as an int, the set of tag names, and the
+            normalized origin country and career ended flag.
+    """
+    artist_id = artist_info.get("artist_id")
+    with _attributes_lock:
+        if artist_id in _attributes_cache:
+            _attributes_cache.move_to_end(artist_id)
+            return _attributes_cache[artist_id]
+
+    life_span = artist_info.get("life_span") or {}
+    country = artist_info.get("origin_country")
+    ended = life_span.get("ended")
+    attributes = {
+        "begin_year": parse_begin_year(life_span.get("begin")),
+        "tags": frozenset(tag["name"] for tag in artist_info.get("tags", [])),
+        "country": country.lower().strip() if country is not None else None,
+        "ended": ended.lower().strip() if ended is not None else None,
+    }
+    if artist_id not in (None, "unknown"):
+        with _attributes_lock:
+            _attributes_cache[artist_id] = attributes
+            while len(_attributes_cache) > ATTRIBUTES_CACHE_SIZE:
+                _attributes_cache.popitem(last=False)
+    return attributes
+
+
+def forget_artist_attributes(artist_id: str) -> None:
+    """
+    Drop the parsed attributes of an artist, e.g. once its information is refreshed.
+    """
+    with _attributes_lock:
+        _attributes_cache.pop(artist_id, None)
+
+
+def clear_artist_attributes() -> None:
+    """
+    Drop the parsed attributes of every artist, e.g. to measure cold filtering.
+    """
+    with _attributes_lock:
+        _attributes_cache.clear()
+
+
+def attributes_table(artist_infos: List[Dict]) -> pd.DataFrame:
+    """
+    Build the attribute table of a batch of artists.
+
+    Args:
+        artist_infos (list): The artist information of every artist.
+
+    Returns:
+        pd.DataFrame: One row of attributes per artist.
+    """
+    table = pd.DataFrame(
+        [get_artist_attributes(artist_info) for artist_info in artist_infos],
+        columns=["begin_year", "tags", "country", "ended"],
+    )
+    table["begin_year"] = table["begin_year"].astype("Int64")
+    return table
+
+
+class CoauthorFilter:
+    """
+    The filter selections of the user compiled into predicates over artist attributes.
+
+    Args:
+        conditions (list): Pairs of a predicate over the attributes of one
+            artist and a function computing the same predicate as a boolean
+            mask over an attribute table.
+        market (str): The market collaborations must be available in, None
+            for any market.
+    """
+
+    def __init__(
+        self,
+        conditions: List[Tuple[Callable[[Dict], bool], Callable[[pd.DataFrame], pd.Series]]],
+        market: Optional[str] = None,
+    ):
+        self.conditions = conditions
+        self.market = market
+
+    def __call__(self, artist_info: Optional[Dict]) -> bool:
+        if artist_info is None:
+            return False
+        attributes = get_artist_attributes(artist_info)
+        return all(predicate(attributes) for predicate, _ in self.conditions)
+
+    def mask(self, artist_infos: List[Dict]) -> np.ndarray:
+        """
+        Evaluate the filter on a whole batch of artists at once.
+
+        Args:
+            artist_infos (list): The artist information of every artist.
+
+        Returns:
+            np.ndarray: A boolean mask, True for the artists matching the filter.
+        """
+        result = np.ones(len(artist_infos), dtype=bool)
+        if not self.conditions or not artist_infos:
+            return result
+        table = attributes_table(artist_infos)
+        for _, table_predicate in self.conditions:
+            result &= table_predicate(table).fillna(False).to_numpy(dtype=bool)
+        return result
+
+    def filter_collaborations(
+        self, coauthors: Dict[str, List[Dict]]
+    ) -> Dict[str, List[Dict]]:
+        """
+        Drop the collaborations unavailable in the selected market, testing
+        the markets masks of a whole BFS frontier at once.
+
+        Args:
+            coauthors (dict): The top coauthors of every artist of the frontier,
+                each with the mask of the markets of their common songs.
+
+        Returns:
+            dict: The coauthors of every artist available in the market.
+        """
+        if self.market is None:
+            return coauthors
+        available = iter(
+            available_in(
+                [
+                    coauthor["markets"]
+                    for artist_coauthors in coauthors.values()
+                    for coauthor in artist_coauthors
+                ],
+                self.market,
+            ).tolist()
+        )
+        return {
+            artist: [coauthor for coauthor in artist_coauthors if next(available)]
+            for artist, artist_coauthors in coauthors.items()
+        }
+
+
+def compile_filters(selections: Dict[str, Optional[str]]) -> CoauthorFilter:
+    """
+    Compile the filter selections of the user. Empty selections are ignored.
+
+    Args:
+        selections (dict): The selected value of every filter, by filter title.
+
+    Returns:
+        CoauthorFilter: The compiled filter.
+    """
+    conditions = []
+
+    genre = selections.get(FILTER_GENRE)
+    if genre not in (None, ""):
+        conditions.append(
+            (
+                lambda attributes: genre in attributes["tags"],
+                lambda table: table["tags"].map(lambda tags: genre in tags),
+            )
+        )
+
+    country = selections.get(FILTER_COUNTRY)
+    if country not in (None, ""):
+        country = country.lower().strip()
+        conditions.append(
+            (
+                lambda attributes: attributes["country"] == country,
+                lambda table: table["country"] == country,
+            )
+        )
+
+    born_after = selections.get(FILTER_BORN_AFTER)
+    if born_after not in (None, ""):
+        # A year that is not a number matches no artist
+        born_after = born_after.strip()
+        year = (
+            int(born_after) if born_after.isascii() and born_after.isdigit() else None
+        )
+        conditions.append(
+            (
+                lambda attributes: year is not None
+                and attributes["begin_year"] is not None
+                and attributes["begin_year"] > year,
+                lambda table: (
+                    table["begin_year"] > year
+                    if year is not None
+                    else pd.Series(False, index=table.index)
+                ),
+            )
+        )
+
+    career_ended = selections.get(FILTER_CAREER_ENDED)
+    if career_ended not in (None, ""):
+        career_ended = career_ended.lower().strip()
+        conditions.append(
+            (
+                lambda attributes: attributes["ended"] == career_ended,
+                lambda table: table["ended"] == career_ended,
+            )
+        )
+
+    market = selections.get(FILTER_MARKET)
+    return CoauthorFilter(conditions, market if market not in (None, "") else None)
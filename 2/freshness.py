@@ -0,0 +1,130 @@
+from typing import Callable, Optional, Tuple
+import queue
+import threading
+import time
+import traceback
+from scheduler import RequestScheduler
+from metrics import METRICS
+
+
+DAY = 24 * 60 * 60
+
+# Seconds fetched data stays fresh. Artist metadata rarely changes, while
+# discographies and recording lists change about weekly
+TTLS = {
+    "artist": 30 * DAY,
+    "spotify_artist": 30 * DAY,
+    "discography": 7 * DAY,
+    "recordings": 7 * DAY,
+}
+# Upstream every kind of data is fetched from
+UPSTREAMS = {
+    "artist": "musicbrainz",
+    "discography": "spotify",
+    "recordings": "musicbrainz",
+}
+
+# Refreshes queued at most, expired data found beyond it is refreshed when found again
+MAX_PENDING_REFRESHES = 1000
+# Seconds between checks whether an upstream is idle enough for a refresh
+REFRESH_POLL_SECONDS = 0.5
+
+
+def is_stale(kind: str, fetched_at: Optional[float]) -> bool:
+    """
+    Check whether fetched data outlived its TTL.
+
+    Args:
+        kind (str): The kind of data, a key of TTLS.
+        fetched_at (float): The UNIX time of the fetch, None if unknown, e.g.
+            for data stored before fetch times were recorded.
+
+    Returns:
+        bool: True if the data should be fetched again.
+    """
+    return fetched_at is None or time.time() - fetched_at > TTLS[kind]
+
+
+class Refresher:
+    """
+    Fetch expired data again in a background thread, while callers keep
+    being served the stored data (stale-while-revalidate).
+
+    Refreshes go through the request scheduler, so they share the rate
+    budget of the upstreams, and each one only starts once the token bucket
+    of its upstream is full, i.e. no page is waiting for that upstream.
+
+    Args:
+        scheduler (RequestScheduler): The scheduler whose buckets refreshes wait for.
+        max_pending (int): Maximum number of queued refreshes.
+    """
+
+    def __init__(
+        self, scheduler: RequestScheduler, max_pending: int = MAX_PENDING_REFRESHES
+    ):
+        self.scheduler = scheduler
+        self._queue: "queue.Queue[Tuple[str, str, Callable[[], None]]]" = queue.Queue(
+            max_pending
+        )
+        self._pending = set()
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    def submit(self, kind: str, key: str, refresh: Callable[[], None]) -> bool:
+        """
+        Queue the refresh of expired data, unless it is already queued.
+
+        Args:
+            kind (str): The kind of data, a key of UPSTREAMS.
+            key (str): The ID of the data, e.g. the Spotify ID of an artist.
+            refresh (callable): The function fetching and storing the data again.
+
+        Returns:
+            bool: True if the refresh was queued.
+        """
+        with self._lock:
+            if (kind, key) in self._pending:
+                return False
+            try:
+                self._queue.put_nowait((kind, key, refresh))
+            except queue.Full:
+                return False
+            self._pending.add((kind, key))
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name="refresher", daemon=True
+                )
+                self._thread.start()
+        METRICS.inc("refreshes_queued_total", kind=kind)
+        return True
+
+    def pending(self) -> int:
+        with self._lock:
+            return len(self._pending)
+
+    def join(self) -> None:
+        """
+        Block until every queued refresh is done, e.g. before a script exits.
+        """
+        self._queue.join()
+
+    def _wait_for_idle(self, upstream: str) -> None:
+        bucket = self.scheduler.buckets[upstream]
+        while bucket.available() < bucket.capacity:
+            time.sleep(REFRESH_POLL_SECONDS)
+
+    def _run(self) -> None:
+        while True:
+            kind, key, refresh = self._queue.get()
+            try:
+                self._wait_for_idle(UPSTREAMS[kind])
+                with METRICS.timer("refresh_seconds", kind=kind):
+                    refresh()
+                METRICS.inc("refreshes_total", kind=kind, result="ok")
+            except Exception:
+                print(f"Refreshing {kind} {key} failed:\n{traceback.format_exc()}")
+                METRICS.inc("refreshes_total", kind=kind, result="error")
+            finally:
+                with self._lock:
+                    self._pending.discard((kind, key))
+                self._queue.task_done()
@@ -1,30 +1,274 @@
 from spotipy import Spotify
 from spotipy.oauth2 import SpotifyClientCredentials
-from typing import List, Dict, Optional
+from typing import Any, Callable, Iterable, List, Dict, Optional, Tuple
 from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
 import musicbrainzngs
+import requests
+import functools
 import json
 import time
 import os
-import streamlit as st
+from scheduler import SCHEDULER
+from store import GraphStore
+from adjacency import CoauthorIndex
+from identity import IdentityCache, normalize_name
+from metrics import METRICS
+from markets import decode_markets, encode_markets
+from freshness import TTLS, Refresher, is_stale
+from redis_cache import RedisCache
+from records import Recording, Track, json_default, to_dicts
+from filters import forget_artist_attributes
+from columnar import read_parquet, write_parquet
 
 
 SAVE_FOLDER = os.path.join(os.path.dirname(__file__), "saved")
 
+# Local store of everything fetched from upstream
+STORE = GraphStore(os.path.join(SAVE_FOLDER, "graph.sqlite3"))
+# Coauthors of every artist seen by this process, sorted by collaboration count
+COAUTHOR_INDEX = CoauthorIndex()
+# Artist IDs of every resolved name, in memory in front of the local store
+IDENTITY = IdentityCache(STORE)
+# Expired data is served from the local store while this fetches it again
+REFRESHER = Refresher(SCHEDULER)
+# Upstream responses are shared by every app process through Redis if it is
+# configured, e.g. `redis://localhost:6379/0`, so replicas fetch every artist once
+REDIS_URL = os.environ.get("COLLABORATION_REDIS_URL")
+SHARED_CACHE = RedisCache(REDIS_URL) if REDIS_URL else None
 
-# Spotify API setup
+
+SPOTIFY_CLIENT_ID = "963c976b97b14b1a9595d510feba38f4"
+SPOTIFY_CLIENT_SECRET = "f89bc5064dd5487396181a312bbf2075"
+MUSICBRAINZ_USER_AGENT = ("MusicDataScraper", "1.0", "example@example.com")
+
+
+def count_response_bytes(response: requests.Response, *args, **kwargs) -> None:
+    METRICS.inc("bytes_deserialized_total", len(response.content), source="spotify")
+
+
+def collect_request_metrics():
+    """
+    Report the request counts of SCHEDULER, the lookups of IDENTITY and the
+    queued refreshes of REFRESHER as metrics.
+
+    Yields:
+        tuple: The name, labels and value of every counter.
+    """
+    for name, counts in [
+        ("upstream_requests_total", SCHEDULER.requests),
+        ("upstream_retries_total", SCHEDULER.retries),
+        ("upstream_collapsed_total", SCHEDULER.collapsed),
+    ]:
+        for upstream, count in list(counts.items()):
+            yield name, {"upstream": upstream}, count
+    for result, count in [*IDENTITY.hits.items(), ("miss", IDENTITY.misses)]:
+        yield "cache_lookups_total", {"cache": "identity", "result": result}, count
+    yield "refreshes_pending", {}, REFRESHER.pending()
+
+
+METRICS.add_collector(collect_request_metrics)
+
+
+def shared(
+    kind: str,
+    key: Callable[[str], str] = str,
+    found: Optional[Callable[[Any], bool]] = None,
+) -> Callable:
+    """
+    Decorate the upstream fetch of one artist to go through SHARED_CACHE,
+    if it is configured.
+
+    The decorated function takes a fetched_after keyword argument, the fetch
+    time of an expired local copy being refreshed, to skip a shared value
+    that is not newer than it. Negative results are not shared, as they
+    expire locally after NEGATIVE_LOOKUP_TTL, much sooner than TTLS[kind].
+
+    Args:
+        kind (str): The kind of fetched data, a key of TTLS.
+        key (callable): The function turning the argument into its cache key.
+        found (callable): The function telling whether a fetched value is a
+            positive result, None if every value is.
+
+    Returns:
+        callable: The decorator.
+    """
+
+    def decorator(func: Callable) -> Callable:
+        @functools.wraps(func)
+        def wrapper(artist: str, fetched_after: Optional[float] = None):
+            if SHARED_CACHE is None:
+                return func(artist)
+            return SHARED_CACHE.get_or_fetch(
+                f"{kind}:{key(artist)}",
+                lambda: func(artist),
+                TTLS[kind],
+                fetched_after,
+                found,
+            )
+
+        return wrapper
+
+    return decorator
+
+
+spotify_session = requests.Session()
+spotify_session.hooks["response"].append(count_response_bytes)
+# Spotify API setup. A plain session leaves retries and Retry-After handling to SCHEDULER
 spotify = Spotify(
     client_credentials_manager=SpotifyClientCredentials(
-        client_id="963c976b97b14b1a9595d510feba38f4",
-        client_secret="f89bc5064dd5487396181a312bbf2075",
-    )
+        client_id=SPOTIFY_CLIENT_ID,
+        client_secret=SPOTIFY_CLIENT_SECRET,
+    ),
+    requests_session=spotify_session,
 )
-# Set up the MusicBrainz API client
-musicbrainzngs.set_useragent("MusicDataScraper", "1.0", "example@example.com")
+# Set up the MusicBrainz API client. Its own rate limiter serializes all threads,
+# the MusicBrainz token bucket of SCHEDULER replaces it
+musicbrainzngs.set_useragent(*MUSICBRAINZ_USER_AGENT)
+musicbrainzngs.set_rate_limit(False)
+
+# Maximum page size of MusicBrainz browse requests and how many run concurrently
+MUSICBRAINZ_BROWSE_LIMIT = 100
+MUSICBRAINZ_BROWSE_WORKERS = 4
 
+# Maximum number of IDs accepted by the Spotify multi-album and multi-track endpoints
+SPOTIFY_ALBUMS_BATCH_SIZE = 20
+SPOTIFY_TRACKS_BATCH_SIZE = 50
 
-@st.cache_data(persist="disk")
+
+def batch_list(lst: List, batch_size: int):
+    """
+    Split a list into consecutive batches of a given size.
+
+    Args:
+        lst (list): The list to split.
+        batch_size (int): The maximum size of a batch.
+
+    Yields:
+        list: The next batch of the list.
+    """
+    for i in range(0, len(lst), batch_size):
+        yield lst[i : i + batch_size]
+
+
+def unknown_artist_info(artist_name: str) -> Dict:
+    """
+    Build the artist information of an artist not found in MusicBrainz.
+
+    Args:
+        artist_name (str): The name of the artist.
+
+    Returns:
+        dict: A dictionary with the same keys as returned by get_artist_info.
+    """
+    return {
+        "artist_id": "unknown",
+        "artist_name": artist_name,
+        "origin_country": "unknown",
+        "life_span": {},
+        "disambiguation": {},
+        "tags": [],
+        "aliases": [],
+    }
+
+
+@METRICS.timed("fetch_seconds")
 def get_artist_info(artist_name: str) -> Dict:
+    """
+    Get the MusicBrainz ID and origin country of an artist by their name,
+    fetching it only if the name, or another spelling or alias of it, was
+    never searched before. Expired information is refreshed in the background.
+
+    Args:
+        artist_name (str): The name of the artist.
+
+    Returns:
+        dict: A dictionary containing the artist ID, name, origin country, and additional metadata.
+    """
+    artist_info = cached_artist_info(artist_name)
+    if artist_info is None:
+        artist_info = fetch_artist_info(artist_name)
+        cache_artist_info(artist_name, artist_info)
+    elif artist_info["artist_id"] != "unknown":
+        fetched_at = STORE.get_fetched_at("artist", artist_info["artist_id"])
+        refresh_if_stale(
+            "artist",
+            artist_info["artist_id"],
+            fetched_at,
+            lambda: cache_artist_info(
+                artist_name, fetch_artist_info(artist_name, fetched_after=fetched_at)
+            ),
+        )
+    return artist_info
+
+
+def refresh_if_stale(
+    kind: str, key: str, fetched_at: Optional[float], refresh: Callable[[], None]
+) -> None:
+    """
+    Queue the background refresh of stored data that outlived its TTL.
+
+    Args:
+        kind (str): The kind of data, "artist", "discography" or "recordings".
+        key (str): The ID of the artist the data belongs to.
+        fetched_at (float): The UNIX time the data was fetched, None if unknown.
+        refresh (callable): The function fetching and storing the data again.
+    """
+    if is_stale(kind, fetched_at):
+        METRICS.inc("stale_served_total", kind=kind)
+        REFRESHER.submit(kind, key, refresh)
+
+
+def cached_artist_info(artist_name: str) -> Optional[Dict]:
+    """
+    Get the artist information of a name from the local store.
+
+    Args:
+        artist_name (str): The name of the artist.
+
+    Returns:
+        dict: The artist information, or None if it has to be fetched.
+    """
+    lookup = IDENTITY.lookup("musicbrainz", artist_name)
+    if lookup is None:
+        artist_info = None
+    elif lookup[0] is None:
+        artist_info = unknown_artist_info(artist_name)
+    else:
+        artist_info = STORE.get_artist_info(lookup[0])
+    METRICS.cache_lookup("artist_info", artist_info is not None)
+    return artist_info
+
+
+def cache_artist_info(artist_name: str, artist_info: Dict) -> None:
+    """
+    Save fetched artist information along with the names resolving to it.
+
+    Args:
+        artist_name (str): The searched name of the artist.
+        artist_info (dict): The artist information returned by fetch_artist_info.
+    """
+    if artist_info["artist_id"] == "unknown":
+        IDENTITY.save("musicbrainz", [artist_name], None)
+    else:
+        STORE.save_artist_info(artist_info)
+        forget_artist_attributes(artist_info["artist_id"])
+        IDENTITY.save(
+            "musicbrainz",
+            [artist_name, artist_info["artist_name"]],
+            artist_info["artist_id"],
+        )
+        IDENTITY.save(
+            "musicbrainz",
+            artist_info["aliases"],
+            artist_info["artist_id"],
+            replace=False,
+        )
+
+
+@shared("artist", normalize_name, lambda info: info["artist_id"] != "unknown")
+@METRICS.timed("fetch_seconds")
+def fetch_artist_info(artist_name: str) -> Dict:
     """
     Fetch the MusicBrainz ID and origin country of an artist by their name.
 
@@ -36,13 +280,22 @@ def get_artist_info(artist_name: str) -> Dict:
     """
     print(f"Fetching artist information for: {artist_name}")
     try:
-        result = musicbrainzngs.search_artists(artist=artist_name, limit=1, strict=True)
+        result = SCHEDULER.call(
+            "musicbrainz",
+            musicbrainzngs.search_artists,
+            artist=artist_name,
+            limit=1,
+            strict=True,
+        )
         if result["artist-list"]:
             artist = result["artist-list"][0]
             artist_id = artist["id"]
 
-            artist_details = musicbrainzngs.get_artist_by_id(
-                artist_id, includes=["area-rels"]
+            artist_details = SCHEDULER.call(
+                "musicbrainz",
+                musicbrainzngs.get_artist_by_id,
+                artist_id,
+                includes=["area-rels"],
             )
             origin_country = artist_details["artist"].get("area", {}).get("name", None)
 
@@ -53,16 +306,10 @@ def get_artist_info(artist_name: str) -> Dict:
                 "life_span": artist.get("life-span", {}),
                 "disambiguation": artist.get("disambiguation", {}),
                 "tags": artist.get("tag-list", []),
+                "aliases": [alias["alias"] for alias in artist.get("alias-list", [])],
             }
         else:
-            return {
-                "artist_id": "unknown",
-                "artist_name": artist_name,
-                "origin_country": "unknown",
-                "life_span": {},
-                "disambiguation": {},
-                "tags": [],
-            }
+            return unknown_artist_info(artist_name)
     except musicbrainzngs.ResponseError as e:
         raise Exception(f"Error fetching artist information for {artist_name}: {e}")
 
@@ -92,134 +339,525 @@ def filter_coauthor(coauthor_info: dict, filters: List) -> bool:
     return True
 
 
-@st.cache_data(persist="disk")
-def get_songs_from_artist(artist_id: str) -> List[Dict]:
+@METRICS.timed("fetch_seconds")
+def get_songs_from_artist(artist_id: str) -> List[Recording]:
     """
-    Fetch all songs by an artist along with release dates and ISRC codes.
+    Get all songs by an artist along with release dates and ISRC codes,
+    fetching them only if they are not in the local store yet. Expired songs
+    are refreshed in the background.
 
     Args:
         artist_id (str): The MusicBrainz ID of the artist.
 
     Returns:
-        list: A list of dictionaries containing song details.
+        list: The recordings, read-only records indexable like dicts.
     """
-    print(f"Fetching songs for artist ID: {artist_id}")
-    try:
-        batch_size = 100
-        offset = 0
-        songs = {}
+    fetched_at = STORE.get_fetched_at("recordings", artist_id)
+    METRICS.cache_lookup("recordings", fetched_at is not None)
+    if fetched_at is None:
+        STORE.save_recordings(artist_id, fetch_songs_from_artist(artist_id))
+    else:
+        refresh_if_stale(
+            "recordings",
+            artist_id,
+            fetched_at,
+            lambda: STORE.save_recordings(
+                artist_id, fetch_songs_from_artist(artist_id, fetched_after=fetched_at)
+            ),
+        )
+    return STORE.get_recordings(artist_id)
 
-        while True:
-            recordings = musicbrainzngs.browse_recordings(
-                artist=artist_id, includes=["isrcs"], limit=batch_size, offset=offset
-            )
-            if not recordings["recording-list"]:
-                break
-
-            for recording in recordings["recording-list"]:
-                title = recording["title"].lower()
-                musicbrainz_id = recording["id"]
-                isrcs = recording.get("isrc-list", [])
-                songs[title] = {
-                    "song_title": recording["title"],
-                    "musicbrainz_id": musicbrainz_id,
-                    "isrcs": isrcs,
-                    "release_date": "Unknown Date",
-                }
-
-            offset += batch_size
-
-        offset = 0
-        while True:
-            releases = musicbrainzngs.browse_releases(
-                artist=artist_id,
-                includes=["recordings"],
-                limit=batch_size,
+
+def browse_first_pages(
+    executor: ThreadPoolExecutor, browses: Dict[str, tuple]
+) -> Dict:
+    """
+    Fetch the first page of several MusicBrainz browse requests concurrently.
+
+    Args:
+        executor (ThreadPoolExecutor): The pool running the requests.
+        browses (dict): The browse function and keyword arguments of every
+            request, by name.
+
+    Returns:
+        dict: The first page of every request, by name.
+    """
+    futures = {
+        name: executor.submit(
+            SCHEDULER.call,
+            "musicbrainz",
+            browse_func,
+            limit=MUSICBRAINZ_BROWSE_LIMIT,
+            offset=0,
+            **kwargs,
+        )
+        for name, (browse_func, kwargs) in browses.items()
+    }
+    return {name: future.result() for name, future in futures.items()}
+
+
+def browse_remaining_pages(
+    executor: ThreadPoolExecutor, browses: Dict[str, tuple], totals: Dict[str, int]
+) -> Dict[str, List]:
+    """
+    Fetch all pages after the first one of several MusicBrainz browse
+    requests concurrently.
+
+    Args:
+        executor (ThreadPoolExecutor): The pool running the requests.
+        browses (dict): The browse function and keyword arguments of every
+            request, by name.
+        totals (dict): The total number of entities of every request, by name.
+
+    Returns:
+        dict: The remaining pages of every request in offset order, by name.
+    """
+    futures = {
+        name: [
+            executor.submit(
+                SCHEDULER.call,
+                "musicbrainz",
+                browse_func,
+                limit=MUSICBRAINZ_BROWSE_LIMIT,
                 offset=offset,
+                **kwargs,
             )
-            if not releases["release-list"]:
-                break
+            for offset in range(
+                MUSICBRAINZ_BROWSE_LIMIT, totals[name], MUSICBRAINZ_BROWSE_LIMIT
+            )
+        ]
+        for name, (browse_func, kwargs) in browses.items()
+    }
+    return {
+        name: [future.result() for future in pages] for name, pages in futures.items()
+    }
+
+
+def merge_songs(
+    recordings: Iterable[Tuple[str, str, List[str]]],
+    releases: Iterable[Tuple[Optional[str], Iterable[str]]],
+) -> List[Dict]:
+    """
+    Build the songs of an artist from its recordings and the releases they
+    appear on. Every song gets the earliest date of its dated releases.
+
+    Args:
+        recordings (iterable): The MusicBrainz ID, title and ISRC codes of every recording.
+        releases (iterable): The date and recording IDs of every release.
+
+    Returns:
+        list: A list of dictionaries containing song details.
+    """
+    songs = {}
+    for musicbrainz_id, title, isrcs in recordings:
+        songs[musicbrainz_id] = {
+            "song_title": title,
+            "musicbrainz_id": musicbrainz_id,
+            "isrcs": isrcs,
+            "release_date": "Unknown Date",
+        }
 
-            for release in releases["release-list"]:
-                release_date = release.get("date", "Unknown Date")
-                if "medium-list" in release:
-                    for medium in release["medium-list"]:
-                        for track in medium.get("track-list", []):
-                            title = track["recording"]["title"].lower()
-                            if title in songs:
-                                songs[title]["release_date"] = release_date
+    for release_date, recording_ids in releases:
+        if not release_date:
+            continue
+        for recording_id in recording_ids:
+            song = songs.get(recording_id)
+            if song is not None and (
+                song["release_date"] == "Unknown Date"
+                or release_date < song["release_date"]
+            ):
+                song["release_date"] = release_date
+    return list(songs.values())
+
+
+@shared("recordings")
+@METRICS.timed("fetch_seconds")
+def fetch_songs_from_artist(artist_id: str) -> List[Dict]:
+    """
+    Fetch all songs by an artist along with release dates and ISRC codes.
 
-            offset += batch_size
+    The first page of recordings and releases tells the total counts, the
+    remaining pages of both are then fetched concurrently within the
+    MusicBrainz rate budget. Every song gets the earliest date of the
+    releases it appears on.
 
+    Args:
+        artist_id (str): The MusicBrainz ID of the artist.
+
+    Returns:
+        list: A list of dictionaries containing song details.
+    """
+    print(f"Fetching songs for artist ID: {artist_id}")
+    browses = {
+        "recording": (
+            musicbrainzngs.browse_recordings,
+            {"artist": artist_id, "includes": ["isrcs"]},
+        ),
+        "release": (
+            musicbrainzngs.browse_releases,
+            {"artist": artist_id, "includes": ["recordings"]},
+        ),
+    }
+    try:
+        with ThreadPoolExecutor(max_workers=MUSICBRAINZ_BROWSE_WORKERS) as executor:
+            first_pages = browse_first_pages(executor, browses)
+            totals = {
+                name: first_pages[name].get(f"{name}-count", 0) for name in browses
+            }
+            remaining_pages = browse_remaining_pages(executor, browses, totals)
+
+        songs = merge_songs(
+            (
+                (recording["id"], recording["title"], recording.get("isrc-list", []))
+                for page in [first_pages["recording"]] + remaining_pages["recording"]
+                for recording in page["recording-list"]
+            ),
+            (
+                (
+                    release.get("date"),
+                    (
+                        track["recording"]["id"]
+                        for medium in release.get("medium-list", [])
+                        for track in medium.get("track-list", [])
+                    ),
+                )
+                for page in [first_pages["release"]] + remaining_pages["release"]
+                for release in page["release-list"]
+            ),
+        )
         print(f"Fetched {len(songs)} songs for artist ID: {artist_id}")
-        return list(songs.values())
+        return songs
     except musicbrainzngs.ResponseError as e:
         raise Exception(f"Error fetching songs for artist ID {artist_id}: {e}")
 
 
-@st.cache_data(persist="disk")
-def get_songs_with_coauthors(artist_name: str) -> List[Dict]:
+@METRICS.timed("fetch_seconds")
+def find_spotify_artist(artist_name: str) -> Optional[Dict]:
     """
-    Fetch all songs by a given artist along with their co-authors and ISRC codes.
+    Find the Spotify artist with a given name, searching Spotify only if the
+    name, or another spelling of it, was never searched and no single known
+    artist has it.
 
     Args:
         artist_name (str): The name of the artist.
 
     Returns:
-        list: A list of dictionaries containing song titles, duration, co-authors, ISRC codes, and available markets.
+        dict: The Spotify ID and name of the artist, or None if not found.
     """
-    print(f"Fetching songs with coauthors for: {artist_name}")
-    try:
-        artist_results = spotify.search(
-            q=f"artist:{artist_name}", type="artist", limit=1
+    cached = cached_spotify_artist(artist_name)
+    if cached is not None:
+        return cached[0]
+
+    artist = search_spotify_artist(artist_name)
+    cache_spotify_artist(artist_name, artist)
+    return artist
+
+
+@shared("spotify_artist", normalize_name, lambda artist: artist is not None)
+def search_spotify_artist(artist_name: str) -> Optional[Dict]:
+    """
+    Search Spotify for the artist with a given name.
+
+    Args:
+        artist_name (str): The name of the artist.
+
+    Returns:
+        dict: The Spotify ID and name of the first artist found, or None.
+    """
+    print(f"Searching Spotify for: {artist_name}")
+    artist_results = SCHEDULER.call(
+        "spotify", spotify.search, q=f"artist:{artist_name}", type="artist", limit=1
+    )
+    return parse_spotify_artist(artist_results)
+
+
+def cached_spotify_artist(artist_name: str) -> Optional[tuple]:
+    """
+    Find the Spotify artist with a given name in the local store.
+
+    Args:
+        artist_name (str): The name of the artist.
+
+    Returns:
+        tuple: A 1-tuple with the artist (None if the name matches no artist),
+            or None if Spotify has to be searched.
+    """
+    lookup = IDENTITY.lookup("spotify", artist_name)
+    if lookup is not None:
+        (artist_id,) = lookup
+        cached = (
+            STORE.get_spotify_artist(artist_id) if artist_id is not None else None,
+        )
+    else:
+        artist = STORE.find_spotify_artist(artist_name)
+        cached = (artist,) if artist is not None else None
+    METRICS.cache_lookup("spotify_artist", cached is not None)
+    return cached
+
+
+def parse_spotify_artist(artist_results: Dict) -> Optional[Dict]:
+    """
+    Extract the first artist of a Spotify artist search.
+
+    Args:
+        artist_results (dict): The search results.
+
+    Returns:
+        dict: The Spotify ID and name of the artist, or None if nothing was found.
+    """
+    items = artist_results["artists"]["items"]
+    return {"id": items[0]["id"], "name": items[0]["name"]} if items else None
+
+
+def cache_spotify_artist(artist_name: str, artist: Optional[Dict]) -> None:
+    """
+    Save the Spotify artist found for a name.
+
+    Args:
+        artist_name (str): The searched name of the artist.
+        artist (dict): The found artist, or None if the search found nothing.
+    """
+    if artist is None:
+        IDENTITY.save("spotify", [artist_name], None)
+        return
+    STORE.save_spotify_artist(artist)
+    IDENTITY.save("spotify", [artist_name, artist["name"]], artist["id"])
+
+
+def ensure_discography(artist_id: str) -> None:
+    """
+    Make sure the discography of a Spotify artist is in the local store and
+    its coauthors are in the coauthor index, fetching it if needed. An expired
+    discography is refreshed in the background.
+
+    Args:
+        artist_id (str): The Spotify ID of the artist.
+    """
+    indexed = artist_id in COAUTHOR_INDEX
+    METRICS.cache_lookup("coauthor_index", indexed)
+    if indexed:
+        fetched_at = COAUTHOR_INDEX.fetched_at(artist_id)
+    else:
+        fetched_at = STORE.get_fetched_at("discography", artist_id)
+        METRICS.cache_lookup("discography", fetched_at is not None)
+        if fetched_at is None:
+            cache_discography(artist_id, fetch_discography(artist_id))
+            return
+        COAUTHOR_INDEX.set_coauthors(
+            artist_id, STORE.get_top_coauthors(artist_id, top_n=None), fetched_at
         )
-        if not artist_results["artists"]["items"]:
-            return []
+    refresh_if_stale(
+        "discography",
+        artist_id,
+        fetched_at,
+        lambda: cache_discography(
+            artist_id, fetch_discography(artist_id, fetched_after=fetched_at)
+        ),
+    )
+
+
+def cache_discography(artist_id: str, tracks: List[Dict]) -> None:
+    """
+    Save a fetched discography and index its coauthors.
+
+    Args:
+        artist_id (str): The Spotify ID of the artist.
+        tracks (list): The tracks returned by fetch_discography.
+    """
+    STORE.save_discography(artist_id, tracks)
+    COAUTHOR_INDEX.ingest(artist_id, tracks)
+
+
+def load_coauthor_index() -> CoauthorIndex:
+    """
+    Load the coauthors of every stored discography into the coauthor index.
+
+    Returns:
+        CoauthorIndex: The loaded index, e.g. to get the full weighted edge list.
+    """
+    fetch_times = STORE.get_fetch_times("discography")
+    for artist_id, coauthors in STORE.get_all_coauthors().items():
+        COAUTHOR_INDEX.set_coauthors(artist_id, coauthors, fetch_times.get(artist_id))
+    return COAUTHOR_INDEX
+
+
+@METRICS.timed("fetch_seconds")
+def get_songs_with_coauthors(artist_name: str) -> List[Track]:
+    """
+    Get all songs by a given artist along with their co-authors and ISRC codes.
+
+    Args:
+        artist_name (str): The name of the artist.
+
+    Returns:
+        list: The tracks with their titles, duration, co-authors, ISRC codes and
+            available markets, read-only records indexable like dicts.
+    """
+    artist = find_spotify_artist(artist_name)
+    if artist is None:
+        return []
+    return get_songs_with_coauthors_by_id(artist["id"])
+
+
+def get_songs_with_coauthors_by_id(artist_id: str) -> List[Track]:
+    """
+    Get all songs by a Spotify artist along with their co-authors and ISRC codes.
+
+    Args:
+        artist_id (str): The Spotify ID of the artist.
+
+    Returns:
+        list: The tracks in the format returned by get_songs_with_coauthors.
+    """
+    ensure_discography(artist_id)
+    return STORE.get_discography(artist_id)
+
+
+@METRICS.timed("fetch_seconds")
+def get_top_coauthors_of(artist_name: str, top_n: int = 5) -> List[Dict]:
+    """
+    Get the top N most frequent coauthors of an artist from the coauthor index.
+
+    Args:
+        artist_name (str): The name of the artist.
+        top_n (int): Number of top coauthors to return.
+
+    Returns:
+        list: A list of the top N coauthors with their names, IDs and counts.
+    """
+    artist = find_spotify_artist(artist_name)
+    if artist is None:
+        return []
+    return get_top_coauthors_by_id(artist["id"], top_n)
+
+
+@METRICS.timed("fetch_seconds")
+def get_top_coauthors_by_id(artist_id: str, top_n: Optional[int] = 5) -> List[Dict]:
+    """
+    Get the top N most frequent coauthors of a Spotify artist from the coauthor index.
+
+    Args:
+        artist_id (str): The Spotify ID of the artist.
+        top_n (int): Number of top coauthors to return, None for all of them.
 
-        artist_id = artist_results["artists"]["items"][0]["id"]
-        albums = spotify.artist_albums(artist_id, album_type="album,single", limit=50)
-        album_ids = [album["id"] for album in albums["items"]]
+    Returns:
+        list: A list of the top N coauthors with their names, IDs and counts.
+    """
+    ensure_discography(artist_id)
+    return COAUTHOR_INDEX.top(artist_id, top_n)
+
+
+@shared("discography")
+@METRICS.timed("fetch_seconds")
+def fetch_discography(artist_id: str) -> List[Dict]:
+    """
+    Fetch all tracks of a Spotify artist along with all credited artists and ISRC codes.
 
-        track_ids = []
+    Args:
+        artist_id (str): The Spotify ID of the artist.
+
+    Returns:
+        list: A list of dictionaries containing track IDs, titles, duration, credited artists, ISRC codes, and available markets.
+    """
+    print(f"Fetching songs with coauthors for Spotify ID: {artist_id}")
+    try:
+        n_requests = 0
+
+        # Page through the whole discography, not just the first 50 albums
+        album_ids = []
+        albums = SCHEDULER.call(
+            "spotify",
+            spotify.artist_albums,
+            artist_id,
+            album_type="album,single",
+            limit=50,
+        )
+        while albums:
+            n_requests += 1
+            album_ids.extend(album["id"] for album in albums["items"])
+            albums = SCHEDULER.call("spotify", spotify.next, albums)
+        album_ids = list(dict.fromkeys(album_ids))
+
+        # Full album objects already contain the track listings
         track_info = {}
-        for album_id in album_ids:
-            album_tracks = spotify.album_tracks(album_id)
-            for track in album_tracks["items"]:
-                track_ids.append(track["id"])
-                track_info[track["id"]] = {
-                    "song_title": track["name"],
-                    "duration": track["duration_ms"],
-                    "coauthors": [
-                        {"name": artist["name"], "id": artist["id"]}
-                        for artist in track["artists"]
-                        if artist["name"].lower() != artist_name.lower()
-                    ],
-                    "available_markets": track["available_markets"],
-                }
-
-        # Function to split list into batches of a specified size
-        def batch_list(lst, batch_size):
-            for i in range(0, len(lst), batch_size):
-                yield lst[i : i + batch_size]
-
-        songs_with_coauthors = []
-        for batch in batch_list(track_ids, 50):
-            tracks_details = spotify.tracks(batch)
-            for track in tracks_details["tracks"]:
-                track_id = track["id"]
-                isrc_code = track.get("external_ids", {}).get(
-                    "isrc", "No ISRC available"
+        for batch in batch_list(album_ids, SPOTIFY_ALBUMS_BATCH_SIZE):
+            albums_details = SCHEDULER.call("spotify", spotify.albums, batch)
+            n_requests += 1
+            for album in albums_details["albums"]:
+                if album is None:
+                    continue
+                album_tracks = album["tracks"]
+                while album_tracks:
+                    for track in album_tracks["items"]:
+                        track_info[track["id"]] = parse_spotify_track(track, album)
+                    album_tracks = SCHEDULER.call("spotify", spotify.next, album_tracks)
+                    if album_tracks:
+                        n_requests += 1
+
+        # Only look up the ISRC of tracks that came without one
+        missing_isrc = [
+            track_id for track_id, track in track_info.items() if "isrc" not in track
+        ]
+        for batch in batch_list(missing_isrc, SPOTIFY_TRACKS_BATCH_SIZE):
+            tracks_details = SCHEDULER.call("spotify", spotify.tracks, batch)
+            n_requests += 1
+            for track_id, track in zip(batch, tracks_details["tracks"]):
+                track_info[track_id]["isrc"] = (
+                    track.get("external_ids", {}).get("isrc", "No ISRC available")
+                    if track is not None
+                    else "No ISRC available"
                 )
-                track_data = track_info[track_id]
-                track_data["isrc"] = isrc_code
-                songs_with_coauthors.append(track_data)
 
         print(
-            f"Fetched {len(songs_with_coauthors)} songs with coauthors for: {artist_name}"
+            f"Fetched {len(track_info)} songs with coauthors for Spotify ID: {artist_id} "
+            f"in {n_requests} requests"
         )
-        return songs_with_coauthors
+        return list(track_info.values())
     except Exception as e:
-        raise Exception(f"Error fetching songs with coauthors for {artist_name}: {e}")
+        raise Exception(f"Error fetching songs with coauthors for {artist_id}: {e}")
+
+
+def parse_release_year(release_date: Optional[str]) -> Optional[int]:
+    """
+    Get the year of a Spotify release date, e.g. "2012", "2012-10" or "2012-10-22".
+
+    Returns:
+        int: The year, or None if the date is missing or malformed.
+    """
+    if not release_date or not release_date[:4].isdigit():
+        return None
+    return int(release_date[:4])
+
+
+def parse_spotify_track(track: Dict, album: Optional[Dict] = None) -> Dict:
+    """
+    Extract the fields kept from a Spotify track object.
+
+    Args:
+        track (dict): The track object, e.g. from the track listing of an album.
+        album (dict): The album the track was listed in, which holds the
+            release date of simplified track objects.
+
+    Returns:
+        dict: The track ID, title, duration, credited artists, mask of the
+            available markets, release year (None if unknown) and ISRC code
+            if the object has one.
+    """
+    album = album or track.get("album") or {}
+    track_data = {
+        "id": track["id"],
+        "song_title": track["name"],
+        "duration": track["duration_ms"],
+        "artists": [
+            {"name": artist["name"], "id": artist["id"]} for artist in track["artists"]
+        ],
+        "markets": encode_markets(track["available_markets"]),
+        "release_year": parse_release_year(album.get("release_date")),
+    }
+    isrc_code = track.get("external_ids", {}).get("isrc")
+    if isrc_code is not None:
+        track_data["isrc"] = isrc_code
+    return track_data
 
 
 def fetch_coauthor_songs_and_info(coauthors: List[Dict]):
@@ -241,7 +879,7 @@ def fetch_coauthor_songs_and_info(coauthors: List[Dict]):
         print(f"Fetching data for coauthor: {name} ({coauthor_id})")
         try:
             artist_info = get_artist_info(name)
-            coauthor_songs = get_songs_with_coauthors(name)
+            coauthor_songs = get_songs_with_coauthors_by_id(coauthor_id)
             coauthor_data[coauthor_id] = {
                 "artist_info": artist_info,
                 "songs": coauthor_songs,
@@ -275,6 +913,50 @@ def get_unique_coauthors(songs_with_coauthors: List[Dict]) -> List[Dict]:
     return unique_coauthors
 
 
+def convert_saved_songs(data, convert: Callable[[List], List[Dict]]):
+    """
+    Convert the songs of a song list or of coauthor data, i.e. a dictionary
+    mapping coauthor IDs to their artist info and songs.
+    """
+    if isinstance(data, list):
+        return convert(data)
+    return {
+        key: {**value, "songs": convert(value["songs"])} for key, value in data.items()
+    }
+
+
+def with_market_lists(songs: List) -> List[Dict]:
+    """
+    Convert songs into the format of saved files, listing their markets as
+    available_markets like Spotify instead of a mask.
+    """
+    return [
+        {
+            "available_markets" if key == "markets" else key: (
+                decode_markets(value) if key == "markets" else value
+            )
+            for key, value in song.items()
+        }
+        for song in to_dicts(songs)
+    ]
+
+
+def with_market_masks(songs: List[Dict]) -> List[Dict]:
+    """
+    Convert saved songs listing their available_markets into songs with the
+    market masks returned by get_songs_with_coauthors.
+    """
+    return [
+        {
+            "markets" if key == "available_markets" else key: (
+                encode_markets(value) if key == "available_markets" else value
+            )
+            for key, value in song.items()
+        }
+        for song in songs
+    ]
+
+
 def save_to_json(data: dict, filename: str) -> None:
     """
     Save data to a JSON file.
@@ -284,7 +966,7 @@ def save_to_json(data: dict, filename: str) -> None:
         filename (str): The filename for the JSON file.
     """
     with open(os.path.join(SAVE_FOLDER, filename), "w", encoding="utf-8") as f:
-        json.dump(data, f, indent=4, ensure_ascii=False)
+        json.dump(data, f, indent=4, ensure_ascii=False, default=json_default)
 
 
 def load_from_json(filename: str) -> dict:
@@ -298,8 +980,43 @@ def load_from_json(filename: str) -> dict:
         dict: The loaded data.
     """
     try:
-        with open(os.path.join(SAVE_FOLDER, filename), "r", encoding="utf-8") as f:
-            return json.load(f)
+        path = os.path.join(SAVE_FOLDER, filename)
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        METRICS.inc("bytes_deserialized_total", os.path.getsize(path), source="json")
+        return data
+    except FileNotFoundError:
+        print(f"{filename} not found. Skipping load.")
+        return {}
+
+
+def save_to_parquet(data, filename: str) -> None:
+    """
+    Save a list of songs or coauthor data to a Parquet file.
+
+    Args:
+        data (list or dict): The data to save.
+        filename (str): The filename for the Parquet file.
+    """
+    write_parquet(data, os.path.join(SAVE_FOLDER, filename))
+
+
+def load_from_parquet(filename: str, columns: Optional[List[str]] = None):
+    """
+    Load a list of songs or coauthor data from a Parquet file.
+
+    Args:
+        filename (str): The filename for the Parquet file.
+        columns (list): The song fields to load, None for all of them.
+
+    Returns:
+        list or dict: The loaded data.
+    """
+    try:
+        path = os.path.join(SAVE_FOLDER, filename)
+        data = read_parquet(path, columns)
+        METRICS.inc("bytes_deserialized_total", os.path.getsize(path), source="parquet")
+        return data
     except FileNotFoundError:
         print(f"{filename} not found. Skipping load.")
         return {}
@@ -343,16 +1060,30 @@ def preprocess_isrcs(songs: List[Dict]) -> List[Dict]:
         list: A list of song dictionaries with preprocessed ISRC codes.
     """
     for i in range(len(songs)):
+        # Records are read-only, the preprocessed songs are plain dicts
+        songs[i] = dict(songs[i])
         songs[i]["isrc"] = songs[i]["isrcs"][0] if len(songs[i]["isrcs"]) != 0 else None
         songs[i].pop("isrcs", None)
     return songs
 
 
-def get_artist_data(artist_name: Optional[str] = None, save_info: bool = False):
+def get_artist_data(
+    artist_name: Optional[str] = None, save_info: bool = False, file_format: str = "json"
+):
     """
     Main function to orchestrate the fetching, preprocessing, saving, loading,
     and timing of artist and song data.
+
+    Song lists and coauthor data are saved in the given file format, "json"
+    or "parquet". Artist information is always saved as JSON.
     """
+    if file_format == "parquet":
+        save_data, load_data = save_to_parquet, load_from_parquet
+    elif file_format == "json":
+        save_data, load_data = save_to_json, load_from_json
+    else:
+        raise Exception(f"Unknown file format: {file_format}, use json or parquet")
+
     try:
         # Step 1: Fetch artist information
         print("Fetching artist information...")
@@ -372,9 +1103,9 @@ def get_artist_data(artist_name: Optional[str] = None, save_info: bool = False):
         if artist_name:
             songs = get_songs_from_artist(artist_info["artist_id"])
             if save_info:
-                save_to_json(songs, "songs.json")
+                save_data(songs, f"songs.{file_format}")
         else:
-            songs = load_from_json("songs.json")
+            songs = load_data(f"songs.{file_format}")
         print(f"Total Songs: {len(songs)}")
         print(f"Time taken: {time.time() - start_time:.2f} seconds\n")
 
@@ -384,9 +1115,9 @@ def get_artist_data(artist_name: Optional[str] = None, save_info: bool = False):
         if artist_name:
             songs = preprocess_isrcs(songs)
             if save_info:
-                save_to_json(songs, "songs_preprocessed.json")
+                save_data(songs, f"songs_preprocessed.{file_format}")
         else:
-            songs = load_from_json("songs_preprocessed.json")
+            songs = load_data(f"songs_preprocessed.{file_format}")
         print(
             f"Sample Song After ISRC Preprocessing: {songs[0] if songs else 'No Songs Found'}"
         )
@@ -398,9 +1129,14 @@ def get_artist_data(artist_name: Optional[str] = None, save_info: bool = False):
         if artist_name:
             songs_with_coauthors = get_songs_with_coauthors(artist_name)
             if save_info:
-                save_to_json(songs_with_coauthors, "songs_with_coauthors.json")
+                save_data(
+                    with_market_lists(songs_with_coauthors),
+                    f"songs_with_coauthors.{file_format}",
+                )
         else:
-            songs_with_coauthors = load_from_json("songs_with_coauthors.json")
+            songs_with_coauthors = with_market_masks(
+                load_data(f"songs_with_coauthors.{file_format}")
+            )
         print(f"Total Songs with Co-authors: {len(songs_with_coauthors)}")
         print(f"Time taken: {time.time() - start_time:.2f} seconds\n")
 
@@ -409,7 +1145,7 @@ def get_artist_data(artist_name: Optional[str] = None, save_info: bool = False):
         start_time = time.time()
         top_coauthors = get_top_coauthors(songs_with_coauthors, top_n=5)
         if save_info:
-            save_to_json(top_coauthors, "top_coauthors.json")
+            save_data(top_coauthors, f"top_coauthors.{file_format}")
         print(f"Top 5 Coauthors: {[coauthor['name'] for coauthor in top_coauthors]}")
         print(f"Time taken: {time.time() - start_time:.2f} seconds\n")
 
@@ -419,9 +1155,14 @@ def get_artist_data(artist_name: Optional[str] = None, save_info: bool = False):
         if artist_name:
             coauthor_data = fetch_coauthor_songs_and_info(top_coauthors)
             if save_info:
-                save_to_json(coauthor_data, "coauthor_data.json")
+                save_data(
+                    convert_saved_songs(coauthor_data, with_market_lists),
+                    f"coauthor_data.{file_format}",
+                )
         else:
-            coauthor_data = load_from_json("coauthor_data.json")
+            coauthor_data = convert_saved_songs(
+                load_data(f"coauthor_data.{file_format}"), with_market_masks
+            )
         print(f"Fetched data for {len(coauthor_data)} coauthors.")
         print(f"Time taken: {time.time() - start_time:.2f} seconds\n")
 
@@ -0,0 +1,139 @@
+from collections import OrderedDict
+from typing import Iterable, Optional, Tuple
+import threading
+import time
+import unicodedata
+
+
+# Unicode dashes and quotes that artist names are spelled with interchangeably
+PUNCTUATION_VARIANTS = str.maketrans(
+    {
+        "‐": "-",  # hyphen
+        "‑": "-",  # non-breaking hyphen
+        "‒": "-",  # figure dash
+        "–": "-",  # en dash
+        "—": "-",  # em dash
+        "―": "-",  # horizontal bar
+        "−": "-",  # minus sign
+        "‘": "'",  # left single quotation mark
+        "’": "'",  # right single quotation mark
+        "ʼ": "'",  # modifier letter apostrophe
+        "“": '"',  # left double quotation mark
+        "”": '"',  # right double quotation mark
+    }
+)
+
+# Number of resolved names kept in memory
+IDENTITY_CACHE_SIZE = 10000
+# Seconds a name matching no artist stays unresolved before it is searched again,
+# e.g. for an artist new to the upstream
+NEGATIVE_LOOKUP_TTL = 24 * 60 * 60
+
+
+def normalize_name(name: str) -> str:
+    """
+    Normalize an artist name for lookups, ignoring case, whitespace, unicode
+    compatibility forms and dash or quote variants, e.g. "JAY‐Z" and "jay-z".
+
+    Args:
+        name (str): The artist name.
+
+    Returns:
+        str: The normalized name.
+    """
+    name = unicodedata.normalize("NFKC", name).translate(PUNCTUATION_VARIANTS)
+    return " ".join(name.casefold().split())
+
+
+class IdentityCache:
+    """
+    Resolution of artist names to upstream artist IDs.
+
+    Resolved names are kept in a bounded LRU in front of the name lookups of
+    the local store, so a name is searched upstream at most once across
+    processes and hits the store at most once per process while it stays
+    in memory. Names are normalized first, so every spelling of a name
+    shares one entry. Names matching no artist expire after
+    NEGATIVE_LOOKUP_TTL, in memory and in the store.
+
+    Args:
+        store (GraphStore): The local store persisting the name lookups.
+        maxsize (int): Maximum number of names kept in memory.
+    """
+
+    def __init__(self, store, maxsize: int = IDENTITY_CACHE_SIZE):
+        self.store = store
+        self.maxsize = maxsize
+        self.hits = {"memory": 0, "store": 0}
+        self.misses = 0
+        # Artist ID and expiry time of every name, None for names that resolved
+        self._entries: "OrderedDict[Tuple[str, str], tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _remember(
+        self, key: Tuple[str, str], artist_id: Optional[str], looked_up_at: float
+    ) -> None:
+        expires_at = looked_up_at + NEGATIVE_LOOKUP_TTL if artist_id is None else None
+        with self._lock:
+            self._entries[key] = (artist_id, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def lookup(self, source: str, name: str) -> Optional[tuple]:
+        """
+        Get the artist ID a name resolves to on an upstream.
+
+        Args:
+            source (str): The searched upstream, "musicbrainz" or "spotify".
+            name (str): The artist name.
+
+        Returns:
+            tuple: A 1-tuple with the artist ID (None if the name is known to match
+                no artist), or None if the name was never resolved.
+        """
+        key = (source, normalize_name(name))
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and (entry[1] is None or entry[1] > time.time()):
+                self._entries.move_to_end(key)
+                self.hits["memory"] += 1
+                return (entry[0],)
+
+        lookup = self.store.lookup_name(source, name)
+        if lookup is None:
+            with self._lock:
+                self.misses += 1
+            return None
+        with self._lock:
+            self.hits["store"] += 1
+        artist_id, looked_up_at = lookup
+        self._remember(key, artist_id, looked_up_at)
+        return (artist_id,)
+
+    def save(
+        self,
+        source: str,
+        names: Iterable[str],
+        artist_id: Optional[str],
+        replace: bool = True,
+    ) -> None:
+        """
+        Record that names resolve to an artist, e.g. a searched name along
+        with the canonical name and aliases of the found artist.
+
+        Args:
+            source (str): The searched upstream, "musicbrainz" or "spotify".
+            names (iterable): The names of the artist.
+            artist_id (str): The artist ID, or None if the names match no artist.
+            replace (bool): Whether to replace names already resolved, False
+                for aliases that other artists may share.
+        """
+        for name in dict.fromkeys(normalize_name(name) for name in names if name):
+            if not replace and self.lookup(source, name) is not None:
+                continue
+            self.store.save_name_lookup(source, name, artist_id)
+            self._remember((source, name), artist_id, time.time())
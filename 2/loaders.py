@@ -0,0 +1,287 @@
+from typing import List, Optional, Tuple
+import argparse
+import os
+import re
+import shutil
+import time
+import numpy as np
+import pandas as pd
+from analytics import CSRGraph, print_summary, summarize
+
+
+# Number of lines parsed at once, bounding the memory of the text being parsed
+LOAD_CHUNK_SIZE = 1_000_000
+
+# Suffixes of Pajek network files, other files are read as edge lists
+PAJEK_SUFFIXES = (".net", ".paj")
+
+# Suffix of the binary cache directory written next to a network file. Bump
+# CACHE_VERSION when the cached arrays change so stale caches are rebuilt
+CACHE_SUFFIX = ".csr"
+CACHE_VERSION = 1
+
+# A Pajek vertex line, e.g. `12 "Parma V" 0.0 0.0 ellipse` or `3 Colunga`
+PAJEK_VERTEX = re.compile(r'\s*(\d+)\s+(?:"([^"]*)"|(\S+))')
+
+
+def edges_to_graph(
+    sources: np.ndarray,
+    targets: np.ndarray,
+    weights: np.ndarray,
+    n_nodes: Optional[int] = None,
+    labels: Optional[np.ndarray] = None,
+) -> CSRGraph:
+    """
+    Build a weighted graph from parsed edges, or from pairs of node labels
+    if no node count is given.
+
+    Args:
+        sources (np.ndarray): The first node of every edge.
+        targets (np.ndarray): The second node of every edge.
+        weights (np.ndarray): The weight of every edge.
+        n_nodes (int): The number of nodes if sources and targets are node
+            indices, None if they are node labels.
+        labels (np.ndarray): The label of every node if sources and targets
+            are node indices.
+
+    Returns:
+        CSRGraph: The graph, parallel edges merged into one edge weighing
+            their total weight.
+    """
+    if n_nodes is None:
+        # Interleave the endpoints to number the nodes in order of first appearance
+        codes, labels = pd.factorize(np.column_stack([sources, targets]).ravel())
+        sources, targets = codes[0::2], codes[1::2]
+        n_nodes = len(labels)
+    return CSRGraph.from_edges(sources, targets, n_nodes, labels, weights)
+
+
+def read_edge_list(path: str) -> CSRGraph:
+    """
+    Read a whitespace-separated edge list, e.g. `1 2` or `a b 0.5` lines.
+    A third column holds edge weights, lines starting with # are ignored.
+
+    Args:
+        path (str): The path of the edge list.
+
+    Returns:
+        CSRGraph: The graph, its nodes labeled with the node names of the
+            file in order of first appearance.
+    """
+    columns: Tuple[List[np.ndarray], List[np.ndarray], List[np.ndarray]] = ([], [], [])
+    chunks = pd.read_csv(
+        path,
+        sep=r"\s+",
+        header=None,
+        comment="#",
+        chunksize=LOAD_CHUNK_SIZE,
+    )
+    for chunk in chunks:
+        if chunk.shape[1] < 2:
+            raise Exception(f"{path} is not an edge list: a line has a single node")
+        columns[0].append(chunk[0].to_numpy())
+        columns[1].append(chunk[1].to_numpy())
+        columns[2].append(
+            chunk[2].to_numpy(dtype=float)
+            if chunk.shape[1] > 2
+            else np.ones(len(chunk))
+        )
+    if not columns[0]:
+        return edges_to_graph(np.empty(0), np.empty(0), np.empty(0))
+
+    sources, targets = np.concatenate(columns[0]), np.concatenate(columns[1])
+    if sources.dtype.kind not in "iu" or targets.dtype.kind not in "iu":
+        # A chunk of numbers followed by a chunk of names: every node is a name
+        sources, targets = sources.astype(str), targets.astype(str)
+    return edges_to_graph(sources, targets, np.concatenate(columns[2]))
+
+
+def parse_pajek_edges(lines: List[str], path: str) -> np.ndarray:
+    """
+    Parse a batch of Pajek edge lines into a (source, target, weight) array,
+    ignoring drawing attributes after the weight.
+    """
+    n_columns = min(len(lines[0].split()), 3)
+    try:
+        edges = np.loadtxt(lines, usecols=range(n_columns), ndmin=2)
+    except ValueError as e:
+        raise Exception(f"Invalid edge line in {path}: {e}")
+    if n_columns < 3:
+        edges = np.column_stack([edges, np.ones(len(edges))])
+    return edges
+
+
+def read_pajek(path: str) -> CSRGraph:
+    """
+    Read a Pajek network, its *vertices, *edges, *arcs, *edgeslist and
+    *arcslist sections. Arcs are read as undirected edges.
+
+    Args:
+        path (str): The path of the Pajek file.
+
+    Returns:
+        CSRGraph: The graph, its nodes labeled with the vertex labels.
+    """
+    labels: List[str] = []
+    batches: List[np.ndarray] = []
+    lines: List[str] = []
+    section = None
+    with open(path, encoding="utf-8", errors="replace") as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith("%"):
+                continue
+            if line.startswith("*"):
+                if lines:
+                    batches.append(parse_pajek_edges(lines, path))
+                    lines = []
+                keyword, *arguments = line.split()
+                section = keyword.lower()
+                if section == "*vertices":
+                    labels = [str(vertex) for vertex in range(1, int(arguments[0]) + 1)]
+                continue
+
+            if section == "*vertices":
+                match = PAJEK_VERTEX.match(line)
+                if match is not None:
+                    vertex, quoted, unquoted = match.groups()
+                    labels[int(vertex) - 1] = quoted if quoted is not None else unquoted
+            elif section in ("*edges", "*arcs"):
+                lines.append(line)
+                if len(lines) >= LOAD_CHUNK_SIZE:
+                    batches.append(parse_pajek_edges(lines, path))
+                    lines = []
+            elif section in ("*edgeslist", "*arcslist"):
+                vertex, *neighbors = line.split()
+                lines.extend(f"{vertex} {neighbor}" for neighbor in neighbors)
+    if lines:
+        batches.append(parse_pajek_edges(lines, path))
+
+    edges = np.concatenate(batches) if batches else np.empty((0, 3))
+    # Pajek vertices are numbered from 1
+    sources = edges[:, 0].astype(np.int64) - 1
+    targets = edges[:, 1].astype(np.int64) - 1
+    n_nodes = max(len(labels), int(edges[:, :2].max(initial=0)))
+    labels += [str(vertex) for vertex in range(len(labels) + 1, n_nodes + 1)]
+    return edges_to_graph(sources, targets, edges[:, 2], n_nodes, np.array(labels))
+
+
+def source_signature(path: str) -> np.ndarray:
+    stat = os.stat(path)
+    return np.array([CACHE_VERSION, stat.st_size, stat.st_mtime_ns], dtype=np.int64)
+
+
+def save_cache(graph: CSRGraph, cache_path: str, signature: np.ndarray) -> None:
+    """
+    Save a graph as a directory of .npy files, written to a temporary
+    directory first so an interrupted save never leaves a partial cache.
+
+    Args:
+        graph (CSRGraph): The graph.
+        cache_path (str): The path of the cache directory.
+        signature (np.ndarray): The signature of the source file.
+    """
+    tmp_path = f"{cache_path}.tmp"
+    shutil.rmtree(tmp_path, ignore_errors=True)
+    os.makedirs(tmp_path)
+    labels = np.asarray(graph.labels)
+    if labels.dtype == object:
+        labels = labels.astype(str)
+    arrays = {
+        "indptr": graph.indptr,
+        "indices": graph.indices,
+        "weights": graph.weights,
+        "labels": labels,
+        "signature": signature,
+    }
+    for name, array in arrays.items():
+        if array is not None:
+            np.save(os.path.join(tmp_path, f"{name}.npy"), array, allow_pickle=False)
+    shutil.rmtree(cache_path, ignore_errors=True)
+    os.replace(tmp_path, cache_path)
+
+
+def load_cache(cache_path: str, signature: np.ndarray) -> Optional[CSRGraph]:
+    """
+    Load a cached graph, memory-mapping its arrays.
+
+    Args:
+        cache_path (str): The path of the cache directory.
+        signature (np.ndarray): The signature of the source file.
+
+    Returns:
+        CSRGraph: The graph, or None if there is no cache or the source file
+            changed since it was saved.
+    """
+    signature_path = os.path.join(cache_path, "signature.npy")
+    if not os.path.exists(signature_path):
+        return None
+    if not np.array_equal(np.load(signature_path), signature):
+        return None
+
+    def load(name: str) -> Optional[np.ndarray]:
+        array_path = os.path.join(cache_path, f"{name}.npy")
+        if not os.path.exists(array_path):
+            return None
+        return np.load(array_path, mmap_mode="r", allow_pickle=False)
+
+    return CSRGraph(load("indptr"), load("indices"), load("labels"), load("weights"))
+
+
+def load_network(path: str, cache: bool = True) -> CSRGraph:
+    """
+    Load a network file into a weighted graph, e.g. 1/data2.txt or 1/data.net.
+    Self-loops are dropped and parallel edges merged into one edge weighing
+    their count, or their total weight if the file has weights.
+
+    The parsed arrays are cached next to the file and memory-mapped by later
+    loads until the file changes.
+
+    Args:
+        path (str): The path of a Pajek file or whitespace-separated edge list.
+        cache (bool): Whether to use and update the binary cache.
+
+    Returns:
+        CSRGraph: The graph.
+    """
+    cache_path = path + CACHE_SUFFIX
+    signature = source_signature(path)
+    if cache:
+        graph = load_cache(cache_path, signature)
+        if graph is not None:
+            return graph
+
+    if path.lower().endswith(PAJEK_SUFFIXES):
+        graph = read_pajek(path)
+    else:
+        graph = read_edge_list(path)
+    if cache:
+        save_cache(graph, cache_path, signature)
+    return graph
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Load a Pajek file or edge list and analyze the network."
+    )
+    parser.add_argument("path", help="Path of the network file.")
+    parser.add_argument(
+        "--no-cache", action="store_true", help="Ignore and keep no binary cache."
+    )
+    parser.add_argument(
+        "--sources",
+        type=int,
+        default=100,
+        help="Number of BFS sources of the path length estimate.",
+    )
+    parser.add_argument("--seed", type=int, help="Seed of the source sampling.")
+    args = parser.parse_args()
+
+    start_time = time.perf_counter()
+    graph = load_network(args.path, cache=not args.no_cache)
+    print(f"Loaded the graph in {time.perf_counter() - start_time:.3f} seconds")
+    print_summary(summarize(graph, args.sources, args.seed))
+
+
+if __name__ == "__main__":
+    main()
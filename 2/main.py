@@ -1,23 +1,149 @@
-from pyvis import network as net
-from dateutil import parser as dateparser
-from datetime import datetime
+from typing import Optional
+import os
 import traceback
 import streamlit as st
 import streamlit.components.v1 as components
 import networkx as nx
-from collections import deque
 from get_data import (
     get_artist_info,
     get_songs_with_coauthors,
-    get_top_coauthors,
-    filter_coauthor,
+    get_top_coauthors_of,
 )
+from expansion import iter_collaboration_graph
+from communities import IncrementalCommunities
+from paths import find_collaboration_paths
+from temporal import TemporalIndex
+from render import GRAPH_HEIGHT, graph_to_html
+from filters import (
+    FILTER_BORN_AFTER,
+    FILTER_CAREER_ENDED,
+    FILTER_COUNTRY,
+    FILTER_GENRE,
+    FILTER_MARKET,
+    compile_filters,
+)
+from markets import MARKETS
+from metrics import METRICS
+from api import ApiClient
+
 
+# Queries go through the graph API if it runs, e.g. `python api.py`, so reruns of
+# the script cost a few memoized requests instead of a rebuild of the graph
+API_URL = os.environ.get("COLLABORATION_API_URL")
+API = ApiClient(API_URL) if API_URL else None
+if API is not None:
+    get_artist_info = API.get_artist_info
+    get_songs_with_coauthors = API.get_songs_with_coauthors
+    get_top_coauthors_of = API.get_top_coauthors_of
+    find_collaboration_paths = API.find_collaboration_paths
 
 st.set_page_config(page_title="Artist Collaboration Explorer", layout="wide")
 st.title("🎵 Artist Collaboration Explorer")
 
 
+def render_graph(
+    G: nx.Graph, levels: dict, placeholder, communities: Optional[dict] = None
+) -> None:
+    """
+    Render the graph as an interactive network, replacing the content of a placeholder.
+
+    Args:
+        G (nx.Graph): The collaboration graph.
+        levels (dict): The BFS level of every artist.
+        placeholder: The Streamlit placeholder the graph is rendered in.
+        communities (dict): The community of every artist, to collapse the
+            communities of large graphs. None to show every artist.
+    """
+    with placeholder.container():
+        components.html(
+            graph_to_html(G, levels, communities=communities), height=GRAPH_HEIGHT
+        )
+
+
+def render_paths(result: dict) -> None:
+    """
+    Show the shortest collaboration chain between two artists and its alternatives.
+
+    Args:
+        result (dict): The chains returned by find_collaboration_paths.
+    """
+    paths = result["paths"]
+    if not paths:
+        if result["exhausted"]:
+            st.warning(
+                f"No collaboration chain found after expanding {result['expanded']} artists."
+            )
+        else:
+            st.warning("No collaboration chain found between these artists.")
+        return
+
+    st.success(
+        f"{result['length']} degrees of separation, found in {result['seconds']:.2f} "
+        f"seconds expanding {result['expanded']} artists."
+    )
+    st.write(" → ".join(f"**{artist['name']}**" for artist in paths[0]))
+    if len(paths) > 1:
+        st.subheader("Alternative chains")
+        for path in paths[1:]:
+            st.write(" → ".join(artist["name"] for artist in path))
+
+
+def render_metrics_panel() -> None:
+    """
+    Show the metrics collected by the process since it started, or since
+    they were last reset, in the sidebar.
+    """
+    metrics = METRICS.to_dict()
+    with st.sidebar:
+        st.header("Debug metrics")
+        st.caption("Shared by all sessions of the app process.")
+
+        st.subheader("Cache hit ratios")
+        st.table(
+            [
+                {"cache": cache, "hit ratio": f"{ratio:.0%}"}
+                for cache, ratio in metrics["cache_hit_ratios"].items()
+            ]
+        )
+
+        st.subheader("Latencies")
+        st.dataframe(
+            [
+                {
+                    "metric": latency["name"],
+                    "labels": ", ".join(latency["labels"].values()),
+                    "count": latency["count"],
+                    "p50 ms": round(latency["p50"] * 1000, 1),
+                    "p95 ms": round(latency["p95"] * 1000, 1),
+                    "total s": round(latency["sum"], 3),
+                }
+                for latency in metrics["latencies"]
+            ]
+        )
+
+        st.subheader("Counters")
+        st.dataframe(
+            [
+                {
+                    "metric": counter["name"],
+                    "labels": ", ".join(counter["labels"].values()),
+                    "value": counter["value"],
+                }
+                for counter in metrics["counters"]
+            ]
+        )
+
+        st.download_button(
+            "Download JSON", METRICS.to_json(), "metrics.json", "application/json"
+        )
+        st.download_button(
+            "Download Prometheus", METRICS.to_prometheus(), "metrics.prom", "text/plain"
+        )
+        if st.button("Reset metrics"):
+            METRICS.reset()
+            st.rerun()
+
+
 artist_name = st.text_input(
     "Enter Artist Name:",
     value="Kendrick Lamar",
@@ -78,7 +204,7 @@ if artist_name:
         st.header("🤝 Top Coauthors")
 
         n_coauthors = st.number_input("No. top authors", min_value=0, value=5)
-        top_coauthors = get_top_coauthors(songs_with_coauthors, top_n=n_coauthors)
+        top_coauthors = get_top_coauthors_of(artist_name, top_n=n_coauthors)
 
         if top_coauthors:
             st.write(f"Here are the top {n_coauthors} coauthors:")
@@ -106,158 +232,161 @@ if artist_name:
 
         # Predefine filters here
         filters = [
-            (
-                "Genre",
-                tag_names,
-                lambda coauthor_info, v: v
-                in [tag["name"] for tag in coauthor_info["tags"]],
-                "eg. rap",
-            ),
-            (
-                "Country",
-                "text_input",
-                lambda coauthor_info, v: (
-                    v.lower().strip() == coauthor_info["origin_country"].lower().strip()
-                    if coauthor_info.get("origin_country", None) is not None
-                    and v is not None
-                    else False
-                ),
-                "eg. United States",
-            ),
-            (
-                "Artist born after / Band created after",
-                "text_input",
-                lambda coauthor_info, v: (
-                    dateparser.parse(coauthor_info["life_span"]["begin"])
-                    > datetime(int(v), 12, 31, 23, 59, 59)
-                    if v is not None
-                    and v.strip().isnumeric()
-                    and coauthor_info.get("life_span", None) not in [None, {}]
-                    and coauthor_info["life_span"].get("begin", None) is not None
-                    else False
-                ),
-                "eg. 1990",
-            ),
-            (
-                "Career ended",
-                ["true", "false"],
-                lambda coauthor_info, v: (
-                    v.lower().strip()
-                    == coauthor_info["life_span"]["ended"].lower().strip()
-                    if coauthor_info.get("life_span", None) not in [None, {}]
-                    and coauthor_info["life_span"].get("ended", None) is not None
-                    and v is not None
-                    else False
-                ),
-                "eg. true/false",
-            ),
+            (FILTER_GENRE, tag_names, "eg. rap"),
+            (FILTER_COUNTRY, "text_input", "eg. United States"),
+            (FILTER_BORN_AFTER, "text_input", "eg. 1990"),
+            (FILTER_CAREER_ENDED, ["true", "false"], "eg. true/false"),
+            (FILTER_MARKET, list(MARKETS), "eg. PL"),
         ]
         filters_st = {}
 
-        for filter_title, filter_values, filter_func, filter_placeholder in filters:
+        for filter_title, filter_values, filter_placeholder in filters:
             if isinstance(filter_values, list):
-                filters_st[filter_title] = (
-                    st.selectbox(
-                        f"Filter by {filter_title}",
-                        [None] + filter_values,
-                        placeholder=filter_placeholder,
-                    ),
-                    filter_func,
+                filters_st[filter_title] = st.selectbox(
+                    f"Filter by {filter_title}",
+                    [None] + filter_values,
+                    placeholder=filter_placeholder,
                 )
             elif filter_values == "text_input":
-                filters_st[filter_title] = (
-                    st.text_input(
-                        f"Search by {filter_title}",
-                        placeholder=filter_placeholder,
-                    ),
-                    filter_func,
+                filters_st[filter_title] = st.text_input(
+                    f"Search by {filter_title}",
+                    placeholder=filter_placeholder,
                 )
+        coauthor_filter = compile_filters(filters_st)
 
-        with st.spinner("Generating the graph..."):
-            artist_name = artist_name.lower()
-
-            visited = set([artist_name])
-            levels = {artist_name: 0}
-            queue = deque([(artist_name, 0)])  # (artist, level)
-
-            level_colors = [
-                "#b30000",
-                "#0A369D",
-                "#4472CA",
-                "#92B4F4",
-                "#B1C9EE",
-                "#C0D4EB",
-                "#CFDEE7",
-            ]
-            node_size_multiplayer = 5
-            max_node_size = 40
-
-            G = nx.Graph()
-            G.add_node(
-                artist_name,
-                color=level_colors[0],
-                title=f"{artist_name}\nOrigin: {artist_info.get('origin_country', 'N/A')}\nLife Span: {artist_info.get('life_span', {}).get('begin', 'Unknown')} - {artist_info.get('life_span', {}).get('end', 'Present')}",
+        progressive = st.toggle("Show every level as soon as it is loaded", value=True)
+        collapse = st.toggle(
+            "Collapse communities of large graphs, click a community to expand it",
+            value=True,
+        )
+        # Clicking the button reruns the script, which stops the running build
+        cancelled = st.button("Cancel graph generation", disabled=not progressive)
+        years_placeholder = st.empty()
+        graph_placeholder = st.empty()
+
+        graph_key = (
+            artist_name.lower(),
+            n_levels,
+            n_authors_in_level,
+            tuple(filters_st.values()),
+        )
+        same_graph = st.session_state.get("graph_key") == graph_key
+        if cancelled and same_graph and not st.session_state.get("graph_complete"):
+            # The partial graph is kept until the graph settings change
+            st.session_state["graph_cancelled"] = True
+            st.session_state["temporal_index"] = TemporalIndex(
+                st.session_state["graph"]
             )
+        # Reruns keep the graph of the session, e.g. after moving the year slider,
+        # unless its settings changed or its generation was interrupted
+        reused = same_graph and (
+            st.session_state.get("graph_cancelled")
+            or st.session_state.get("graph_complete")
+        )
+        if reused:
+            G = st.session_state["graph"]
+            levels = st.session_state["levels"]
+            level_stats = st.session_state["level_stats"]
+            communities = st.session_state["communities"]
+            if not st.session_state["graph_complete"]:
+                st.warning(
+                    f"Graph generation cancelled after {len(level_stats)} of "
+                    f"{n_levels} levels."
+                )
+        elif API is not None:
+            with st.spinner("Generating the graph..."):
+                G, levels, level_stats, communities = API.ego_network(
+                    artist_name, n_levels, n_authors_in_level, filters_st
+                )
+        else:
+            st.session_state["graph_complete"] = False
+            st.session_state["graph_cancelled"] = False
+            # Communities are updated with every level, only around the new artists
+            incremental_communities = IncrementalCommunities()
+            with st.spinner("Generating the graph..."):
+                for G, levels, level_stats in iter_collaboration_graph(
+                    artist_name,
+                    artist_info,
+                    n_levels,
+                    n_authors_in_level,
+                    coauthor_filter,
+                ):
+                    st.session_state["graph_key"] = graph_key
+                    st.session_state["graph"] = G
+                    st.session_state["levels"] = levels
+                    st.session_state["level_stats"] = level_stats
+                    with METRICS.timer("stage_seconds", stage="communities"):
+                        communities = incremental_communities.update(G)
+                    st.session_state["communities"] = communities
+                    if progressive:
+                        render_graph(
+                            G,
+                            levels,
+                            graph_placeholder,
+                            communities if collapse else None,
+                        )
+        if not reused:
+            st.session_state["graph_key"] = graph_key
+            st.session_state["graph"] = G
+            st.session_state["levels"] = levels
+            st.session_state["level_stats"] = level_stats
+            st.session_state["communities"] = communities
+            st.session_state["graph_complete"] = True
+            # Windows of years are read from the index, without rebuilding the graph
+            st.session_state["temporal_index"] = TemporalIndex(G)
+        temporal_index = st.session_state["temporal_index"]
 
-            while queue:
-                current_artist, level = queue.popleft()
-                current_artist = current_artist.lower()
-                if level < n_levels:
-                    songs_with_coauthors = get_songs_with_coauthors(current_artist)
-                    top_coauthors = get_top_coauthors(
-                        songs_with_coauthors, top_n=n_authors_in_level
-                    )
-                    for coauthor in top_coauthors:
-                        coauthor_name = coauthor["name"]
-                        coauthor_info = get_artist_info(coauthor_name)
-                        if not filter_coauthor(
-                            coauthor_info,
-                            [
-                                (val, func)
-                                for val, func in filters_st.values()
-                                if val is not None
-                            ],
-                        ):
-                            continue
-                        coauthor_name = coauthor_name.lower()
-                        if coauthor_name not in visited:
-                            G.add_node(
-                                coauthor_name,
-                                color=level_colors[level + 1],
-                                size=min(
-                                    node_size_multiplayer * coauthor["count"],
-                                    max_node_size,
-                                ),
-                                title=f"{coauthor_name}\nOrigin: {coauthor_info.get('origin_country', 'N/A')}\nLife Span: {coauthor_info.get('life_span', {}).get('begin', 'Unknown')} - {coauthor_info.get('life_span', {}).get('end', 'Present')}",
-                            )
-                            visited.add(coauthor_name)
-                            levels[coauthor_name] = level + 1
-                            queue.append((coauthor_name, level + 1))
-                        if coauthor_name not in [
-                            artist_name,
-                            current_artist,
-                        ]:
-                            G.add_edge(
-                                current_artist,
-                                coauthor_name,
-                                label=f"{coauthor['count']} co.",
-                                font={"size": 10},
-                            )
-        # Create the graph visualization
-        pos = nx.spring_layout(G, k=0.15, iterations=30)
-        nx.draw_networkx_edges(G, pos, width=2, alpha=0.5, edge_color="gray")
-        nx.draw_networkx_labels(G, pos, font_size=8, font_color="black")
-        _, col, _ = st.columns([1, 2, 1])
-
-        with col:
-            interactive_g = net.Network(height="900px")
-            interactive_g.from_nx(G)
-            interactive_g.write_html("example.html")
-
-        HtmlFile = open("example.html", "r", encoding="utf-8")
-        source_code = HtmlFile.read()
-        components.html(source_code, height=900)
+        with st.expander("Fetch latency per level"):
+            st.table(level_stats)
+
+        window_graph = G
+        first_year, last_year = temporal_index.first_year, temporal_index.last_year
+        if first_year is not None and first_year < last_year:
+            with years_placeholder:
+                window = st.slider(
+                    "Years of collaboration",
+                    min_value=first_year,
+                    max_value=last_year,
+                    value=(first_year, last_year),
+                    key=f"years_{first_year}_{last_year}",
+                )
+            window_graph = temporal_index.window_graph(
+                G, *window, keep=[node for node, level in levels.items() if level == 0]
+            )
+
+        if reused or not progressive or API is not None or window_graph is not G:
+            render_graph(
+                window_graph,
+                levels,
+                graph_placeholder,
+                communities if collapse else None,
+            )
+
+        # Shortest collaboration chain between two artists
+        st.header("🔗 Degrees of Separation")
+
+        col1, col2 = st.columns(2)
+        with col1:
+            source_name = st.text_input("From artist:", value=artist_name)
+        with col2:
+            target_name = st.text_input("To artist:", placeholder="e.g., Drake")
+
+        path_key = (source_name.lower(), target_name.lower())
+        if st.button(
+            "Find the shortest collaboration chain",
+            disabled=not (source_name and target_name),
+        ):
+            with st.spinner("Searching for collaboration chains..."):
+                st.session_state["path_result"] = find_collaboration_paths(
+                    source_name, target_name
+                )
+                st.session_state["path_key"] = path_key
+        if st.session_state.get("path_key") == path_key:
+            render_paths(st.session_state["path_result"])
 
     except Exception as e:
         print(traceback.format_exc())
         st.error(f"An error occurred: {e}")
+
+if st.sidebar.checkbox("Show debug metrics"):
+    render_metrics_panel()
@@ -0,0 +1,95 @@
+from typing import Iterable, List
+import numpy as np
+
+
+# Every market a Spotify track can be available in. The bit of a market in a
+# mask is its position in the table, so new markets are only ever appended
+MARKETS = (
+    "AD", "AE", "AG", "AL", "AM", "AO", "AR", "AT", "AU", "AZ", "BA", "BB", "BD",
+    "BE", "BF", "BG", "BH", "BI", "BJ", "BN", "BO", "BR", "BS", "BT", "BW", "BY",
+    "BZ", "CA", "CD", "CG", "CH", "CI", "CL", "CM", "CO", "CR", "CV", "CW", "CY",
+    "CZ", "DE", "DJ", "DK", "DM", "DO", "DZ", "EC", "EE", "EG", "ES", "ET", "FI",
+    "FJ", "FM", "FR", "GA", "GB", "GD", "GE", "GH", "GM", "GN", "GQ", "GR", "GT",
+    "GW", "GY", "HK", "HN", "HR", "HT", "HU", "ID", "IE", "IL", "IN", "IQ", "IS",
+    "IT", "JM", "JO", "JP", "KE", "KG", "KH", "KI", "KM", "KN", "KR", "KW", "KZ",
+    "LA", "LB", "LC", "LI", "LK", "LR", "LS", "LT", "LU", "LV", "LY", "MA", "MC",
+    "MD", "ME", "MG", "MH", "MK", "ML", "MN", "MO", "MR", "MT", "MU", "MV", "MW",
+    "MX", "MY", "MZ", "NA", "NE", "NG", "NI", "NL", "NO", "NP", "NR", "NZ", "OM",
+    "PA", "PE", "PG", "PH", "PK", "PL", "PR", "PS", "PT", "PW", "PY", "QA", "RO",
+    "RS", "RW", "SA", "SB", "SC", "SE", "SG", "SI", "SK", "SL", "SM", "SN", "SR",
+    "ST", "SV", "SZ", "TD", "TG", "TH", "TJ", "TL", "TN", "TO", "TR", "TT", "TV",
+    "TW", "TZ", "UA", "UG", "US", "UY", "UZ", "VC", "VE", "VN", "VU", "WS", "XK",
+    "ZA", "ZM", "ZW",
+)  # fmt: skip
+MARKET_BITS = {market: bit for bit, market in enumerate(MARKETS)}
+
+# Bytes of a mask, leaving room for markets appended to the table
+MASK_BYTES = 32
+# Mask of a track available nowhere, e.g. a track taken down
+EMPTY_MASK = "00" * MASK_BYTES
+
+
+def encode_markets(markets: Iterable[str]) -> str:
+    """
+    Encode a list of markets as a fixed-width bitmask.
+
+    Args:
+        markets (iterable): The ISO 3166-1 alpha-2 codes of the markets, e.g.
+            the available_markets of a Spotify track. Codes missing from
+            MARKETS are dropped.
+
+    Returns:
+        str: The mask as MASK_BYTES little-endian bytes in hex, e.g. for JSON.
+    """
+    mask = 0
+    for market in markets:
+        bit = MARKET_BITS.get(market)
+        if bit is not None:
+            mask |= 1 << bit
+    return mask.to_bytes(MASK_BYTES, "little").hex()
+
+
+def decode_markets(mask: str) -> List[str]:
+    """
+    Decode a bitmask into the list of its markets, in the order of MARKETS.
+    """
+    value = int.from_bytes(bytes.fromhex(mask), "little")
+    return [market for bit, market in enumerate(MARKETS) if value >> bit & 1]
+
+
+def union_masks(masks: Iterable[str]) -> str:
+    """
+    Get the mask of the markets any of the masks is available in, e.g. the
+    markets a collaboration of several songs can be listened to in.
+    """
+    value = 0
+    for mask in masks:
+        value |= int.from_bytes(bytes.fromhex(mask), "little")
+    return value.to_bytes(MASK_BYTES, "little").hex()
+
+
+def masks_to_array(masks: List[str]) -> np.ndarray:
+    """
+    Stack masks into a (masks, MASK_BYTES) array of bytes for vectorized tests.
+    """
+    return np.frombuffer(bytes.fromhex("".join(masks)), dtype=np.uint8).reshape(
+        len(masks), MASK_BYTES
+    )
+
+
+def available_in(masks: List[str], market: str) -> np.ndarray:
+    """
+    Test a whole batch of masks for one market at once.
+
+    Args:
+        masks (list): The masks, e.g. of every collaboration of a BFS frontier.
+        market (str): The ISO 3166-1 alpha-2 code of the market.
+
+    Returns:
+        np.ndarray: A boolean mask, True for the masks including the market.
+            All False if the market is not in MARKETS.
+    """
+    bit = MARKET_BITS.get(market.upper().strip())
+    if bit is None or not masks:
+        return np.zeros(len(masks), dtype=bool)
+    return (masks_to_array(masks)[:, bit >> 3] & (1 << (bit & 7))) != 0
@@ -0,0 +1,274 @@
+from collections import deque
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, Iterator, List, Tuple
+import functools
+import json
+import threading
+import time
+import numpy as np
+
+
+# Most recent observations of every latency metric kept to compute quantiles
+RESERVOIR_SIZE = 1024
+QUANTILES = (0.5, 0.95, 0.99)
+
+# Name and label values of a metric
+MetricKey = Tuple[str, Tuple[Tuple[str, str], ...]]
+
+
+def metric_key(name: str, labels: Dict[str, str]) -> MetricKey:
+    return name, tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+
+def format_labels(labels: Iterable[Tuple[str, str]]) -> str:
+    """
+    Format label values the way the Prometheus text format expects them.
+
+    Args:
+        labels (iterable): The (name, value) pairs of the labels.
+
+    Returns:
+        str: The labels in braces, or an empty string if there are none.
+    """
+    escaped = [
+        '{}="{}"'.format(
+            key, value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+        )
+        for key, value in labels
+    ]
+    return "{" + ",".join(escaped) + "}" if escaped else ""
+
+
+class Latency:
+    """
+    Count, sum and most recent observations of a latency metric.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.sum = 0.0
+        self.recent = deque(maxlen=RESERVOIR_SIZE)
+
+    def observe(self, seconds: float) -> None:
+        self.count += 1
+        self.sum += seconds
+        self.recent.append(seconds)
+
+    def quantiles(self) -> Dict[float, float]:
+        if not self.recent:
+            return {quantile: 0.0 for quantile in QUANTILES}
+        values = np.quantile(np.fromiter(self.recent, dtype=float), QUANTILES)
+        return dict(zip(QUANTILES, values.tolist()))
+
+
+class Metrics:
+    """
+    Process-wide registry of counters and latencies.
+
+    Counters and latencies are identified by a name and label values.
+    Collectors registered with add_collector report counters kept elsewhere,
+    e.g. the request counts of the scheduler, at export time.
+
+    Args:
+        prefix (str): The prefix of every exported metric name.
+    """
+
+    def __init__(self, prefix: str = "collaboration_explorer"):
+        self.prefix = prefix
+        self._counters: Dict[MetricKey, float] = {}
+        self._latencies: Dict[MetricKey, Latency] = {}
+        self._collectors: List[Callable[[], Iterable[Tuple[str, Dict, float]]]] = []
+        self._lock = threading.Lock()
+
+    def inc(self, name: str, value: float = 1.0, **labels) -> None:
+        """
+        Increase a counter.
+
+        Args:
+            name (str): The name of the counter.
+            value (float): The increment.
+            **labels: The label values of the counter.
+        """
+        key = metric_key(name, labels)
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0.0) + value
+
+    def observe(self, name: str, seconds: float, **labels) -> None:
+        """
+        Record a latency.
+
+        Args:
+            name (str): The name of the latency metric.
+            seconds (float): The observed latency in seconds.
+            **labels: The label values of the metric.
+        """
+        key = metric_key(name, labels)
+        with self._lock:
+            self._latencies.setdefault(key, Latency()).observe(seconds)
+
+    def cache_lookup(self, cache: str, hit: bool) -> None:
+        self.inc("cache_lookups_total", cache=cache, result="hit" if hit else "miss")
+
+    @contextmanager
+    def timer(self, name: str, **labels) -> Iterator[None]:
+        """
+        Record the latency of a block of code, even if it raises.
+        """
+        start_time = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start_time, **labels)
+
+    def timed(self, name: str, **labels) -> Callable:
+        """
+        Decorate a function to record the latency of every call, labeled
+        with the name of the function.
+
+        Args:
+            name (str): The name of the latency metric.
+            **labels: Additional label values of the metric.
+
+        Returns:
+            callable: The decorator.
+        """
+
+        def decorator(func: Callable) -> Callable:
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                with self.timer(name, function=func.__name__, **labels):
+                    return func(*args, **kwargs)
+
+            return wrapper
+
+        return decorator
+
+    def add_collector(
+        self, collector: Callable[[], Iterable[Tuple[str, Dict, float]]]
+    ) -> None:
+        """
+        Register a function reporting counters at export time.
+
+        Args:
+            collector (callable): A function returning (name, labels, value) triples.
+        """
+        with self._lock:
+            self._collectors.append(collector)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._counters.clear()
+            self._latencies.clear()
+
+    def _collect(self) -> Tuple[Dict[MetricKey, float], Dict[MetricKey, Dict]]:
+        with self._lock:
+            counters = dict(self._counters)
+            collectors = list(self._collectors)
+            latencies = {
+                key: {
+                    "count": latency.count,
+                    "sum": latency.sum,
+                    "quantiles": latency.quantiles(),
+                }
+                for key, latency in self._latencies.items()
+            }
+        for collector in collectors:
+            for name, labels, value in collector():
+                key = metric_key(name, labels)
+                counters[key] = counters.get(key, 0.0) + value
+        return counters, latencies
+
+    def cache_hit_ratios(self) -> Dict[str, float]:
+        """
+        Compute the share of lookups of every cache that were hits.
+
+        Returns:
+            dict: The hit ratio of every cache, by cache name.
+        """
+        counters, _ = self._collect()
+        lookups = {}
+        for (name, labels), value in counters.items():
+            if name != "cache_lookups_total":
+                continue
+            labels = dict(labels)
+            hits, total = lookups.get(labels["cache"], (0.0, 0.0))
+            lookups[labels["cache"]] = (
+                hits + (value if labels["result"] != "miss" else 0.0),
+                total + value,
+            )
+        return {
+            cache: hits / total if total else 0.0
+            for cache, (hits, total) in sorted(lookups.items())
+        }
+
+    def to_dict(self) -> Dict:
+        """
+        Export all metrics as plain data.
+
+        Returns:
+            dict: The counters, the count, sum and quantiles of every latency
+                metric in seconds, and the cache hit ratios.
+        """
+        counters, latencies = self._collect()
+        return {
+            "counters": [
+                {"name": name, "labels": dict(labels), "value": value}
+                for (name, labels), value in sorted(counters.items())
+            ],
+            "latencies": [
+                {
+                    "name": name,
+                    "labels": dict(labels),
+                    "count": latency["count"],
+                    "sum": latency["sum"],
+                    **{
+                        f"p{round(quantile * 100)}": value
+                        for quantile, value in latency["quantiles"].items()
+                    },
+                }
+                for (name, labels), latency in sorted(latencies.items())
+            ],
+            "cache_hit_ratios": self.cache_hit_ratios(),
+        }
+
+    def to_json(self) -> str:
+        return json.dumps(self.to_dict(), indent=4)
+
+    def to_prometheus(self) -> str:
+        """
+        Export all metrics in the Prometheus text exposition format.
+        Latencies are exported as summaries.
+
+        Returns:
+            str: The metrics page.
+        """
+        counters, latencies = self._collect()
+        lines = []
+        for name in sorted({name for name, _ in counters}):
+            lines.append(f"# TYPE {self.prefix}_{name} counter")
+            for (counter_name, labels), value in sorted(counters.items()):
+                if counter_name == name:
+                    lines.append(
+                        f"{self.prefix}_{name}{format_labels(labels)} {value:g}"
+                    )
+        for name in sorted({name for name, _ in latencies}):
+            lines.append(f"# TYPE {self.prefix}_{name} summary")
+            for (latency_name, labels), latency in sorted(latencies.items()):
+                if latency_name != name:
+                    continue
+                for quantile, value in latency["quantiles"].items():
+                    quantile_labels = labels + (("quantile", f"{quantile:g}"),)
+                    lines.append(
+                        f"{self.prefix}_{name}{format_labels(quantile_labels)} {value:g}"
+                    )
+                lines.append(
+                    f"{self.prefix}_{name}_sum{format_labels(labels)} {latency['sum']:g}"
+                )
+                lines.append(
+                    f"{self.prefix}_{name}_count{format_labels(labels)} {latency['count']}"
+                )
+        return "\n".join(lines) + "\n"
+
+
+# Shared by all Streamlit sessions of the process, like SCHEDULER
+METRICS = Metrics()
@@ -0,0 +1,218 @@
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+from typing import Dict, Iterator, List, Optional
+import time
+from get_data import COAUTHOR_INDEX, find_spotify_artist, get_top_coauthors_by_id
+from expansion import MAX_WORKERS, fetch_all
+
+
+# Longest coauthor chain searched for
+MAX_PATH_LENGTH = 6
+# Upper bound on the artists whose coauthors are fetched by a single search
+MAX_EXPANDED_ARTISTS = 500
+# Number of shortest chains returned, the first one and its alternatives
+MAX_PATHS = 5
+
+
+class SearchSide:
+    """
+    One direction of a bidirectional BFS, keeping every parent of a node
+    that lies on a shortest path from the start.
+
+    Args:
+        start (str): The Spotify ID of the artist the search starts from.
+    """
+
+    def __init__(self, start: str):
+        self.distances = {start: 0}
+        self.parents: Dict[str, List[str]] = {start: []}
+        self.frontier = [start]
+        self.depth = 0
+
+    def expand(self, neighbors: Dict[str, List[str]]) -> List[str]:
+        """
+        Advance the search by one level.
+
+        Args:
+            neighbors (dict): The coauthor IDs of every artist of the frontier.
+
+        Returns:
+            list: The artists reached for the first time.
+        """
+        self.depth += 1
+        next_frontier = []
+        for artist_id in self.frontier:
+            for coauthor_id in neighbors[artist_id]:
+                if coauthor_id not in self.distances:
+                    self.distances[coauthor_id] = self.depth
+                    self.parents[coauthor_id] = []
+                    next_frontier.append(coauthor_id)
+                if self.distances[coauthor_id] == self.depth:
+                    self.parents[coauthor_id].append(artist_id)
+        self.frontier = next_frontier
+        return next_frontier
+
+    def paths_to(self, artist_id: str) -> Iterator[List[str]]:
+        """
+        Generate every shortest path from the start to an artist.
+        """
+        if not self.parents[artist_id]:
+            yield [artist_id]
+            return
+        for parent in self.parents[artist_id]:
+            for path in self.paths_to(parent):
+                yield path + [artist_id]
+
+
+def find_paths_by_id(
+    source_id: str,
+    target_id: str,
+    width: Optional[int] = None,
+    max_length: int = MAX_PATH_LENGTH,
+    max_expanded: int = MAX_EXPANDED_ARTISTS,
+    max_paths: int = MAX_PATHS,
+    max_workers: int = MAX_WORKERS,
+) -> Dict:
+    """
+    Find the shortest coauthor chains between two Spotify artists with a
+    bidirectional BFS.
+
+    Every step expands the smaller of the two frontiers by a whole level,
+    fetching the missing discographies of the frontier concurrently, so the
+    search touches about the square root of the artists a one-sided BFS
+    would, and fetches no artist information at all. Collaborations are
+    only known from fetched discographies, so a chain through an artist
+    credited only on releases of unfetched artists may be missed in favor
+    of a longer one.
+
+    Args:
+        source_id (str): The Spotify ID of the first artist.
+        target_id (str): The Spotify ID of the second artist.
+        width (int): Number of top coauthors followed per artist, None for all of them.
+        max_length (int): Longest chain searched for.
+        max_expanded (int): Maximum number of artists whose coauthors are fetched.
+        max_paths (int): Maximum number of chains returned.
+        max_workers (int): Maximum number of concurrent fetches.
+
+    Returns:
+        dict: The shortest chains as lists of artist IDs, their length (None
+            if no chain was found), the number of expanded artists and whether
+            the search stopped at max_expanded.
+    """
+    result = {"paths": [], "length": None, "expanded": 0, "exhausted": False}
+    if source_id == target_id:
+        return {**result, "paths": [[source_id]], "length": 0}
+
+    forward, backward = SearchSide(source_id), SearchSide(target_id)
+    # A discography only holds the releases of the artist, so collaborations
+    # credited by other fetched discographies are followed backwards too
+    credited_by: Dict[str, List[str]] = {}
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        # A side without a frontier left is still reached by the other side,
+        # e.g. an artist only credited on releases of other artists
+        while forward.frontier or backward.frontier:
+            if forward.depth + backward.depth >= max_length:
+                break
+            if not backward.frontier or (
+                forward.frontier and len(forward.frontier) <= len(backward.frontier)
+            ):
+                side, other = forward, backward
+            else:
+                side, other = backward, forward
+            if result["expanded"] + len(side.frontier) > max_expanded:
+                result["exhausted"] = True
+                break
+
+            coauthors = fetch_all(
+                lambda artist_id: get_top_coauthors_by_id(artist_id, width),
+                side.frontier,
+                executor,
+            )
+            result["expanded"] += len(coauthors)
+            for artist_id, artist_coauthors in coauthors.items():
+                for coauthor in artist_coauthors:
+                    credited_by.setdefault(coauthor["id"], []).append(artist_id)
+            reached = side.expand(
+                {
+                    artist_id: [coauthor["id"] for coauthor in artist_coauthors]
+                    + credited_by.get(artist_id, [])
+                    for artist_id, artist_coauthors in coauthors.items()
+                }
+            )
+
+            # The first level reaching the other side holds every shortest chain
+            lengths = {
+                artist_id: forward.distances[artist_id] + backward.distances[artist_id]
+                for artist_id in reached
+                if artist_id in other.distances
+            }
+            if not lengths:
+                continue
+            length = min(lengths.values())
+            paths = (
+                head + tail[::-1][1:]
+                for artist_id, meeting_length in lengths.items()
+                if meeting_length == length
+                for head in forward.paths_to(artist_id)
+                for tail in backward.paths_to(artist_id)
+            )
+            return {**result, "paths": list(islice(paths, max_paths)), "length": length}
+    return result
+
+
+def find_collaboration_paths(
+    source_name: str,
+    target_name: str,
+    width: Optional[int] = None,
+    max_length: int = MAX_PATH_LENGTH,
+    max_expanded: int = MAX_EXPANDED_ARTISTS,
+    max_paths: int = MAX_PATHS,
+) -> Dict:
+    """
+    Find the shortest coauthor chains between two artists, e.g. the degrees
+    of separation of two rappers.
+
+    Args:
+        source_name (str): The name of the first artist.
+        target_name (str): The name of the second artist.
+        width (int): Number of top coauthors followed per artist, None for all of them.
+        max_length (int): Longest chain searched for.
+        max_expanded (int): Maximum number of artists whose coauthors are fetched.
+        max_paths (int): Maximum number of chains returned.
+
+    Returns:
+        dict: The shortest chains as lists of artists with their names and
+            IDs, their length (None if no chain was found or an artist is not
+            on Spotify), the number of expanded artists, whether the search
+            stopped at max_expanded and its duration in seconds.
+    """
+    start_time = time.time()
+    source = find_spotify_artist(source_name)
+    target = find_spotify_artist(target_name)
+    if source is None or target is None:
+        return {
+            "paths": [],
+            "length": None,
+            "expanded": 0,
+            "exhausted": False,
+            "seconds": time.time() - start_time,
+        }
+
+    result = find_paths_by_id(
+        source["id"], target["id"], width, max_length, max_expanded, max_paths
+    )
+    names = {source["id"]: source["name"], target["id"]: target["name"]}
+    for path in result["paths"]:
+        for artist_id in path[1:-1]:
+            names.setdefault(artist_id, COAUTHOR_INDEX.name(artist_id))
+    result["paths"] = [
+        [{"id": artist_id, "name": names[artist_id]} for artist_id in path]
+        for path in result["paths"]
+    ]
+    result["seconds"] = time.time() - start_time
+    print(
+        f"Found {len(result['paths'])} chains of length {result['length']} between "
+        f"{source_name} and {target_name} in {result['seconds']:.2f} seconds, "
+        f"expanding {result['expanded']} artists"
+    )
+    return result
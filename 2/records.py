@@ -0,0 +1,193 @@
+from collections.abc import Mapping
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+import sys
+import weakref
+
+
+# Credited artists by name and ID, so every song crediting an artist shares
+# one Artist instead of holding its own copy of the name and ID. An artist is
+# dropped once no song in memory credits it anymore
+_ARTISTS: "weakref.WeakValueDictionary[Tuple[str, str], Artist]" = (
+    weakref.WeakValueDictionary()
+)
+
+# Records are read-only, their constructors set the slots bypassing __setattr__
+_set = object.__setattr__
+
+
+def intern(value: Optional[str]) -> Optional[str]:
+    """
+    Intern a string repeated across songs, e.g. a market mask or release date.
+    """
+    return sys.intern(value) if value is not None else None
+
+
+class Record(Mapping):
+    """
+    Base of the compact records returned by the fetch layer.
+
+    A record keeps its fields in __slots__ instead of a per-instance dict,
+    and reads like the read-only dict it replaces, so code indexing songs
+    by field name, e.g. the UI, works on records unchanged. Use to_dict
+    where a real dict is needed, e.g. to serialize or modify a song.
+    """
+
+    __slots__ = ()
+    _fields: Tuple[str, ...] = ()
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        raise AttributeError(f"{type(self).__name__} records are read-only")
+
+    def __delattr__(self, name: str) -> None:
+        raise AttributeError(f"{type(self).__name__} records are read-only")
+
+    def __getitem__(self, key: str) -> Any:
+        if key not in self._fields:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._fields)
+
+    def __len__(self) -> int:
+        return len(self._fields)
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({self.to_dict()!r})"
+
+    def __reduce__(self):
+        return type(self), tuple(getattr(self, field) for field in self._fields)
+
+    def to_dict(self) -> Dict:
+        return {field: to_plain(getattr(self, field)) for field in self._fields}
+
+
+class Artist(Record):
+    """
+    An artist credited on a track, shared by every track crediting it.
+
+    Args:
+        name (str): The name of the artist.
+        id (str): The Spotify ID of the artist.
+    """
+
+    __slots__ = ("name", "id", "__weakref__")
+    _fields = ("name", "id")
+
+    def __init__(self, name: str, id: str):
+        _set(self, "name", name)
+        _set(self, "id", id)
+
+    def __hash__(self) -> int:
+        return hash((self.name, self.id))
+
+    @classmethod
+    def of(cls, name: str, id: str) -> "Artist":
+        """
+        Get the shared Artist of a credit, creating it on first use.
+        """
+        artist = _ARTISTS.get((name, id))
+        if artist is None:
+            artist = _ARTISTS.setdefault((name, id), cls(intern(name), intern(id)))
+        return artist
+
+
+class Track(Record):
+    """
+    A Spotify track of an artist with the other artists credited on it, as
+    returned by get_songs_with_coauthors.
+
+    Args:
+        song_title (str): The title of the track.
+        duration (int): The duration in milliseconds.
+        coauthors (iterable): The other credited artists, in credit order.
+        markets (str): The mask of the markets the track is available in.
+        isrc (str): The ISRC code of the track.
+        release_year (int): The release year, None if unknown.
+    """
+
+    __slots__ = (
+        "song_title",
+        "duration",
+        "coauthors",
+        "markets",
+        "isrc",
+        "release_year",
+    )
+    _fields = __slots__
+
+    def __init__(
+        self,
+        song_title: str,
+        duration: Optional[int],
+        coauthors: Iterable[Artist],
+        markets: str,
+        isrc: Optional[str],
+        release_year: Optional[int],
+    ):
+        _set(self, "song_title", song_title)
+        _set(self, "duration", duration)
+        _set(self, "coauthors", tuple(coauthors))
+        _set(self, "markets", sys.intern(markets))
+        _set(self, "isrc", isrc)
+        _set(self, "release_year", release_year)
+
+
+class Recording(Record):
+    """
+    A MusicBrainz recording of an artist, as returned by get_songs_from_artist.
+
+    Args:
+        song_title (str): The title of the recording.
+        musicbrainz_id (str): The MusicBrainz ID of the recording.
+        isrcs (iterable): The ISRC codes of the recording.
+        release_date (str): The earliest release date, or "Unknown Date".
+    """
+
+    __slots__ = ("song_title", "musicbrainz_id", "isrcs", "release_date")
+    _fields = __slots__
+
+    def __init__(
+        self,
+        song_title: str,
+        musicbrainz_id: str,
+        isrcs: Iterable[str],
+        release_date: str,
+    ):
+        _set(self, "song_title", song_title)
+        _set(self, "musicbrainz_id", musicbrainz_id)
+        _set(self, "isrcs", tuple(isrcs))
+        _set(self, "release_date", intern(release_date))
+
+
+def to_plain(value: Any) -> Any:
+    """
+    Convert records, also nested in lists, tuples and dicts, into plain
+    dicts and lists, e.g. to serialize them.
+    """
+    if isinstance(value, Record):
+        return value.to_dict()
+    if isinstance(value, (list, tuple)):
+        return [to_plain(item) for item in value]
+    if isinstance(value, dict):
+        return {key: to_plain(item) for key, item in value.items()}
+    return value
+
+
+def to_dicts(songs: Iterable) -> List[Dict]:
+    """
+    Convert a list of records into a list of plain dicts, leaving dicts as they are.
+    """
+    return [to_plain(song) for song in songs]
+
+
+def json_default(value: Any) -> Any:
+    """
+    Serialize records with json.dumps, passed as its default argument.
+
+    Raises:
+        TypeError: If the value is not a record, like json.dumps without default.
+    """
+    if isinstance(value, Record):
+        return value.to_dict()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
@@ -0,0 +1,178 @@
+from contextlib import suppress
+from typing import Any, Callable, Optional, Tuple
+import json
+import time
+import uuid
+import zlib
+import redis
+from metrics import METRICS
+
+
+# Prefix of every key, so several deployments can share a Redis database
+REDIS_KEY_PREFIX = "collaboration:"
+# zlib level of cached values, JSON of discographies compresses about tenfold
+REDIS_COMPRESSION_LEVEL = 6
+# Milliseconds a fetch lock is held at most, a crashed replica frees it after that
+REDIS_LOCK_MS = 120_000
+# Seconds a replica waits for a fetch of another replica before fetching itself
+REDIS_WAIT_SECONDS = 180
+# Seconds between checks whether the fetch of another replica is done
+REDIS_POLL_SECONDS = 0.05
+
+# Delete a lock only if it is still held with the token of the caller
+RELEASE_LOCK_SCRIPT = """
+if redis.call("get", KEYS[1]) == ARGV[1] then
+    return redis.call("del", KEYS[1])
+end
+return 0
+"""
+
+
+def encode_value(value: Any) -> bytes:
+    """
+    Serialize a value as compressed compact JSON.
+    """
+    return zlib.compress(
+        json.dumps(value, separators=(",", ":"), ensure_ascii=False).encode(),
+        REDIS_COMPRESSION_LEVEL,
+    )
+
+
+def decode_value(data: bytes) -> Any:
+    """
+    Deserialize a value stored by encode_value.
+    """
+    METRICS.inc("bytes_deserialized_total", len(data), source="redis")
+    return json.loads(zlib.decompress(data))
+
+
+class RedisCache:
+    """
+    Cache of upstream responses shared by every app process through Redis,
+    e.g. by replicas behind a load balancer.
+
+    Values are stored as zlib-compressed JSON along with their fetch time.
+    A missing value is fetched by a single replica at a time: the first one
+    takes a lock with SET NX and the others wait for its result instead of
+    fetching it again. Redis errors fall back to fetching directly, so a
+    Redis outage only costs the sharing.
+
+    Args:
+        url (str): The Redis URL, e.g. "redis://localhost:6379/0".
+        prefix (str): The prefix of every key.
+    """
+
+    def __init__(self, url: str, prefix: str = REDIS_KEY_PREFIX):
+        self.url = url
+        self.prefix = prefix
+        self.client = redis.Redis.from_url(url)
+        self._release_lock = self.client.register_script(RELEASE_LOCK_SCRIPT)
+
+    def get(self, key: str, fetched_after: Optional[float] = None) -> Tuple[bool, Any]:
+        """
+        Get a cached value.
+
+        Args:
+            key (str): The key of the value, without the prefix.
+            fetched_after (float): The UNIX time the value must be fetched
+                after, e.g. the fetch time of an expired local copy, None to
+                accept any cached value.
+
+        Returns:
+            tuple: Whether the value is cached, and the value, which may be None.
+        """
+        data = self.client.get(self.prefix + key)
+        if data is None:
+            return False, None
+        fetched_at, value = decode_value(data)
+        if fetched_after is not None and fetched_at <= fetched_after:
+            return False, None
+        return True, value
+
+    def set(self, key: str, value: Any, ttl: float) -> None:
+        """
+        Cache a value.
+
+        Args:
+            key (str): The key of the value, without the prefix.
+            value: The JSON-serializable value.
+            ttl (float): Seconds until the value expires.
+        """
+        self.client.set(
+            self.prefix + key, encode_value([time.time(), value]), ex=int(ttl)
+        )
+
+    def get_or_fetch(
+        self,
+        key: str,
+        fetch: Callable[[], Any],
+        ttl: float,
+        fetched_after: Optional[float] = None,
+        share: Optional[Callable[[Any], bool]] = None,
+    ) -> Any:
+        """
+        Get a cached value, fetching it if no replica cached it yet.
+
+        Args:
+            key (str): The key of the value, without the prefix.
+            fetch (callable): The function fetching the value from upstream.
+            ttl (float): Seconds until the fetched value expires.
+            fetched_after (float): The UNIX time the cached value must be
+                fetched after, e.g. the fetch time of an expired local copy
+                being refreshed, None to accept any cached value.
+            share (callable): The function telling whether a fetched value is
+                cached for the other replicas, None to cache every value,
+                e.g. to keep negative results local.
+
+        Returns:
+            The cached or fetched value.
+        """
+        try:
+            found, value = self.get(key, fetched_after)
+            METRICS.cache_lookup("redis", found)
+            if found:
+                return value
+            return self._fetch_once(key, fetch, ttl, fetched_after, share)
+        except redis.RedisError as e:
+            print(f"Redis cache unavailable, fetching {key} directly: {e}")
+            METRICS.inc("redis_errors_total")
+            return fetch()
+
+    def _fetch_once(
+        self,
+        key: str,
+        fetch: Callable[[], Any],
+        ttl: float,
+        fetched_after: Optional[float],
+        share: Optional[Callable[[Any], bool]],
+    ) -> Any:
+        lock_key = f"{self.prefix}lock:{key}"
+        token = uuid.uuid4().hex
+        deadline = time.monotonic() + REDIS_WAIT_SECONDS
+        while not self.client.set(lock_key, token, nx=True, px=REDIS_LOCK_MS):
+            # Another replica fetches the value, use its result once it is done
+            time.sleep(REDIS_POLL_SECONDS)
+            if not self.client.exists(lock_key):
+                found, value = self.get(key, fetched_after)
+                if found:
+                    METRICS.inc("redis_waits_total", result="shared")
+                    return value
+            elif time.monotonic() > deadline:
+                METRICS.inc("redis_waits_total", result="timeout")
+                return fetch()
+
+        try:
+            value = fetch()
+        except Exception:
+            with suppress(redis.RedisError):
+                self._release_lock(keys=[lock_key], args=[token])
+            raise
+        # The value is fetched, a failing Redis must not fetch it again
+        try:
+            if share is None or share(value):
+                self.set(key, value, ttl)
+            self._release_lock(keys=[lock_key], args=[token])
+        except redis.RedisError as e:
+            print(f"Could not cache {key} in Redis: {e}")
+            METRICS.inc("redis_errors_total")
+        return value
@@ -0,0 +1,183 @@
+from typing import Dict, Optional, Tuple
+import json
+import math
+import networkx as nx
+from pyvis import network as net
+from metrics import METRICS
+
+
+GRAPH_HEIGHT = 900
+
+# Larger graphs get precomputed positions, the browser physics stalls on them
+PRECOMPUTED_LAYOUT_MIN_NODES = 150
+# Distance in pixels between the rings of two consecutive levels
+RING_SPACING = 250
+
+# Larger graphs are shown with their communities collapsed into super-nodes
+COLLAPSED_COMMUNITIES_MIN_NODES = 150
+# Smaller communities are always shown expanded
+MIN_COLLAPSED_COMMUNITY_SIZE = 3
+MAX_SUPER_NODE_SIZE = 60
+
+# Collapses communities with vis.js clustering once the network is drawn, so
+# the browser draws one node per community until a super-node is clicked
+COLLAPSE_SCRIPT = """
+<script type="text/javascript">
+    (function () {
+        var membership = %s;
+        var superNodes = %s;
+        superNodes.forEach(function (superNode) {
+            network.cluster({
+                joinCondition: function (node) {
+                    return membership[node.id] === superNode.community;
+                },
+                clusterNodeProperties: superNode.properties,
+            });
+        });
+        network.on("click", function (params) {
+            if (params.nodes.length === 1 && network.isCluster(params.nodes[0])) {
+                network.openCluster(params.nodes[0]);
+            }
+        });
+    })();
+</script>
+"""
+
+
+def radial_layout(G: nx.Graph, levels: Dict[str, int]) -> Dict[str, Tuple[float, float]]:
+    """
+    Place every artist on a ring around the root given by its BFS level.
+
+    Artists of a ring are ordered by the angle of their parent on the
+    previous ring, so collaborators stay close to each other. The layout
+    takes linear time, unlike a force-directed layout.
+
+    Args:
+        G (nx.Graph): The collaboration graph.
+        levels (dict): The BFS level of every artist.
+
+    Returns:
+        dict: The (x, y) position of every artist.
+    """
+    rings = {}
+    for node in G.nodes:
+        rings.setdefault(levels.get(node, 0), []).append(node)
+
+    angles = {}
+    positions = {}
+    for level in sorted(rings):
+        ring = rings[level]
+        if level > 0:
+            ring.sort(
+                key=lambda node: min(
+                    (
+                        angles[neighbor]
+                        for neighbor in G.neighbors(node)
+                        if levels.get(neighbor, 0) < level and neighbor in angles
+                    ),
+                    default=0.0,
+                )
+            )
+        for i, node in enumerate(ring):
+            angles[node] = 2 * math.pi * i / len(ring)
+            radius = RING_SPACING * level
+            positions[node] = (
+                radius * math.cos(angles[node]),
+                radius * math.sin(angles[node]),
+            )
+    return positions
+
+
+def to_script_json(value) -> str:
+    # A name containing "</script>" would end the script early
+    return json.dumps(value).replace("</", "<\\/")
+
+
+def collapse_script(
+    G: nx.Graph, levels: Dict[str, int], communities: Dict[str, int]
+) -> str:
+    """
+    Generate the script collapsing every community of a graph into a
+    super-node labeled with its most connected artist. The root stays
+    outside of its community.
+
+    Args:
+        G (nx.Graph): The collaboration graph.
+        levels (dict): The BFS level of every artist.
+        communities (dict): The community of every artist.
+
+    Returns:
+        str: The script, or an empty string if no community is large enough.
+    """
+    members = {}
+    for node in G.nodes:
+        if levels.get(node, 0) > 0 and node in communities:
+            members.setdefault(communities[node], []).append(node)
+
+    membership = {}
+    super_nodes = []
+    for community, nodes in members.items():
+        if len(nodes) < MIN_COLLAPSED_COMMUNITY_SIZE:
+            continue
+        nodes.sort(key=lambda node: -G.degree(node, weight="count"))
+        hub = nodes[0]
+        membership.update(dict.fromkeys(nodes, community))
+        super_nodes.append(
+            {
+                "community": community,
+                "properties": {
+                    "id": f"community-{community}",
+                    "label": f"{hub} +{len(nodes) - 1}",
+                    "title": f"{len(nodes)} artists, click to expand: "
+                    + ", ".join(nodes[:10])
+                    + (", ..." if len(nodes) > 10 else ""),
+                    "shape": "dot",
+                    "size": min(10 + 2 * math.sqrt(len(nodes)), MAX_SUPER_NODE_SIZE),
+                    "color": G.nodes[hub].get("color"),
+                    "borderWidth": 3,
+                },
+            }
+        )
+    if not super_nodes:
+        return ""
+    return COLLAPSE_SCRIPT % (to_script_json(membership), to_script_json(super_nodes))
+
+
+def graph_to_html(
+    G: nx.Graph,
+    levels: Optional[Dict[str, int]] = None,
+    height: int = GRAPH_HEIGHT,
+    communities: Optional[Dict[str, int]] = None,
+) -> str:
+    """
+    Generate the HTML of the interactive network in memory.
+
+    Args:
+        G (nx.Graph): The collaboration graph.
+        levels (dict): The BFS level of every artist, used to precompute
+            positions of large graphs.
+        height (int): The height of the network in pixels.
+        communities (dict): The community of every artist, used to collapse
+            the communities of large graphs. None to show every artist.
+
+    Returns:
+        str: The HTML page of the network.
+    """
+    with METRICS.timer("stage_seconds", stage="render_network"):
+        interactive_g = net.Network(height=f"{height}px", cdn_resources="remote")
+        interactive_g.from_nx(G)
+
+    if levels is not None and len(G) >= PRECOMPUTED_LAYOUT_MIN_NODES:
+        with METRICS.timer("stage_seconds", stage="render_layout"):
+            positions = radial_layout(G, levels)
+        for node in interactive_g.nodes:
+            node["x"], node["y"] = positions[node["id"]]
+        interactive_g.toggle_physics(False)
+
+    with METRICS.timer("stage_seconds", stage="render_html"):
+        html = interactive_g.generate_html()
+        if communities is not None and len(G) >= COLLAPSED_COMMUNITIES_MIN_NODES:
+            script = collapse_script(G, levels or {}, communities)
+            head, tail = html.rsplit("</body>", 1)
+            html = head + script + "</body>" + tail
+        return html
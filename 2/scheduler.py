@@ -0,0 +1,283 @@
+from collections import Counter
+from email.utils import parsedate_to_datetime
+from typing import Callable, Dict, Optional, Tuple
+import random
+import threading
+import time
+import musicbrainzngs
+import requests
+from spotipy import SpotifyException
+
+
+# Status codes worth retrying: rate limiting and transient server errors
+RETRY_STATUS_CODES = (429, 500, 502, 503, 504)
+
+
+class TokenBucket:
+    """
+    A thread-safe token bucket limiting the request rate to one upstream.
+
+    Args:
+        rate (float): Number of tokens added per second.
+        capacity (float): Maximum number of tokens, i.e. the allowed burst.
+    """
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._last_refill = time.monotonic()
+        self._blocked_until = 0.0
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float) -> None:
+        self._tokens = min(
+            self.capacity, self._tokens + (now - self._last_refill) * self.rate
+        )
+        self._last_refill = now
+
+    def try_acquire(self) -> float:
+        """
+        Take a token if one is available.
+
+        Returns:
+            float: 0 if a token was taken, otherwise the number of seconds to
+                wait before trying again.
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            if now >= self._blocked_until and self._tokens >= 1:
+                self._tokens -= 1
+                return 0.0
+            return max(self._blocked_until - now, (1 - self._tokens) / self.rate)
+
+    def available(self) -> float:
+        """
+        Get the number of tokens available now, 0 while the bucket is blocked.
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            return self._tokens if now >= self._blocked_until else 0.0
+
+    def acquire(self) -> None:
+        """
+        Block until a token is available and take it.
+        """
+        while True:
+            wait = self.try_acquire()
+            if not wait:
+                return
+            time.sleep(wait)
+
+    def block_for(self, seconds: float) -> None:
+        """
+        Stop handing out tokens for the given time, e.g. after a 429 response.
+
+        Args:
+            seconds (float): The time to wait before the next request.
+        """
+        with self._lock:
+            self._blocked_until = max(self._blocked_until, time.monotonic() + seconds)
+            self._tokens = 0
+
+
+class _Flight:
+    """
+    A request in progress whose result is shared by all identical callers.
+    """
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """
+    Parse the value of a Retry-After header.
+
+    Args:
+        value (str): The header value, either in seconds or as an HTTP date.
+
+    Returns:
+        float: The number of seconds to wait, or None if the value is missing or invalid.
+    """
+    if value is None:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def retry_delay(
+    attempt: int,
+    retry_after: Optional[float],
+    base_delay: float = 1.0,
+    max_delay: float = 60.0,
+) -> float:
+    """
+    Compute the delay before retrying a failed request.
+
+    Args:
+        attempt (int): Number of the failed attempt, starting at 0.
+        retry_after (float): The Retry-After delay in seconds, if any.
+        base_delay (float): Initial backoff delay in seconds.
+        max_delay (float): Maximum backoff delay in seconds.
+
+    Returns:
+        float: The jittered exponential backoff, on top of half of it after
+            the Retry-After delay if there is one.
+    """
+    backoff = random.uniform(0, min(max_delay, base_delay * 2**attempt))
+    return backoff if retry_after is None else retry_after + backoff / 2
+
+
+def classify_error(error: Exception) -> Tuple[bool, Optional[float]]:
+    """
+    Decide whether a failed upstream request should be retried.
+
+    Args:
+        error (Exception): The exception raised by the client library.
+
+    Returns:
+        tuple: Whether the request is retryable and the Retry-After delay in seconds, if any.
+    """
+    if isinstance(error, SpotifyException):
+        headers = error.headers or {}
+        return (
+            error.http_status in RETRY_STATUS_CODES,
+            parse_retry_after(headers.get("Retry-After")),
+        )
+    if isinstance(error, musicbrainzngs.WebServiceError):
+        cause = getattr(error, "cause", None)
+        code = getattr(cause, "code", None)
+        headers = getattr(cause, "headers", None) or {}
+        retryable = (
+            code in RETRY_STATUS_CODES
+            if code is not None
+            else isinstance(error, musicbrainzngs.NetworkError)
+        )
+        return retryable, parse_retry_after(headers.get("Retry-After"))
+    if isinstance(error, (requests.ConnectionError, requests.Timeout)):
+        return True, None
+    return False, None
+
+
+class RequestScheduler:
+    """
+    Schedule upstream requests within a per-upstream rate budget.
+
+    Every request waits for a token of its upstream bucket, retryable failures
+    are retried with jittered exponential backoff honoring Retry-After, and
+    identical requests issued while one is in flight share its result.
+
+    Args:
+        buckets (dict): The token bucket of every upstream.
+        max_retries (int): Maximum number of retries of a single request.
+        base_delay (float): Initial backoff delay in seconds.
+        max_delay (float): Maximum backoff delay in seconds.
+    """
+
+    def __init__(
+        self,
+        buckets: Dict[str, TokenBucket],
+        max_retries: int = 5,
+        base_delay: float = 1.0,
+        max_delay: float = 60.0,
+    ):
+        self.buckets = buckets
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.requests = Counter()
+        self.retries = Counter()
+        self.collapsed = Counter()
+        self._in_flight = {}
+        self._lock = threading.Lock()
+
+    def call(self, upstream: str, func: Callable, *args, **kwargs):
+        """
+        Call an upstream client function through the scheduler.
+
+        Args:
+            upstream (str): The name of the upstream, e.g. "musicbrainz" or "spotify".
+            func (callable): The client function issuing the request.
+            *args: Positional arguments of the function.
+            **kwargs: Keyword arguments of the function.
+
+        Returns:
+            The result of the function.
+        """
+        key = (
+            upstream,
+            getattr(func, "__qualname__", repr(func)),
+            repr(args),
+            repr(sorted(kwargs.items())),
+        )
+        with self._lock:
+            flight = self._in_flight.get(key)
+            is_leader = flight is None
+            if is_leader:
+                flight = self._in_flight[key] = _Flight()
+            else:
+                self.collapsed[upstream] += 1
+
+        if not is_leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.result
+
+        try:
+            flight.result = self._call_with_retry(upstream, func, args, kwargs)
+            return flight.result
+        except Exception as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._in_flight[key]
+            flight.done.set()
+
+    def _call_with_retry(self, upstream: str, func: Callable, args, kwargs):
+        bucket = self.buckets[upstream]
+        for attempt in range(self.max_retries + 1):
+            bucket.acquire()
+            with self._lock:
+                self.requests[upstream] += 1
+            try:
+                return func(*args, **kwargs)
+            except Exception as e:
+                retryable, retry_after = classify_error(e)
+                if not retryable or attempt == self.max_retries:
+                    raise
+                delay = retry_delay(
+                    attempt, retry_after, self.base_delay, self.max_delay
+                )
+                print(
+                    f"Retrying {upstream} request in {delay:.2f} seconds "
+                    f"(attempt {attempt + 1}): {e}"
+                )
+                with self._lock:
+                    self.retries[upstream] += 1
+                # Rate limit responses apply to every caller of the upstream
+                if retry_after is not None:
+                    bucket.block_for(retry_after)
+                time.sleep(delay)
+
+
+# Shared by all Streamlit sessions of the process. MusicBrainz allows about
+# one request per second; Spotify uses an undocumented rolling window.
+SCHEDULER = RequestScheduler(
+    {
+        "musicbrainz": TokenBucket(rate=1.0, capacity=1),
+        "spotify": TokenBucket(rate=10.0, capacity=10),
+    }
+)
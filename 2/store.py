@@ -0,0 +1,462 @@
+from collections import Counter
+from typing import Dict, List, Optional
+import json
+import sqlite3
+import threading
+import time
+from identity import NEGATIVE_LOOKUP_TTL, normalize_name
+from markets import union_masks
+from metrics import METRICS
+from records import Artist, Recording, Track
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS artists (
+    musicbrainz_id TEXT PRIMARY KEY,
+    name TEXT NOT NULL,
+    normalized_name TEXT NOT NULL,
+    info TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS artists_normalized_name ON artists (normalized_name);
+
+CREATE TABLE IF NOT EXISTS spotify_artists (
+    spotify_id TEXT PRIMARY KEY,
+    name TEXT NOT NULL,
+    normalized_name TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS spotify_artists_normalized_name
+    ON spotify_artists (normalized_name);
+
+-- Result of searching an upstream for a name, artist_id is NULL if nothing was found
+CREATE TABLE IF NOT EXISTS name_lookups (
+    source TEXT NOT NULL,
+    normalized_name TEXT NOT NULL,
+    artist_id TEXT,
+    -- UNIX time of the search
+    looked_up_at REAL NOT NULL,
+    PRIMARY KEY (source, normalized_name)
+);
+
+CREATE TABLE IF NOT EXISTS tracks (
+    spotify_id TEXT PRIMARY KEY,
+    song_title TEXT NOT NULL,
+    duration INTEGER,
+    isrc TEXT,
+    -- Year the album or single of the track was released, NULL if unknown
+    release_year INTEGER,
+    -- Bitmask of the markets the track is available in, see markets.py
+    markets BLOB NOT NULL
+);
+
+-- Every artist credited on a track, in credit order
+CREATE TABLE IF NOT EXISTS credits (
+    track_id TEXT NOT NULL,
+    artist_id TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    PRIMARY KEY (track_id, artist_id)
+);
+CREATE INDEX IF NOT EXISTS credits_artist_id ON credits (artist_id);
+
+-- Tracks found in the albums and singles of an artist
+CREATE TABLE IF NOT EXISTS discography (
+    artist_id TEXT NOT NULL,
+    track_id TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    PRIMARY KEY (artist_id, track_id)
+);
+
+CREATE TABLE IF NOT EXISTS recordings (
+    artist_id TEXT NOT NULL,
+    musicbrainz_id TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    song_title TEXT NOT NULL,
+    isrcs TEXT NOT NULL,
+    release_date TEXT NOT NULL,
+    PRIMARY KEY (artist_id, musicbrainz_id)
+);
+
+-- When artist information, a discography or a recording list was fetched from upstream
+CREATE TABLE IF NOT EXISTS fetches (
+    kind TEXT NOT NULL,
+    key TEXT NOT NULL,
+    fetched_at REAL NOT NULL,
+    PRIMARY KEY (kind, key)
+);
+"""
+
+
+def decode_json(text: str):
+    """
+    Decode a JSON column, counting the decoded bytes.
+
+    Args:
+        text (str): The JSON text.
+
+    Returns:
+        The decoded value.
+    """
+    METRICS.inc("bytes_deserialized_total", len(text), source="store")
+    return json.loads(text)
+
+
+def count_years(years: Optional[str]) -> Dict[int, int]:
+    """
+    Count the release years aggregated by GROUP_CONCAT, e.g. "2012,2012,2015".
+
+    Returns:
+        dict: The number of songs of every known release year.
+    """
+    return dict(Counter(int(year) for year in years.split(","))) if years else {}
+
+
+class GraphStore:
+    """
+    SQLite store of artists, tracks and artist-track credits.
+
+    A single connection is shared by all threads of the process and guarded
+    by a lock. The database runs in WAL mode so that several processes, e.g.
+    the Streamlit app and a crawler, can use the same file.
+
+    Args:
+        path (str): The path of the SQLite database file.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    def _query(self, sql: str, params=()) -> List[tuple]:
+        with self._lock:
+            return self._conn.execute(sql, params).fetchall()
+
+    def lookup_name(self, source: str, name: str) -> Optional[tuple]:
+        """
+        Get the cached search result of a name.
+
+        Args:
+            source (str): The searched upstream, "musicbrainz" or "spotify".
+            name (str): The searched artist name.
+
+        Returns:
+            tuple: The found artist ID (None if the search found nothing) and the
+                UNIX time of the search, or None if the name was never searched
+                or the search found nothing more than NEGATIVE_LOOKUP_TTL ago.
+        """
+        rows = self._query(
+            """
+            SELECT artist_id, looked_up_at FROM name_lookups
+            WHERE source = ? AND normalized_name = ?
+                AND (artist_id IS NOT NULL OR looked_up_at > ?)
+            """,
+            (source, normalize_name(name), time.time() - NEGATIVE_LOOKUP_TTL),
+        )
+        return rows[0] if rows else None
+
+    def save_name_lookup(self, source: str, name: str, artist_id: Optional[str]) -> None:
+        """
+        Cache the search result of a name.
+
+        Args:
+            source (str): The searched upstream, "musicbrainz" or "spotify".
+            name (str): The searched artist name.
+            artist_id (str): The found artist ID, or None if the search found nothing.
+        """
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO name_lookups VALUES (?, ?, ?, ?)",
+                (source, normalize_name(name), artist_id, time.time()),
+            )
+
+    def get_artist_info(self, musicbrainz_id: str) -> Optional[Dict]:
+        rows = self._query(
+            "SELECT info FROM artists WHERE musicbrainz_id = ?", (musicbrainz_id,)
+        )
+        return decode_json(rows[0][0]) if rows else None
+
+    def save_artist_info(self, artist_info: Dict) -> None:
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO artists VALUES (?, ?, ?, ?)",
+                (
+                    artist_info["artist_id"],
+                    artist_info["artist_name"],
+                    normalize_name(artist_info["artist_name"]),
+                    json.dumps(artist_info, ensure_ascii=False),
+                ),
+            )
+            self._conn.execute(
+                "INSERT OR REPLACE INTO fetches VALUES ('artist', ?, ?)",
+                (artist_info["artist_id"], time.time()),
+            )
+
+    def find_spotify_artist(self, name: str) -> Optional[Dict]:
+        """
+        Find a known Spotify artist by name without searching upstream.
+
+        Args:
+            name (str): The artist name.
+
+        Returns:
+            dict: The artist ID and name, or None if no single artist has this name.
+        """
+        rows = self._query(
+            "SELECT spotify_id, name FROM spotify_artists WHERE normalized_name = ? LIMIT 2",
+            (normalize_name(name),),
+        )
+        if len(rows) != 1:
+            return None
+        return {"id": rows[0][0], "name": rows[0][1]}
+
+    def get_spotify_artist(self, spotify_id: str) -> Optional[Dict]:
+        rows = self._query(
+            "SELECT spotify_id, name FROM spotify_artists WHERE spotify_id = ?",
+            (spotify_id,),
+        )
+        return {"id": rows[0][0], "name": rows[0][1]} if rows else None
+
+    def save_spotify_artist(self, artist: Dict) -> None:
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO spotify_artists VALUES (?, ?, ?)",
+                (artist["id"], artist["name"], normalize_name(artist["name"])),
+            )
+
+    def get_fetched_at(self, kind: str, key: str) -> Optional[float]:
+        """
+        Get the time artist information, a discography or recordings were fetched.
+
+        Args:
+            kind (str): The kind of data, "artist", "discography" or "recordings".
+            key (str): The ID of the artist.
+
+        Returns:
+            float: The UNIX time of the fetch, or None if it was never fetched.
+        """
+        rows = self._query(
+            "SELECT fetched_at FROM fetches WHERE kind = ? AND key = ?", (kind, key)
+        )
+        return rows[0][0] if rows else None
+
+    def get_fetch_times(self, kind: str) -> Dict[str, float]:
+        """
+        Get the fetch time of every stored piece of data of a kind.
+
+        Args:
+            kind (str): The kind of data, "artist", "discography" or "recordings".
+
+        Returns:
+            dict: The UNIX time of the fetch, by artist ID.
+        """
+        return dict(
+            self._query("SELECT key, fetched_at FROM fetches WHERE kind = ?", (kind,))
+        )
+
+    def save_discography(self, artist_id: str, tracks: List[Dict]) -> None:
+        """
+        Replace the discography of a Spotify artist.
+
+        Args:
+            artist_id (str): The Spotify ID of the artist.
+            tracks (list): The tracks, each with its ID, details and the list
+                of all credited artists under "artists".
+        """
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM discography WHERE artist_id = ?", (artist_id,))
+            for position, track in enumerate(tracks):
+                self._conn.execute(
+                    """
+                    INSERT OR REPLACE INTO tracks
+                        (spotify_id, song_title, duration, isrc, release_year, markets)
+                    VALUES (?, ?, ?, ?, ?, ?)
+                    """,
+                    (
+                        track["id"],
+                        track["song_title"],
+                        track["duration"],
+                        track["isrc"],
+                        track.get("release_year"),
+                        bytes.fromhex(track["markets"]),
+                    ),
+                )
+                self._conn.execute(
+                    "INSERT OR IGNORE INTO discography VALUES (?, ?, ?)",
+                    (artist_id, track["id"], position),
+                )
+                self._conn.execute("DELETE FROM credits WHERE track_id = ?", (track["id"],))
+                for credit_position, artist in enumerate(track["artists"]):
+                    self._conn.execute(
+                        "INSERT OR IGNORE INTO spotify_artists VALUES (?, ?, ?)",
+                        (artist["id"], artist["name"], normalize_name(artist["name"])),
+                    )
+                    self._conn.execute(
+                        "INSERT OR IGNORE INTO credits VALUES (?, ?, ?)",
+                        (track["id"], artist["id"], credit_position),
+                    )
+            self._conn.execute(
+                "INSERT OR REPLACE INTO fetches VALUES ('discography', ?, ?)",
+                (artist_id, time.time()),
+            )
+
+    def get_discography(self, artist_id: str) -> List[Track]:
+        """
+        Get the songs of a Spotify artist along with their coauthors.
+
+        Args:
+            artist_id (str): The Spotify ID of the artist.
+
+        Returns:
+            list: The songs as returned by get_songs_with_coauthors.
+        """
+        rows = self._query(
+            """
+            SELECT t.spotify_id, t.song_title, t.duration, t.markets, t.isrc,
+                   t.release_year, a.name, a.spotify_id
+            FROM discography d
+            JOIN tracks t ON t.spotify_id = d.track_id
+            LEFT JOIN credits c ON c.track_id = d.track_id AND c.artist_id != d.artist_id
+            LEFT JOIN spotify_artists a ON a.spotify_id = c.artist_id
+            WHERE d.artist_id = ?
+            ORDER BY d.position, c.position
+            """,
+            (artist_id,),
+        )
+        songs = {}
+        coauthors = {}
+        for track_id, title, duration, markets, isrc, year, name, coauthor_id in rows:
+            if track_id not in songs:
+                songs[track_id] = (title, duration, markets.hex(), isrc, year)
+                coauthors[track_id] = []
+            if coauthor_id is not None:
+                coauthors[track_id].append(Artist.of(name, coauthor_id))
+        return [
+            Track(title, duration, coauthors[track_id], markets, isrc, year)
+            for track_id, (title, duration, markets, isrc, year) in songs.items()
+        ]
+
+    def get_top_coauthors(self, artist_id: str, top_n: Optional[int] = 5) -> List[Dict]:
+        """
+        Get the most frequent coauthors in the discography of a Spotify artist.
+
+        Args:
+            artist_id (str): The Spotify ID of the artist.
+            top_n (int): Number of top coauthors to return, None for all of them.
+
+        Returns:
+            list: The top coauthors with their names, IDs, number of common
+                songs, number of common songs per release year and the mask of
+                the markets any common song is available in.
+        """
+        rows = self._query(
+            """
+            SELECT c.artist_id, a.name, COUNT(*) AS count, GROUP_CONCAT(t.release_year),
+                   GROUP_CONCAT(HEX(t.markets))
+            FROM discography d
+            JOIN credits c ON c.track_id = d.track_id
+            JOIN tracks t ON t.spotify_id = d.track_id
+            JOIN spotify_artists a ON a.spotify_id = c.artist_id
+            WHERE d.artist_id = ? AND c.artist_id != ?
+            GROUP BY c.artist_id
+            -- Ties keep the order of first appearance, like Counter.most_common
+            ORDER BY count DESC, MIN(d.position), MIN(c.position)
+            LIMIT ?
+            """,
+            (artist_id, artist_id, -1 if top_n is None else top_n),
+        )
+        return [
+            {
+                "name": name,
+                "id": coauthor_id,
+                "count": count,
+                "years": count_years(years),
+                "markets": union_masks(markets.split(",")),
+            }
+            for coauthor_id, name, count, years, markets in rows
+        ]
+
+    def get_all_coauthors(self) -> Dict[str, List[Dict]]:
+        """
+        Get the coauthors of every Spotify artist whose discography is stored.
+
+        Returns:
+            dict: The coauthors of every artist, as returned by get_top_coauthors.
+        """
+        coauthors = {
+            key: []
+            for (key,) in self._query(
+                "SELECT key FROM fetches WHERE kind = 'discography'"
+            )
+        }
+        rows = self._query(
+            """
+            SELECT d.artist_id, c.artist_id, a.name, COUNT(*) AS count,
+                   GROUP_CONCAT(t.release_year), GROUP_CONCAT(HEX(t.markets))
+            FROM discography d
+            JOIN credits c ON c.track_id = d.track_id
+            JOIN tracks t ON t.spotify_id = d.track_id
+            JOIN spotify_artists a ON a.spotify_id = c.artist_id
+            WHERE c.artist_id != d.artist_id
+            GROUP BY d.artist_id, c.artist_id
+            ORDER BY d.artist_id, count DESC, MIN(d.position), MIN(c.position)
+            """
+        )
+        for artist_id, coauthor_id, name, count, years, markets in rows:
+            coauthors.setdefault(artist_id, []).append(
+                {
+                    "name": name,
+                    "id": coauthor_id,
+                    "count": count,
+                    "years": count_years(years),
+                    "markets": union_masks(markets.split(",")),
+                }
+            )
+        return coauthors
+
+    def save_recordings(self, artist_id: str, songs: List[Dict]) -> None:
+        """
+        Replace the MusicBrainz recordings of an artist.
+
+        Args:
+            artist_id (str): The MusicBrainz ID of the artist.
+            songs (list): The songs in the format returned by get_songs_from_artist.
+        """
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM recordings WHERE artist_id = ?", (artist_id,))
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO recordings VALUES (?, ?, ?, ?, ?, ?)",
+                [
+                    (
+                        artist_id,
+                        song["musicbrainz_id"],
+                        position,
+                        song["song_title"],
+                        json.dumps(song["isrcs"]),
+                        song["release_date"],
+                    )
+                    for position, song in enumerate(songs)
+                ],
+            )
+            self._conn.execute(
+                "INSERT OR REPLACE INTO fetches VALUES ('recordings', ?, ?)",
+                (artist_id, time.time()),
+            )
+
+    def get_recordings(self, artist_id: str) -> List[Recording]:
+        rows = self._query(
+            """
+            SELECT song_title, musicbrainz_id, isrcs, release_date
+            FROM recordings WHERE artist_id = ? ORDER BY position
+            """,
+            (artist_id,),
+        )
+        return [
+            Recording(title, musicbrainz_id, decode_json(isrcs), release_date)
+            for title, musicbrainz_id, isrcs, release_date in rows
+        ]
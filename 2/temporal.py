@@ -0,0 +1,107 @@
+from typing import Hashable, Iterable, Optional
+import networkx as nx
+import numpy as np
+
+
+class TemporalIndex:
+    """
+    Collaboration counts of every edge of a graph per release year,
+    prefix-summed over the years.
+
+    The counts of an edge over any window of years are the difference of
+    two prefix sums, so a window of the whole graph costs one vectorized
+    subtraction per edge instead of a rebuild from the song lists.
+
+    Args:
+        G (nx.Graph): The collaboration graph, every edge holding its number
+            of songs per release year under the attribute.
+        attribute (str): The edge attribute holding the counts per year.
+    """
+
+    def __init__(self, G: nx.Graph, attribute: str = "years"):
+        self.edges = list(G.edges)
+        # Years may be strings once the graph went through JSON
+        edge_years = [
+            {int(year): count for year, count in (years or {}).items()}
+            for _, _, years in G.edges(data=attribute)
+        ]
+        known = [year for years in edge_years for year in years]
+        self.first_year: Optional[int] = min(known, default=None)
+        self.last_year: Optional[int] = max(known, default=None)
+
+        n_years = self.last_year - self.first_year + 1 if known else 0
+        # Column 0 stays empty, the prefix sum of the years before the first one
+        counts = np.zeros((len(self.edges), n_years + 1), dtype=np.int32)
+        rows = [row for row, years in enumerate(edge_years) for _ in years]
+        columns = [year - self.first_year + 1 for years in edge_years for year in years]
+        counts[np.array(rows, dtype=np.intp), np.array(columns, dtype=np.intp)] = [
+            count for years in edge_years for count in years.values()
+        ]
+        self._prefix = np.cumsum(counts, axis=1)
+
+    def covers(self, first_year: int, last_year: int) -> bool:
+        """
+        Check whether a window spans every known year.
+        """
+        return self.first_year is None or (
+            first_year <= self.first_year and last_year >= self.last_year
+        )
+
+    def counts(self, first_year: int, last_year: int) -> np.ndarray:
+        """
+        Count the songs of every edge released within a window of years.
+
+        Args:
+            first_year (int): The first year of the window.
+            last_year (int): The last year of the window, included.
+
+        Returns:
+            np.ndarray: The number of songs of every edge, in the order of self.edges.
+        """
+        if self.first_year is None:
+            return np.zeros(len(self.edges), dtype=np.int32)
+        start = min(max(first_year, self.first_year), self.last_year + 1)
+        end = max(min(last_year, self.last_year), start - 1)
+        return (
+            self._prefix[:, end - self.first_year + 1]
+            - self._prefix[:, start - self.first_year]
+        )
+
+    def window_graph(
+        self,
+        G: nx.Graph,
+        first_year: int,
+        last_year: int,
+        keep: Iterable[Hashable] = (),
+    ) -> nx.Graph:
+        """
+        Get the collaboration graph of a window of years, keeping the
+        artists with at least one song released within it.
+
+        Songs of unknown release year only count in a window spanning every
+        known year, which returns the graph itself.
+
+        Args:
+            G (nx.Graph): The graph the index was built from.
+            first_year (int): The first year of the window.
+            last_year (int): The last year of the window, included.
+            keep (iterable): Nodes kept without songs in the window, e.g. the root.
+
+        Returns:
+            nx.Graph: The graph of the window, its edges weighted by their
+                number of songs within it.
+        """
+        if self.covers(first_year, last_year):
+            return G
+        window = nx.Graph()
+        window.add_nodes_from((node, G.nodes[node]) for node in keep if node in G)
+        counts = self.counts(first_year, last_year).tolist()
+        for (u, v), count in zip(self.edges, counts):
+            if not count:
+                continue
+            window.add_node(u, **G.nodes[u])
+            window.add_node(v, **G.nodes[v])
+            window.add_edge(
+                u, v, **{**G.edges[u, v], "label": f"{count} co.", "count": count}
+            )
+        return window
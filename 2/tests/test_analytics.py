@@ -0,0 +1,82 @@
+import networkx as nx
+import numpy as np
+import pytest
+from analytics import (
+    CSRGraph,
+    connected_components,
+    core_numbers,
+    multi_source_bfs,
+    sample_path_lengths,
+)
+
+
+def random_graph(seed: int, n_nodes: int = 60, n_edges: int = 80):
+    """
+    Draw a sparse random graph with isolated nodes, also at the end, and
+    build it both as a CSRGraph and a networkx graph.
+    """
+    rng = np.random.default_rng(seed)
+    # The last nodes are never drawn, so they stay isolated
+    sources = rng.integers(n_nodes - 5, size=n_edges)
+    targets = rng.integers(n_nodes - 5, size=n_edges)
+    graph = CSRGraph.from_edges(sources, targets, n_nodes=n_nodes)
+    reference = nx.Graph()
+    reference.add_nodes_from(range(n_nodes))
+    reference.add_edges_from(
+        (int(source), int(target))
+        for source, target in zip(sources, targets)
+        if source != target
+    )
+    return graph, reference
+
+
+def reference_levels(reference: nx.Graph, source: int) -> list:
+    distances = nx.single_source_shortest_path_length(reference, source)
+    return np.bincount(list(distances.values())).tolist()
+
+
+def test_bfs_with_trailing_isolated_nodes():
+    graph = CSRGraph.from_edges(np.array([0, 2, 4]), np.array([2, 4, 0]), n_nodes=6)
+
+    assert multi_source_bfs(graph, np.array([2])).tolist() == [[1, 2]]
+    assert multi_source_bfs(graph, np.array([5])).tolist() == [[1]]
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_bfs_matches_networkx(seed):
+    graph, reference = random_graph(seed)
+    sources = np.arange(len(graph))
+
+    for start in range(0, len(sources), 64):
+        batch = sources[start : start + 64]
+        levels = multi_source_bfs(graph, batch)
+        for source, row in zip(batch, levels.tolist()):
+            expected = reference_levels(reference, int(source))
+            assert row[: len(expected)] == expected
+            assert not any(row[len(expected) :])
+
+
+def test_sample_path_lengths_matches_networkx():
+    graph, reference = random_graph(0)
+    paths = sample_path_lengths(graph, n_sources=len(graph), seed=0)
+
+    lengths = [
+        length
+        for source in reference
+        for target, length in nx.single_source_shortest_path_length(
+            reference, source
+        ).items()
+        if target != source
+    ]
+    assert paths["n_pairs"] == len(lengths)
+    assert paths["mean"] == pytest.approx(np.mean(lengths))
+    assert paths["max"] == max(lengths)
+
+
+def test_components_and_cores_match_networkx():
+    graph, reference = random_graph(1)
+
+    n_components, _ = connected_components(graph)
+    assert n_components == nx.number_connected_components(reference)
+    cores = nx.core_number(reference)
+    assert core_numbers(graph).tolist() == [cores[node] for node in range(len(graph))]
@@ -0,0 +1,61 @@
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import threading
+import pytest
+import requests
+from api import ApiClient, ApiHandler, normalize_params, query_key
+
+
+@pytest.fixture
+def serve():
+    """
+    Serve a request handler on a free local port, returning its base URL.
+    """
+    servers = []
+
+    def start(handler) -> str:
+        server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        servers.append(server)
+        return f"http://127.0.0.1:{server.server_address[1]}"
+
+    yield start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+
+class ProxyErrorHandler(BaseHTTPRequestHandler):
+    def do_GET(self) -> None:
+        body = b"<html>Bad Gateway</html>"
+        self.send_response(502)
+        self.send_header("Content-Type", "text/html")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def test_spellings_of_a_query_share_a_key():
+    assert query_key(
+        "/top-coauthors", normalize_params("/top-coauthors", {"name": "Björk"})
+    ) == query_key(
+        "/top-coauthors",
+        normalize_params("/top-coauthors", {"name": " BJÖRK ", "n": "05"}),
+    )
+
+
+@pytest.mark.parametrize("value", ["²", "-1", "1.5", "five"])
+def test_non_integer_params_are_rejected(serve, value):
+    url = serve(ApiHandler)
+    response = requests.get(
+        f"{url}/top-coauthors", params={"name": "Björk", "n": value}, timeout=5
+    )
+
+    assert response.status_code == 400
+    assert response.json() == {"error": "Parameter n is not an integer"}
+
+
+def test_client_reports_errors_that_are_not_json(serve):
+    client = ApiClient(serve(ProxyErrorHandler))
+
+    with pytest.raises(Exception, match="status 502: <html>Bad Gateway</html>"):
+        client.get_artist_info("Björk")
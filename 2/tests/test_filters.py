@@ -0,0 +1,94 @@
+import pytest
+from filters import (
+    FILTER_BORN_AFTER,
+    FILTER_CAREER_ENDED,
+    FILTER_COUNTRY,
+    FILTER_GENRE,
+    FILTER_MARKET,
+    clear_artist_attributes,
+    compile_filters,
+    parse_begin_year,
+)
+from markets import encode_markets
+
+
+@pytest.fixture(autouse=True)
+def cold_attributes():
+    clear_artist_attributes()
+    yield
+    clear_artist_attributes()
+
+
+def artist(artist_id: str, begin=None, tags=(), country=None, ended=None) -> dict:
+    """
+    Build artist information in the format of get_artist_info.
+    """
+    return {
+        "artist_id": artist_id,
+        "artist_name": f"Artist {artist_id}",
+        "life_span": {"begin": begin, "ended": ended},
+        "tags": [{"name": tag} for tag in tags],
+        "origin_country": country,
+    }
+
+
+ARTISTS = [
+    artist("a", begin="1987-06-17", tags=["pop", "rap"], country="PL", ended="false"),
+    artist("b", begin="1975", tags=["rap"], country=" pl ", ended="true"),
+    artist("c", begin="not a date", tags=["rap"], country="US"),
+    artist("d", tags=["pop"]),
+    {"artist_id": "unknown", "artist_name": "Unknown"},
+]
+
+
+@pytest.mark.parametrize(
+    "begin, year",
+    [("1987-06-17", 1987), ("1987", 1987), (None, None), ("", None), ("?", None)],
+)
+def test_parse_begin_year(begin, year):
+    assert parse_begin_year(begin) == year
+
+
+@pytest.mark.parametrize(
+    "selections, expected",
+    [
+        ({}, ["a", "b", "c", "d", "unknown"]),
+        ({FILTER_GENRE: "rap"}, ["a", "b", "c"]),
+        ({FILTER_COUNTRY: "pl "}, ["a", "b"]),
+        ({FILTER_BORN_AFTER: "1980"}, ["a"]),
+        ({FILTER_BORN_AFTER: " 1970 "}, ["a", "b"]),
+        ({FILTER_BORN_AFTER: "abc"}, []),
+        ({FILTER_BORN_AFTER: "¹⁹⁸⁰"}, []),
+        ({FILTER_CAREER_ENDED: "True"}, ["b"]),
+        ({FILTER_GENRE: "pop", FILTER_BORN_AFTER: "1980"}, ["a"]),
+        ({FILTER_GENRE: "", FILTER_COUNTRY: None}, ["a", "b", "c", "d", "unknown"]),
+    ],
+)
+def test_predicate_and_mask_agree(selections, expected):
+    coauthor_filter = compile_filters(selections)
+
+    matching = [info["artist_id"] for info in ARTISTS if coauthor_filter(info)]
+    assert matching == expected
+    mask = coauthor_filter.mask(ARTISTS)
+    assert [info["artist_id"] for info, kept in zip(ARTISTS, mask) if kept] == expected
+
+
+def test_missing_artist_info_never_matches():
+    assert not compile_filters({})(None)
+
+
+def test_collaborations_are_filtered_by_market():
+    coauthors = {
+        "a": [
+            {"id": "b", "markets": encode_markets(["PL", "US"])},
+            {"id": "c", "markets": encode_markets(["US"])},
+        ],
+        "d": [{"id": "e", "markets": encode_markets([])}],
+    }
+
+    assert compile_filters({}).filter_collaborations(coauthors) is coauthors
+    filtered = compile_filters({FILTER_MARKET: "PL"}).filter_collaborations(coauthors)
+    assert {
+        artist_id: [coauthor["id"] for coauthor in artist_coauthors]
+        for artist_id, artist_coauthors in filtered.items()
+    } == {"a": ["b"], "d": []}
@@ -0,0 +1,88 @@
+import os
+import numpy as np
+import pytest
+from loaders import CACHE_SUFFIX, load_network
+
+
+def edges(graph) -> dict:
+    """
+    Get the weighted edges of a graph by node label, each edge once.
+    """
+    labels = [str(label) for label in graph.labels]
+    result = {}
+    for node in range(len(graph)):
+        for entry in range(graph.indptr[node], graph.indptr[node + 1]):
+            neighbor = graph.indices[entry]
+            if node < neighbor:
+                weight = graph.weights[entry] if graph.weights is not None else 1
+                result[labels[node], labels[neighbor]] = float(weight)
+    return result
+
+
+def test_edge_list_merges_parallel_edges_and_drops_self_loops(tmp_path):
+    path = tmp_path / "edges.txt"
+    path.write_text("# comment\n1 2\n2 1\n2 3\n3 3\n")
+
+    graph = load_network(str(path), cache=False)
+    assert [str(label) for label in graph.labels] == ["1", "2", "3"]
+    assert edges(graph) == {("1", "2"): 2.0, ("2", "3"): 1.0}
+
+
+def test_weighted_edge_list_of_names(tmp_path):
+    path = tmp_path / "edges.txt"
+    path.write_text("alice bob 0.5\nbob carol 2\nalice bob 1\n")
+
+    graph = load_network(str(path), cache=False)
+    assert list(graph.labels) == ["alice", "bob", "carol"]
+    assert edges(graph) == {("alice", "bob"): 1.5, ("bob", "carol"): 2.0}
+
+
+def test_edge_list_with_a_single_column_is_rejected(tmp_path):
+    path = tmp_path / "nodes.txt"
+    path.write_text("1\n2\n")
+
+    with pytest.raises(Exception, match="is not an edge list"):
+        load_network(str(path), cache=False)
+
+
+def test_pajek_sections(tmp_path):
+    path = tmp_path / "network.net"
+    path.write_text(
+        "% comment\n"
+        "*Vertices 5\n"
+        '1 "Parma V" 0.0 0.0 ellipse\n'
+        "2 Colunga\n"
+        "*Edges\n"
+        "1 2 3 c Blue\n"
+        "*Arcs\n"
+        "2 3\n"
+        "*Edgeslist\n"
+        "4 1 5\n"
+    )
+
+    graph = load_network(str(path), cache=False)
+    assert list(graph.labels) == ["Parma V", "Colunga", "3", "4", "5"]
+    assert edges(graph) == {
+        ("Parma V", "Colunga"): 3.0,
+        ("Colunga", "3"): 1.0,
+        ("Parma V", "4"): 1.0,
+        ("4", "5"): 1.0,
+    }
+
+
+def test_cache_is_reused_until_the_file_changes(tmp_path):
+    path = tmp_path / "edges.txt"
+    path.write_text("a b\nb c\n")
+
+    graph = load_network(str(path))
+    assert os.path.isdir(str(path) + CACHE_SUFFIX)
+    cached = load_network(str(path))
+    assert isinstance(cached.indptr, np.memmap)
+    assert edges(cached) == edges(graph)
+
+    path.write_text("a b\nb c\nc d\n")
+    assert edges(load_network(str(path))) == {
+        ("a", "b"): 1.0,
+        ("b", "c"): 1.0,
+        ("c", "d"): 1.0,
+    }
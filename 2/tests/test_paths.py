@@ -0,0 +1,67 @@
+import pytest
+import paths
+from paths import SearchSide, find_paths_by_id
+
+
+# Fetched discographies of a small collaboration graph. Two shortest chains
+# lead from a to e, f only appears on releases of other artists
+DISCOGRAPHIES = {
+    "a": ["b", "c"],
+    "b": ["d"],
+    "c": ["d"],
+    "d": ["e"],
+    "e": [],
+    "f": [],
+    "g": ["f"],
+    "h": [],
+}
+
+
+@pytest.fixture
+def fetched(monkeypatch):
+    """
+    Serve the coauthors of DISCOGRAPHIES instead of fetching them, recording
+    every expanded artist.
+    """
+    expanded = []
+
+    def get_top_coauthors_by_id(artist_id, top_n=5):
+        expanded.append(artist_id)
+        return [{"id": coauthor_id} for coauthor_id in DISCOGRAPHIES[artist_id]][:top_n]
+
+    monkeypatch.setattr(paths, "get_top_coauthors_by_id", get_top_coauthors_by_id)
+    return expanded
+
+
+def test_search_side_keeps_every_shortest_parent():
+    side = SearchSide("a")
+    assert side.expand({"a": ["b", "c"]}) == ["b", "c"]
+    assert side.expand({"b": ["d", "a"], "c": ["d"]}) == ["d"]
+
+    assert list(side.paths_to("d")) == [["a", "b", "d"], ["a", "c", "d"]]
+
+
+def test_finds_every_shortest_chain(fetched):
+    result = find_paths_by_id("a", "e", max_workers=1)
+
+    assert result["length"] == 3
+    assert sorted(result["paths"]) == [["a", "b", "d", "e"], ["a", "c", "d", "e"]]
+    assert result["expanded"] == len(fetched)
+    assert not result["exhausted"]
+
+
+def test_follows_collaborations_credited_by_other_artists(fetched):
+    result = find_paths_by_id("f", "g", max_workers=1)
+
+    assert result["paths"] == [["f", "g"]]
+
+
+def test_same_artist_and_unreachable_artist(fetched):
+    assert find_paths_by_id("a", "a")["paths"] == [["a"]]
+    assert find_paths_by_id("a", "h", max_workers=1)["length"] is None
+
+
+def test_limits_stop_the_search(fetched):
+    assert find_paths_by_id("a", "e", max_length=2, max_workers=1)["paths"] == []
+    result = find_paths_by_id("a", "e", max_expanded=1, max_workers=1)
+    assert result["exhausted"] and result["paths"] == []
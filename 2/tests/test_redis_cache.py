@@ -0,0 +1,170 @@
+import os
+import shutil
+import socket
+import subprocess
+import threading
+import time
+import uuid
+import pytest
+import redis
+import get_data
+from redis_cache import RedisCache
+
+
+# URL of a running Redis to test against instead of starting a redis-server
+TEST_REDIS_URL = os.environ.get("COLLABORATION_TEST_REDIS_URL")
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+@pytest.fixture(scope="module")
+def redis_url():
+    """
+    Get the URL of a real Redis, starting a throwaway redis-server if none
+    is given, and skip the tests if neither is available.
+    """
+    if TEST_REDIS_URL:
+        yield TEST_REDIS_URL
+        return
+    if shutil.which("redis-server") is None:
+        pytest.skip("redis-server is not installed")
+    port = free_port()
+    process = subprocess.Popen(
+        ["redis-server", "--port", str(port), "--save", "", "--appendonly", "no"],
+        stdout=subprocess.DEVNULL,
+    )
+    url = f"redis://127.0.0.1:{port}/0"
+    client = redis.Redis.from_url(url)
+    try:
+        for _ in range(100):
+            try:
+                client.ping()
+                break
+            except redis.ConnectionError:
+                time.sleep(0.05)
+        else:
+            pytest.skip("redis-server did not start")
+        yield url
+    finally:
+        process.terminate()
+        process.wait()
+
+
+@pytest.fixture
+def cache(redis_url):
+    cache = RedisCache(redis_url, prefix=f"test:{uuid.uuid4().hex}:")
+    yield cache
+    for key in cache.client.scan_iter(f"{cache.prefix}*"):
+        cache.client.delete(key)
+
+
+def test_values_round_trip_with_ttl(cache):
+    cache.set("artist:x", {"name": "Ścianka", "tags": [1, None]}, ttl=60)
+    assert cache.get("artist:x") == (True, {"name": "Ścianka", "tags": [1, None]})
+    assert 0 < cache.client.ttl(cache.prefix + "artist:x") <= 60
+    assert cache.get("artist:missing") == (False, None)
+
+
+def test_values_not_shared_are_not_cached(cache):
+    def found(value):
+        return value is not None
+
+    assert cache.get_or_fetch("search:nobody", lambda: None, 60, share=found) is None
+    assert cache.get("search:nobody") == (False, None)
+    assert not cache.client.exists(f"{cache.prefix}lock:search:nobody")
+    assert cache.get_or_fetch("search:nobody", lambda: "x", 60, share=found) == "x"
+    assert cache.get("search:nobody") == (True, "x")
+
+
+def test_concurrent_misses_fetch_once(cache):
+    calls = []
+
+    def fetch():
+        calls.append(1)
+        time.sleep(0.3)
+        return ["track"]
+
+    results = []
+    threads = [
+        threading.Thread(
+            target=lambda: results.append(cache.get_or_fetch("songs:x", fetch, 60))
+        )
+        for _ in range(8)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(calls) == 1
+    assert results == [["track"]] * 8
+    assert not cache.client.exists(f"{cache.prefix}lock:songs:x")
+
+
+def test_waiter_reads_value_of_lock_holder(cache):
+    lock_key = f"{cache.prefix}lock:songs:x"
+    assert cache.client.set(lock_key, "other-replica", nx=True, px=10_000)
+    calls = []
+    results = []
+    waiter = threading.Thread(
+        target=lambda: results.append(
+            cache.get_or_fetch("songs:x", lambda: calls.append(1), 60)
+        )
+    )
+    waiter.start()
+    time.sleep(0.2)
+    cache.set("songs:x", ["shared"], 60)
+    cache.client.delete(lock_key)
+    waiter.join(5)
+
+    assert results == [["shared"]]
+    assert calls == []
+
+
+def test_release_script_keeps_lock_of_other_token(cache):
+    lock_key = f"{cache.prefix}lock:songs:x"
+    cache.client.set(lock_key, "other-replica", px=10_000)
+    assert cache._release_lock(keys=[lock_key], args=["mine"]) == 0
+    assert cache.client.get(lock_key) == b"other-replica"
+    assert cache._release_lock(keys=[lock_key], args=["other-replica"]) == 1
+    assert not cache.client.exists(lock_key)
+
+
+def test_failed_fetch_releases_lock(cache):
+    def fetch():
+        raise ValueError("upstream down")
+
+    with pytest.raises(ValueError):
+        cache.get_or_fetch("songs:x", fetch, 60)
+    assert not cache.client.exists(f"{cache.prefix}lock:songs:x")
+    assert cache.get_or_fetch("songs:x", lambda: ["track"], 60) == ["track"]
+
+
+def test_refresh_fetches_again_only_if_shared_value_is_older(cache):
+    cache.set("songs:x", ["shared"], 60)
+    before = time.time() - 1
+    after = time.time() + 1
+
+    assert cache.get_or_fetch("songs:x", lambda: ["new"], 60, before) == ["shared"]
+    assert cache.get_or_fetch("songs:x", lambda: ["new"], 60, after) == ["new"]
+    assert cache.get("songs:x") == (True, ["new"])
+
+
+def test_shared_fetch_keeps_negative_results_local(cache, monkeypatch):
+    monkeypatch.setattr(get_data, "SHARED_CACHE", cache)
+    results = {"Nobody": None, "Somebody": {"id": "x", "name": "Somebody"}}
+    calls = []
+
+    @get_data.shared("spotify_artist", found=lambda artist: artist is not None)
+    def search(artist_name):
+        calls.append(artist_name)
+        return results[artist_name]
+
+    for _ in range(2):
+        assert search("Nobody") is None
+        assert search("Somebody") == {"id": "x", "name": "Somebody"}
+    assert calls == ["Nobody", "Somebody", "Nobody"]
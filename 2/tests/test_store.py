@@ -0,0 +1,105 @@
+import pytest
+from adjacency import CoauthorIndex
+from markets import decode_markets, encode_markets
+from store import GraphStore
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = GraphStore(str(tmp_path / "graph.sqlite3"))
+    yield store
+    store.close()
+
+
+def track(track_id: str, *artist_ids: str, year=2020, markets=("PL",)) -> dict:
+    """
+    Build a fetched track crediting the artists, in the format of fetch_discography.
+    """
+    return {
+        "id": track_id,
+        "song_title": f"Song {track_id}",
+        "duration": 180000,
+        "isrc": None,
+        "release_year": year,
+        "markets": encode_markets(markets),
+        "artists": [
+            {"id": artist_id, "name": f"Artist {artist_id}"} for artist_id in artist_ids
+        ],
+    }
+
+
+def test_discography_round_trip(store):
+    store.save_discography(
+        "a", [track("t1", "a", "b", "c", year=2019), track("t2", "c", "a", year=None)]
+    )
+
+    songs = store.get_discography("a")
+    assert [song["song_title"] for song in songs] == ["Song t1", "Song t2"]
+    assert [[coauthor["id"] for coauthor in song["coauthors"]] for song in songs] == [
+        ["b", "c"],
+        ["c"],
+    ]
+    assert [song["release_year"] for song in songs] == [2019, None]
+    assert decode_markets(songs[0]["markets"]) == ["PL"]
+    assert store.get_fetched_at("discography", "a") is not None
+
+
+def test_top_coauthors_count_years_and_markets(store):
+    store.save_discography(
+        "a",
+        [
+            track("t1", "a", "b", year=2019, markets=("PL",)),
+            track("t2", "a", "b", "c", year=2020, markets=("US",)),
+            track("t3", "a", "b", year=2020, markets=()),
+        ],
+    )
+
+    top = store.get_top_coauthors("a", 1)
+    assert [(coauthor["id"], coauthor["count"]) for coauthor in top] == [("b", 3)]
+    assert top[0]["years"] == {2019: 1, 2020: 2}
+    assert decode_markets(top[0]["markets"]) == ["PL", "US"]
+
+
+def test_coauthor_ties_keep_the_order_of_first_appearance(store):
+    # The first track credits more artists than any positional weight could
+    # separate, the coauthor credited last on it still appears first
+    crowded = track("t1", "a", *[f"x{i}" for i in range(1000)], "late")
+    tracks = [crowded, track("t2", "early", "a"), track("t3", "a", "late", "early")]
+    store.save_discography("a", tracks)
+    index = CoauthorIndex()
+    index.ingest("a", tracks)
+
+    ids = [coauthor["id"] for coauthor in store.get_top_coauthors("a", None)]
+    assert ids[:2] == ["late", "early"]
+    assert ids == [coauthor["id"] for coauthor in index.top("a", None)]
+    assert [coauthor["id"] for coauthor in store.get_all_coauthors()["a"]] == ids
+
+
+def test_name_lookups_share_spellings(store):
+    store.save_name_lookup("spotify", "Björk", "b")
+    store.save_name_lookup("spotify", "Nobody", None)
+
+    assert store.lookup_name("spotify", " BJÖRK ")[0] == "b"
+    assert store.lookup_name("musicbrainz", "Björk") is None
+    artist_id, looked_up_at = store.lookup_name("spotify", "nobody")
+    assert artist_id is None and looked_up_at is not None
+
+
+def test_recordings_round_trip(store):
+    songs = [
+        {
+            "song_title": "Joga",
+            "musicbrainz_id": "m1",
+            "isrcs": ["GBAAA9700001"],
+            "release_date": "1997",
+        },
+        {
+            "song_title": "Hunter",
+            "musicbrainz_id": "m2",
+            "isrcs": [],
+            "release_date": "Unknown Date",
+        },
+    ]
+    store.save_recordings("a", songs)
+
+    assert [recording.to_dict() for recording in store.get_recordings("a")] == songs
@@ -0,0 +1,71 @@
+import networkx as nx
+import pytest
+from temporal import TemporalIndex
+
+
+def collaboration_graph() -> nx.Graph:
+    G = nx.Graph()
+    G.add_node("root", label="Root")
+    G.add_edge("root", "a", years={2001: 2, 2005: 1}, count=3)
+    # Years read back from JSON are strings
+    G.add_edge("root", "b", years={"2003": 4}, count=4)
+    G.add_edge("a", "b", years={}, count=1)
+    return G
+
+
+@pytest.mark.parametrize(
+    "first_year, last_year",
+    [
+        (2000, 2010),
+        (2001, 2001),
+        (2002, 2004),
+        (2004, 2005),
+        (1990, 1995),
+        (2006, 2010),
+    ],
+)
+def test_counts_match_the_songs_of_the_window(first_year, last_year):
+    G = collaboration_graph()
+    index = TemporalIndex(G)
+
+    expected = [
+        sum(
+            count
+            for year, count in years.items()
+            if first_year <= int(year) <= last_year
+        )
+        for _, _, years in G.edges(data="years")
+    ]
+    assert index.counts(first_year, last_year).tolist() == expected
+
+
+def test_window_spanning_every_year_is_the_graph():
+    G = collaboration_graph()
+    index = TemporalIndex(G)
+
+    assert (index.first_year, index.last_year) == (2001, 2005)
+    assert index.window_graph(G, 2001, 2005) is G
+    assert index.window_graph(G, 1990, 2020) is G
+
+
+def test_window_keeps_artists_with_songs_in_it():
+    G = collaboration_graph()
+    window = TemporalIndex(G).window_graph(G, 2004, 2010, keep=["root"])
+
+    assert sorted(window.nodes) == ["a", "root"]
+    assert window.nodes["root"]["label"] == "Root"
+    assert window.edges["root", "a"]["count"] == 1
+    assert window.edges["root", "a"]["label"] == "1 co."
+
+    empty = TemporalIndex(G).window_graph(G, 1990, 1995, keep=["root", "missing"])
+    assert list(empty.nodes) == ["root"] and not empty.edges
+
+
+def test_graph_without_known_years():
+    G = nx.Graph()
+    G.add_edge("a", "b", years={})
+    index = TemporalIndex(G)
+
+    assert index.first_year is None
+    assert index.counts(2000, 2010).tolist() == [0]
+    assert index.window_graph(G, 2000, 2010) is G